@@ -116,6 +116,7 @@ pre_market_list = ['NIFTY 50', 'Nifty Bank', 'Emerge', 'Securities in F&O', 'Oth
 # print(nse.get_corporate_action('01-01-2025','31-01-2025', "Dividend"))  # To download Dividend data only
 # print(nse.get_corporate_action('01-01-2025','31-01-2025', "Split"))  # To download Split data only
 # print(nse.get_corporate_action('01-01-2025','31-03-2025', "Buy Back"))  # To download Buy Back data only
+# print(nse.ohlcv_history(['RELIANCE'], '01-01-2015', '31-12-2024', adjust=True))  # Split/bonus adjusted OHLCV
 
 #---------------------------- Corporate Announcements  ------------------#
 # print(nse.get_corporate_announcement().head())  # To download Corp announcements in the last one month
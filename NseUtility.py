@@ -1,9 +1,50 @@
-import requests
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from io import StringIO, BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import tempfile
+import threading
 import zipfile
 
+import numpy as np
+
+import nse_schema
+from nse_adjust import CorporateActions
+from nse_resample import format_dates
+from nse_symbol_index import SymbolIndex
+from nse_cache import BhavCopyCache, as_date
+from nse_calendar import TradingCalendar
+from nse_session import NseSession
+from nse_store import BhavCopyStore
+from nse_throttle import AdaptiveRateLimiter, RateLimiter
+
+
+class ArchiveError(FileNotFoundError):
+    """
+    A bhavcopy archive file could not be downloaded. status_code is the HTTP status NSE answered with;
+    only a 404 means the file was not published (eg: an unlisted holiday), anything else is worth retrying.
+    """
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def not_published(self) -> bool:
+        """True when NSE answered 404: there is no such file."""
+        return self.status_code == 404
+
+
+def normalize_index_name(name):
+    """Normalize index name for better matching with NSE index names."""
+    if not name:
+        return name
+    replacements = {'nifty': 'NIFTY', 'sensex': 'SENSEX', 'bankex': 'BANKEX'}
+    return ' '.join(replacements.get(word.lower(), word) for word in name.split())
+
 
 class NseUtils:
     equity_market_list = ['NIFTY 50', 'NIFTY NEXT 50', 'NIFTY MIDCAP 50', 'NIFTY MIDCAP 100',
@@ -23,38 +64,216 @@ class NseUtils:
                           'NIFTY100 LIQUID 15',
                           'NIFTY MIDCAP LIQUID 15']
     pre_market_list = ['NIFTY 50', 'Nifty Bank', 'Emerge', 'Securities in F&O', 'Others', 'All']
-
-    def __init__(self):
-
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Upgrade-Insecure-Requests': "1",
-            "DNT": "1",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*,q=0.8",
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Referer': 'https://www.nseindia.com'
-        }
-
-        self.session = requests.Session()
+    pre_market_xref = {"NIFTY 50": "NIFTY", "Nifty Bank": "BANKNIFTY", "Emerge": "SME", "Securities in F&O": "FO",
+                       "Others": "OTHERS", "All": "ALL"}
+
+    default_headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Upgrade-Insecure-Requests': "1",
+        "DNT": "1",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*,q=0.8",
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+        'Referer': 'https://www.nseindia.com'
+    }
+
+    # Option chain leg fields as (column suffix, NSE key); the last four are only kept in full oi_mode
+    option_leg_fields = [('OI', 'openInterest'), ('Chng_in_OI', 'changeinOpenInterest'),
+                         ('Volume', 'totalTradedVolume'), ('IV', 'impliedVolatility'), ('LTP', 'lastPrice'),
+                         ('Net_Chng', 'change'), ('Bid_Qty', 'bidQty'), ('Bid_Price', 'bidprice'),
+                         ('Ask_Price', 'askPrice'), ('Ask_Qty', 'askQty')]
+
+    # Bhav copy columns that make up an OHLCV series, per report type
+    ohlcv_columns = {
+        'sec_bhavdata_full': {'SYMBOL': 'Symbol', 'OPEN_PRICE': 'Open', 'HIGH_PRICE': 'High', 'LOW_PRICE': 'Low',
+                              'CLOSE_PRICE': 'Close', 'TTL_TRD_QNTY': 'Volume'},
+        'ind_close_all': {'Index Name': 'Symbol', 'Open Index Value': 'Open', 'High Index Value': 'High',
+                          'Low Index Value': 'Low', 'Closing Index Value': 'Close', 'Volume': 'Volume'},
+    }
+
+    def __init__(self, cache: BhavCopyCache = None, store: BhavCopyStore = None,
+                 requests_per_second: float = 5, calendar: TradingCalendar = None, rate_limiter=None,
+                 index: SymbolIndex = None):
+        """
+        :param cache: Optional BhavCopyCache. When provided, bhavcopy files for closed trading days
+        are served from disk instead of being downloaded again
+        :param store: Optional BhavCopyStore. When provided, every parsed bhavcopy is also written
+        to the columnar store for later symbol/date range queries
+        :param requests_per_second: Starting request rate per NSE host, shared by all worker threads. The
+        pace backs off when NSE pushes back (403/429/5xx) and recovers while responses are healthy
+        :param calendar: Optional TradingCalendar. If not provided, one backed by this instance is
+        created on first use
+        :param rate_limiter: Optional limiter from nse_throttle (eg: RateLimiter for a fixed pace) used
+        instead of the default AdaptiveRateLimiter
+        :param index: Optional SymbolIndex. When provided, every parsed equity/index bhavcopy is appended
+        to the per-symbol index, and ohlcv_history reads indexed days from it
+        """
+        self.cache = cache
+        self.store = store
+        self.index = index
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(requests_per_second)
+        self._calendar = calendar
+        self._corporate_actions = None
+        self._calendar_lock = threading.Lock()
+        self._local = threading.local()  # defer_index: set on iter_bhav_copies workers
+
+        self.headers = dict(self.default_headers)
+
+        # One pooled, rate limited session shared by every method; cookies are warmed once and re-warmed on expiry/403
+        self.http = NseSession(self.headers, rate_limiter=self.rate_limiter)
+        self.session = self.http.session
         # Initialize session with NSE homepage to get cookies
         try:
-            self.session.get("https://www.nseindia.com", headers=self.headers, timeout=10)
+            self.http.warm()
         except:
             pass  # Continue even if initial request fails
         self.cookies = self.session.cookies.get_dict()
 
-    def pre_market_info(self, category='All'):
-        pre_market_xref = {"NIFTY 50": "NIFTY", "Nifty Bank": "BANKNIFTY", "Emerge": "SME", "Securities in F&O": "FO",
-                           "Others": "OTHERS", "All": "ALL"}
+    def _get_archive(self, report: str, trade_date: datetime, urls, parse):
+        """
+        Download and parse a bhavcopy archive file, serving closed trading days from the local cache when available.
+        A download is cached only once it parses to a non-empty report, and a cached copy that does not is dropped
+        and downloaded again
+        :param report: Report type used as the cache key eg: 'sec_bhavdata_full'
+        :param trade_date: Trade date of the report
+        :param urls: Url, or urls to try in order; the next one is tried only when NSE answers 403
+        :param parse: Callable(content) returning the parsed report as a data frame
+        :return: (status_code, bhav_df). bhav_df is None unless status_code is 200
+        """
+        if self.cache is not None:
+            content = self.cache.get(report, trade_date)
+            if content is not None:
+                try:
+                    bhav_df = parse(content)
+                except Exception:
+                    bhav_df = None
+                if bhav_df is not None and not bhav_df.empty:
+                    return 200, bhav_df
+                self.cache.discard(report, trade_date)
+        status_code = None
+        for url in [urls] if isinstance(urls, str) else urls:
+            response = self.http.fetch(url, headers=self.headers, cookies=self.cookies)
+            status_code = response.status_code
+            if status_code == 200:
+                bhav_df = parse(response.content)
+                if self.cache is not None and not bhav_df.empty:
+                    self.cache.put(report, trade_date, response.content)
+                return status_code, bhav_df
+            if status_code != 403:
+                break
+        return status_code, None
+
+    @staticmethod
+    def _read_zip_csv(report: str, content: bytes) -> pd.DataFrame:
+        """Parse the last csv member of a zipped bhavcopy held in memory."""
+        bhav_df = pd.DataFrame()
+        zip_bhav = zipfile.ZipFile(BytesIO(content), 'r')
+        for file_name in zip_bhav.filelist:
+            if file_name:
+                bhav_df = nse_schema.read_csv(report, zip_bhav.open(file_name))
+        return bhav_df
+
+    def _spool_archive(self, report: str, trade_date: datetime, urls):
+        """
+        Download a bhavcopy archive file to disk without holding it in memory. A cached copy is read in place,
+        through a handle opened before cache eviction could remove it. The caller caches a download with
+        put_file once it has parsed.
+        :param report: Report type used as the cache key eg: 'fo_bhavcopy'
+        :param trade_date: Trade date of the report
+        :param urls: Urls to try in order; the next one is tried only when NSE answers 403
+        :return: (status_code, source, is_temp). source is the path of a temp file the caller deletes when
+        is_temp is True, else an open file of the cached copy the caller closes
+        """
+        if self.cache is not None:
+            cached = self.cache.open(report, trade_date)
+            if cached is not None:
+                return 200, cached, False
+        status_code = None
+        for url in urls:
+            with self.http.fetch(url, headers=self.headers, cookies=self.cookies, stream=True) as response:
+                status_code = response.status_code
+                if status_code == 200:
+                    fd, path = tempfile.mkstemp(prefix=f'{report}_', suffix='.tmp')
+                    with os.fdopen(fd, 'wb') as fh:
+                        for block in response.iter_content(chunk_size=1024 * 1024):
+                            fh.write(block)
+                    return status_code, path, True
+            if status_code != 403:
+                break
+        return status_code, None, False
+
+    @staticmethod
+    def _read_zip_csv_chunks(source, report: str, columns=None, filters=None, chunksize: int = 100_000):
+        """
+        Parse the csv members of a zip file chunk by chunk, keeping only the requested columns and rows
+        :param source: Zip file path, or a binary file object open on one
+        :param report: Report type whose schema supplies the column dtypes eg: 'fo_bhavcopy'
+        :param columns: Optional list of columns to keep. Filter columns are read even if not listed
+        :param filters: Optional dict of column -> list of allowed values, applied to every chunk
+        :param chunksize: Rows parsed at a time
+        :return: pandas data frame of the last csv member, like the in-memory readers
+        """
+        filters = {column: set(values) for column, values in (filters or {}).items()}
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(list(columns) + list(filters)))
+        dtypes = nse_schema.read_dtypes(report, usecols, chunked=True)
+        options = nse_schema.read_options(report)
+
+        bhav_df = pd.DataFrame()
+        with zipfile.ZipFile(source, 'r') as zip_bhav:
+            for member in zip_bhav.filelist:
+                frames = []
+                with zip_bhav.open(member) as fh:
+                    for chunk in pd.read_csv(fh, usecols=usecols, dtype=dtypes, chunksize=chunksize, **options):
+                        for column, allowed in filters.items():
+                            chunk = chunk[chunk[column].isin(allowed)]
+                        if len(chunk):
+                            frames.append(chunk)
+                bhav_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=usecols)
+        if columns is not None:
+            bhav_df = bhav_df[list(columns)]
+        return nse_schema.finalize(report, bhav_df)
+
+    @property
+    def calendar(self) -> TradingCalendar:
+        """Trading calendar used to skip weekends and holidays before any request is made."""
+        if self._calendar is None:
+            with self._calendar_lock:
+                if self._calendar is None:
+                    self._calendar = TradingCalendar(self)
+        return self._calendar
+
+    @property
+    def corporate_actions(self) -> CorporateActions:
+        """Locally persisted corporate actions used by ohlcv_history(adjust=True)."""
+        if self._corporate_actions is None:
+            self._corporate_actions = CorporateActions(self)
+        return self._corporate_actions
+
+    def _store_bhav(self, report: str, trade_date: datetime, bhav_df: pd.DataFrame):
+        """
+        Write a parsed bhavcopy to the columnar store and the symbol index, if configured. Days fetched by
+        iter_bhav_copies workers are indexed by the iterator instead, in date order
+        """
+        if bhav_df.empty:
+            return
+        if self.store is not None:
+            self.store.write(report, trade_date, bhav_df)
+        if self.index is not None and not getattr(self._local, 'defer_index', False):
+            self.index.add_day(report, trade_date, bhav_df)
 
+    def pre_market_info(self, category='All'):
         ref_url = 'https://www.nseindia.com/market-data/pre-open-market-cm-and-emerge-market'
-        ref = requests.get(ref_url, headers=self.headers)
-        url = f"https://www.nseindia.com/api/market-data-pre-open?key={pre_market_xref[category]}"
-        response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+        url = f"https://www.nseindia.com/api/market-data-pre-open?key={self.pre_market_xref[category]}"
+        response = self.http.get(url, ref_url)
+        return self._parse_pre_market(response.json())
+
+    @staticmethod
+    def _parse_pre_market(payload):
         processed_data = []
-        data = response.json()['data']
+        data = payload['data']
         for i in data:
             processed_data.append(i["metadata"])
         df = pd.DataFrame(processed_data)
@@ -65,9 +284,12 @@ class NseUtils:
         category = category.upper().replace('&', '%26').replace(' ', '%20')
 
         ref_url = "https://www.nseindia.com/market-data/live-equity-market?symbol={category}"
-        ref = requests.get(ref_url, headers=self.headers)
         url = f"https://www.nseindia.com/api/equity-stockIndices?index={category}"
-        data = requests.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()
+        data = self.http.get(url, ref_url).json()
+        return self._parse_index_details(data, list_only)
+
+    @staticmethod
+    def _parse_index_details(data, list_only=False):
         df = pd.DataFrame(data['data'])
         df = df.drop(["meta"], axis=1)
         df = df.set_index("symbol", drop=True)
@@ -84,8 +306,7 @@ class NseUtils:
         full details are provided in a dataframe
         :return:
         """
-        data = self.session.get(f'https://www.nseindia.com/api/holiday-master?type={'Clearing'.lower()}',
-                                headers=self.headers).json()
+        data = self.http.get('https://www.nseindia.com/api/holiday-master?type=clearing').json()
         df = pd.DataFrame(list(data.values())[0])
         if list_only:
             holiday_list = df['tradingDate'].tolist()
@@ -99,8 +320,7 @@ class NseUtils:
         full details are provided in a dataframe
         :return:
         """
-        data = self.session.get(f'https://www.nseindia.com/api/holiday-master?type={'Trading'.lower()}',
-                                headers=self.headers).json()
+        data = self.http.get('https://www.nseindia.com/api/holiday-master?type=trading').json()
         df = pd.DataFrame(list(data.values())[0])
         if list_only:
             holiday_list = df['tradingDate'].tolist()
@@ -108,17 +328,33 @@ class NseUtils:
         else:
             return df
 
-    def is_nse_trading_holiday(self, date_str=None):
+    def _holiday_set(self, kind: str) -> frozenset:
         """
-        Return True if the date supplied in a NSE trading holiday, else False
-        :param date_str: Optional. If no date provided, current data will be assumed
-        :return:
+        Return the NSE holidays of a kind as a frozenset of dates, from the persisted trading calendar
+        :param kind: 'trading' or 'clearing'
         """
-        holidays = self.trading_holidays(list_only=True)  # Fetch Trading holiday list from NSE
+        return self.calendar.holiday_set(kind)
 
+    def _is_holiday(self, kind: str, date_str):
+        holidays = self._holiday_set(kind)
         date_format = "%d-%b-%Y"  # Define the expected date format
-        # If date_str is provided, validate and parse it
-        if date_str:
+
+        # Batch check - array of dates in, boolean vector out
+        if date_str is not None and not isinstance(date_str, (str, date)):
+            # 'dd-Mon-YYYY', then the 'dd-mm-YYYY' used elsewhere (never inferred month-first), then ISO and datetimes
+            for parse_format in (date_format, '%d-%m-%Y', None):
+                try:
+                    dates = pd.to_datetime(pd.Series(date_str), format=parse_format)
+                    break
+                except (ValueError, TypeError):
+                    if parse_format is None:
+                        raise
+            return np.fromiter((day in holidays for day in dates.dt.date), dtype=bool, count=len(dates))
+
+        if isinstance(date_str, date):
+            date_obj = date_str if isinstance(date_str, datetime) else datetime.combine(date_str, datetime.min.time())
+        elif date_str:
+            # If date_str is provided, validate and parse it
             try:
                 date_obj = datetime.strptime(date_str, date_format)  # Convert string to datetime
             except ValueError:
@@ -127,30 +363,25 @@ class NseUtils:
         else:
             date_obj = datetime.today()  # Use today's date if no input is given
 
-        formatted_date = date_obj.strftime(date_format)  # Convert date back to the required format
-        return formatted_date in holidays  # Check if it’s a holiday
+        return date_obj.date() in holidays  # Check if it’s a holiday
+
+    def is_nse_trading_holiday(self, date_str=None):
+        """
+        Return True if the date supplied in a NSE trading holiday, else False
+        :param date_str: Optional. If no date provided, current data will be assumed. A list/array of
+        dates returns a numpy boolean array
+        :return:
+        """
+        return self._is_holiday('trading', date_str)
 
     def is_nse_clearing_holiday(self, date_str=None):
         """
         Return True if the date supplied in a NSE clearing holiday, else False
-        :param date_str: Optional. If no date provided, current data will be assumed
+        :param date_str: Optional. If no date provided, current data will be assumed. A list/array of
+        dates returns a numpy boolean array
         :return:
         """
-        holidays = self.clearing_holidays(list_only=True)  # Fetch Trading holiday list from NSE
-
-        date_format = "%d-%b-%Y"  # Define the expected date format
-        # If date_str is provided, validate and parse it
-        if date_str:
-            try:
-                date_obj = datetime.strptime(date_str, date_format)  # Convert string to datetime
-            except ValueError:
-                print("Error: Invalid date format! Please use 'DD-MMM-YYYY' (e.g., '19-Feb-2025').")
-                return None
-        else:
-            date_obj = datetime.today()  # Use today's date if no input is given
-
-        formatted_date = date_obj.strftime(date_format)  # Convert date back to the required format
-        return formatted_date in holidays  # Check if it’s a holiday
+        return self._is_holiday('clearing', date_str)
 
     def equity_info(self, symbol):
         """
@@ -162,13 +393,12 @@ class NseUtils:
 
         # Fetch primary details
         ref_url = 'https://www.nseindia.com/get-quotes/equity?symbol=' + symbol
-        ref = requests.get(ref_url, headers=self.headers)
         url = 'https://www.nseindia.com/api/quote-equity?symbol=' + symbol
-        data = requests.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()
+        data = self.http.get(url, ref_url).json()
 
         # Fetch Trade Data for symbol  ('Trade Information' tab on NSE website)
         url = 'https://www.nseindia.com/api/quote-equity?symbol=' + symbol + "&section=trade_info"
-        trade_data = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()
+        trade_data = self.http.get(url, ref_url).json()
 
         # Merge Meta data with Trade Information into final dataset
         data['tradeData'] = trade_data
@@ -183,9 +413,12 @@ class NseUtils:
         """
         symbol = symbol.replace(' ', '%20').replace('&', '%26')
         ref_url = 'https://www.nseindia.com/get-quotes/equity?symbol=' + symbol
-        ref = requests.get(ref_url, headers=self.headers)
         url = 'https://www.nseindia.com/api/quote-equity?symbol=' + symbol
-        data = requests.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()
+        data = self.http.get(url, ref_url).json()
+        return self._parse_price_info(symbol, data)
+
+    @staticmethod
+    def _parse_price_info(symbol, data):
         if not data:
             return None
         if 'error' in data:
@@ -216,10 +449,13 @@ class NseUtils:
         symbol = symbol.replace(' ', '%20').replace('&', '%26')
 
         ref_url = 'https://www.nseindia.com/get-quotes/derivatives?symbol=' + symbol
-        ref = requests.get(ref_url, headers=self.headers)
 
         url = 'https://www.nseindia.com/api/quote-derivative?symbol=' + symbol
-        data = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()
+        data = self.http.get(url, ref_url).json()
+        return self._parse_futures(data, indices)
+
+    @staticmethod
+    def _parse_futures(data, indices=False):
         lst = []
         for i in data["stocks"]:
             if i["metadata"]["instrumentType"] == ("Index Futures" if indices else "Stock Futures"):
@@ -239,13 +475,15 @@ class NseUtils:
         if not indices:
             ref_url = 'https://www.nseindia.com/option-chain'
             url = 'https://www.nseindia.com/api/option-chain-v3?type=Equity&symbol=' + symbol + '&expiry=' + expiry
-            ref = requests.get(ref_url, headers=self.headers)
-            data = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()["records"]
+            data = self.http.get(url, ref_url).json()["records"]
         else:
             ref_url = 'https://www.nseindia.com/option-chain'
             url = 'https://www.nseindia.com/api/option-chain-v3?type=Indices&symbol=' + symbol + '&expiry=' + expiry
-            ref = requests.get(ref_url, headers=self.headers)
-            data = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()["records"]
+            data = self.http.get(url, ref_url).json()["records"]
+        return self._parse_option_chain(data)
+
+    @staticmethod
+    def _parse_option_chain(data):
         my_df = []
         for i in data["data"]:
             for k, v in i.items():
@@ -267,7 +505,7 @@ class NseUtils:
         """
         url = 'https://nsearchives.nseindia.com/content/CM_52_wk_High_low_25012024.csv'
 
-        response = requests.get(url, headers=self.headers)
+        response = self.http.fetch(url, headers=self.headers)
         data = StringIO(response.text.replace(
             '"Disclaimer - The Data provided in the adjusted 52 week high and adjusted 52 week low columns  are adjusted for corporate actions (bonus, splits & rights).For actual (unadjusted) 52 week high & low prices, kindly refer bhavcopy."\n"Effective for 25-Jan-2024"\n',
             ''))
@@ -287,38 +525,66 @@ class NseUtils:
         # Return the full 52 Week High/Low list of all stocks
         return df
 
-    def fno_bhav_copy(self, trade_date: str = ""):
+    def fno_bhav_copy(self, trade_date: str = "", stream: bool = False, symbols=None, instruments=None,
+                      columns=None, chunksize: int = 100_000):
         """
         Get the NSE FNO bhav copy data as per the traded date
         :param trade_date: eg:'20-06-2023'
+        :param stream: Spool the file to disk and parse it in chunks instead of in memory. Implied by any filter
+        :param symbols: Optional symbol or list of TckrSymb values to keep eg: ['NIFTY', 'BANKNIFTY']
+        :param instruments: Optional instrument type or list of FinInstrmTp values to keep eg: ['IDF', 'IDO']
+        :param columns: Optional list of columns to keep
+        :param chunksize: Rows parsed at a time in streaming mode
         :return: pandas data frame
         """
-        bhav_df = pd.DataFrame()
         trade_date = datetime.strptime(trade_date, "%d-%m-%Y")
         url = 'https://nsearchives.nseindia.com/content/fo/BhavCopy_NSE_FO_0_0_0_'
         payload = f"{str(trade_date.strftime('%Y%m%d'))}_F_0000.csv.zip"
-        request_bhav = self.session.get(url + payload, headers=self.headers, cookies=self.cookies)
-        bhav_df = pd.DataFrame()
+        url2 = "https://www.nseindia.com/api/reports?archives=" \
+               "%5B%7B%22name%22%3A%22F%26O%20-%20Bhavcopy(csv)%22%2C%22type%22%3A%22archives%22%2C%22category%22" \
+               f"%3A%22derivatives%22%2C%22section%22%3A%22equity%22%7D%5D&date={str(trade_date.strftime('%d-%b-%Y'))}" \
+               f"&type=equity&mode=single"
+
+        if stream or symbols is not None or instruments is not None or columns is not None:
+            return self._stream_fno_bhav_copy(trade_date, [url + payload, url2 + payload], symbols, instruments,
+                                              columns, chunksize)
 
-        if request_bhav.status_code == 200:
-            zip_bhav = zipfile.ZipFile(BytesIO(request_bhav.content), 'r')
-            for file_name in zip_bhav.filelist:
-                if file_name:
-                    bhav_df = pd.read_csv(zip_bhav.open(file_name))
-        elif request_bhav.status_code == 403:
-            url2 = "https://www.nseindia.com/api/reports?archives=" \
-                   "%5B%7B%22name%22%3A%22F%26O%20-%20Bhavcopy(csv)%22%2C%22type%22%3A%22archives%22%2C%22category%22" \
-                   f"%3A%22derivatives%22%2C%22section%22%3A%22equity%22%7D%5D&date={str(trade_date.strftime('%d-%b-%Y'))}" \
-                   f"&type=equity&mode=single"
-            request_bhav = self.session.get(url2 + payload, headers=self.headers, cookies=self.cookies)
-            if request_bhav.status_code == 200:
-                zip_bhav = zipfile.ZipFile(BytesIO(request_bhav.content), 'r')
-                for file_name in zip_bhav.filelist:
-                    if file_name:
-                        bhav_df = pd.read_csv(zip_bhav.open(file_name))
-            elif request_bhav.status_code == 403:
-                raise FileNotFoundError(f' Data not found, change the date...')
+        status_code, bhav_df = self._get_archive('fo_bhavcopy', trade_date, [url + payload, url2 + payload],
+                                                 lambda content: self._read_zip_csv('fo_bhavcopy', content))
+        if status_code != 200:
+            raise ArchiveError(f' Data not found, change the date... (HTTP {status_code})', status_code)
 
+        self._store_bhav('fo_bhavcopy', trade_date, bhav_df)
+        return bhav_df
+
+    def _stream_fno_bhav_copy(self, trade_date: datetime, urls, symbols=None, instruments=None, columns=None,
+                              chunksize: int = 100_000):
+        """Streaming mode of fno_bhav_copy: peak memory is one parsed chunk plus the rows that pass the filters."""
+        status_code, source, is_temp = self._spool_archive('fo_bhavcopy', trade_date, urls)
+        if status_code != 200:
+            raise ArchiveError(f' Data not found, change the date... (HTTP {status_code})', status_code)
+        filters = {}
+        if symbols is not None:
+            filters['TckrSymb'] = [symbols] if isinstance(symbols, str) else list(symbols)
+        if instruments is not None:
+            filters['FinInstrmTp'] = [instruments] if isinstance(instruments, str) else list(instruments)
+        try:
+            bhav_df = self._read_zip_csv_chunks(source, 'fo_bhavcopy', columns, filters, chunksize)
+            if is_temp and self.cache is not None:
+                self.cache.put_file('fo_bhavcopy', trade_date, source)  # Only once it has parsed
+        except Exception:
+            if not is_temp and self.cache is not None:
+                source.close()  # Before the blob is removed, which Windows refuses while it is open
+                self.cache.discard('fo_bhavcopy', trade_date)
+            raise
+        finally:
+            if is_temp:
+                os.remove(source)
+            else:
+                source.close()
+        # Only complete reports go to the columnar store
+        if not filters and columns is None:
+            self._store_bhav('fo_bhavcopy', trade_date, bhav_df)
         return bhav_df
 
     def bhav_copy_with_delivery(self, trade_date: str):
@@ -332,14 +598,12 @@ class NseUtils:
         url = f'https://nsearchives.nseindia.com/products/content/sec_bhavdata_full_{use_date}.csv'
         
         # Use session to maintain cookies
-        request_bhav = self.session.get(url, headers=self.headers, cookies=self.cookies)
-        if request_bhav.status_code == 200:
-            bhav_df = pd.read_csv(BytesIO(request_bhav.content))
-        else:
-            raise FileNotFoundError(f' Data not found, change the trade_date...')
-        bhav_df.columns = [name.replace(' ', '') for name in bhav_df.columns]
-        bhav_df['SERIES'] = bhav_df['SERIES'].str.replace(' ', '')
-        bhav_df['DATE1'] = bhav_df['DATE1'].str.replace(' ', '')
+        status_code, bhav_df = self._get_archive('sec_bhavdata_full', trade_date, url,
+                                                 lambda content: nse_schema.read_csv('sec_bhavdata_full',
+                                                                                     BytesIO(content)))
+        if status_code != 200:
+            raise ArchiveError(f' Data not found, change the trade_date... (HTTP {status_code})', status_code)
+        self._store_bhav('sec_bhavdata_full', trade_date, bhav_df)
         return bhav_df
 
     def equity_bhav_copy(self, trade_date: str):
@@ -352,15 +616,11 @@ class NseUtils:
         # trade_date = datetime.strptime(trade_date, dd_mm_yyyy)
         url = 'https://nsearchives.nseindia.com/content/cm/BhavCopy_NSE_CM_0_0_0_'
         payload = f"{str(trade_date.strftime('%Y%m%d'))}_F_0000.csv.zip"
-        request_bhav = self.session.get(url + payload, headers=self.headers, cookies=self.cookies)
-        bhav_df = pd.DataFrame()
-        if request_bhav.status_code == 200:
-            zip_bhav = zipfile.ZipFile(BytesIO(request_bhav.content), 'r')
-            for file_name in zip_bhav.filelist:
-                if file_name:
-                    bhav_df = pd.read_csv(zip_bhav.open(file_name))
-        elif request_bhav.status_code == 403:
-            raise FileNotFoundError(f' Data not found, change the trade_date...')
+        status_code, bhav_df = self._get_archive('cm_bhavcopy', trade_date, url + payload,
+                                                 lambda content: self._read_zip_csv('cm_bhavcopy', content))
+        if status_code != 200:
+            raise ArchiveError(f' Data not found, change the trade_date... (HTTP {status_code})', status_code)
+        self._store_bhav('cm_bhavcopy', trade_date, bhav_df)
         return bhav_df
 
     def bhav_copy_indices(self, trade_date: str):
@@ -373,15 +633,185 @@ class NseUtils:
         url = f"https://nsearchives.nseindia.com/content/indices/ind_close_all_{str(trade_date.strftime('%d%m%Y').upper())}.csv"
         
         # Use session to maintain cookies
-        nse_resp = self.session.get(url, headers=self.headers, cookies=self.cookies)
-        if nse_resp.status_code != 200:
-            raise FileNotFoundError(f" No data available for : {trade_date}")
-        try:
-            bhav_df = pd.read_csv(BytesIO(nse_resp.content))
-        except Exception as e:
-            raise FileNotFoundError(f' Bhav copy indices not found for : {trade_date} :: NSE error : {e}')
+        def parse(content):
+            try:
+                return nse_schema.read_csv('ind_close_all', BytesIO(content))
+            except Exception as e:
+                raise ValueError(f' Bhav copy indices could not be parsed for : {trade_date} :: NSE error : {e}')
+
+        status_code, bhav_df = self._get_archive('ind_close_all', trade_date, url, parse)
+        if status_code != 200:
+            raise ArchiveError(f" No data available for : {trade_date} (HTTP {status_code})", status_code)
+        self._store_bhav('ind_close_all', trade_date, bhav_df)
         return bhav_df
 
+    def iter_bhav_copy_range(self, report: str, from_date: str, to_date: str, max_workers: int = 4,
+                             trading_days_only: bool = True):
+        """
+        Fetch a bhavcopy for every day in a date range using a bounded pool of worker threads.
+        Downloads are paced by the shared rate limiter and results are yielded in date order.
+        :param report: 'sec_bhavdata_full', 'ind_close_all', 'cm_bhavcopy' or 'fo_bhavcopy'
+        :param from_date: eg:'01-06-2023' ('dd-mm-YYYY')
+        :param to_date: eg:'20-06-2023' ('dd-mm-YYYY')
+        :param max_workers: Number of days fetched concurrently
+        :param trading_days_only: Skip weekends and known holidays without requesting them
+        :return: generator of (trade_date, bhav_df, error). bhav_df is None when the day failed
+        (eg: unlisted holiday), in which case error holds the exception
+        """
+        if trading_days_only:
+            dates = [day.to_pydatetime() for day in self.calendar.trading_days(from_date, to_date)]
+        else:
+            from_dt = as_date(from_date)
+            to_dt = as_date(to_date)
+            dates = [datetime.combine(from_dt + timedelta(days=n), datetime.min.time())
+                     for n in range((to_dt - from_dt).days + 1)]
+        return self.iter_bhav_copy_dates(report, dates, max_workers)
+
+    def iter_bhav_copy_dates(self, report: str, dates, max_workers: int = 4):
+        """
+        Fetch a bhavcopy for each of the given dates using a bounded pool of worker threads.
+        Results are yielded in the order of `dates`.
+        :param report: 'sec_bhavdata_full', 'ind_close_all', 'cm_bhavcopy' or 'fo_bhavcopy'
+        :param dates: Iterable of datetime
+        :param max_workers: Number of days fetched concurrently
+        :return: generator of (trade_date, bhav_df, error) as for iter_bhav_copy_range
+        """
+        self._bhav_method(report)  # Fail on an unknown report before any worker starts
+        for _, trade_date, bhav_df, error in self.iter_bhav_copies(((report, day) for day in dates), max_workers):
+            yield trade_date, bhav_df, error
+
+    def iter_bhav_copies(self, fetches, max_workers: int = 4):
+        """
+        Fetch bhavcopies of any report types using a bounded pool of worker threads.
+        Results are yielded in the order of `fetches`, and appended to the symbol index in that order.
+        :param fetches: Iterable of (report, trade_date) with trade_date a datetime
+        :param max_workers: Number of files fetched concurrently
+        :return: generator of (report, trade_date, bhav_df, error) as for iter_bhav_copy_range
+        """
+        def fetch_day(report, trade_date):
+            # Workers finish out of order; the index is fed below, as days are yielded in order
+            self._local.defer_index = True
+            try:
+                return self._bhav_method(report)(trade_date.strftime('%d-%m-%Y')), None
+            except Exception as e:
+                return None, e
+            finally:
+                self._local.defer_index = False
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            fetch_iter = iter(fetches)
+            # Keep a bounded window of submitted days so memory stays flat on long ranges
+            for report, trade_date in fetch_iter:
+                pending.append((report, trade_date, executor.submit(fetch_day, report, trade_date)))
+                if len(pending) >= max_workers * 2:
+                    break
+            while pending:
+                report, trade_date, future = pending.popleft()
+                bhav_df, error = future.result()
+                next_fetch = next(fetch_iter, None)
+                if next_fetch is not None:
+                    pending.append((*next_fetch, executor.submit(fetch_day, *next_fetch)))
+                if self.index is not None and error is None and bhav_df is not None and not bhav_df.empty:
+                    self.index.add_day(report, trade_date, bhav_df)
+                yield report, trade_date, bhav_df, error
+
+    def bhav_copy_range(self, report: str, from_date: str, to_date: str, max_workers: int = 4,
+                        trading_days_only: bool = True):
+        """
+        Fetch a bhavcopy for every day in a date range concurrently and return them as one data frame.
+        Days with no report (weekends, holidays) are skipped.
+        :param report: 'sec_bhavdata_full', 'ind_close_all', 'cm_bhavcopy' or 'fo_bhavcopy'
+        :param from_date: eg:'01-06-2023' ('dd-mm-YYYY')
+        :param to_date: eg:'20-06-2023' ('dd-mm-YYYY')
+        :param max_workers: Number of days fetched concurrently
+        :param trading_days_only: Skip weekends and known holidays without requesting them
+        :return: pandas data frame with a TRADE_DATE column, in date order
+        """
+        frames = []
+        day_range = self.iter_bhav_copy_range(report, from_date, to_date, max_workers, trading_days_only)
+        for trade_date, bhav_df, error in day_range:
+            if bhav_df is not None and not bhav_df.empty:
+                bhav_df.insert(0, 'TRADE_DATE', pd.Timestamp(trade_date))
+                frames.append(bhav_df)
+        if not frames:
+            return pd.DataFrame()
+        return nse_schema.concat(frames, ignore_index=True)
+
+    def extract_ohlcv(self, bhav_df: pd.DataFrame, report: str, symbols, trade_date: datetime):
+        """
+        Split the rows of many symbols out of one day's bhav copy in a single vectorised pass
+        :param bhav_df: Bhav copy as returned by bhav_copy_with_delivery / bhav_copy_indices
+        :param report: 'sec_bhavdata_full' or 'ind_close_all'
+        :param symbols: List of stock symbols or index names. Index names are matched case-insensitively
+        :param trade_date: Trade date of the bhav copy
+        :return: pandas data frame with columns Symbol, Date, Open, High, Low, Close, Volume
+        """
+        columns = self.ohlcv_columns[report]
+        symbol_col = next(iter(columns))
+        wanted = {symbol.upper() for symbol in symbols}
+        day_df = bhav_df[bhav_df[symbol_col].astype(str).str.strip().str.upper().isin(wanted)]
+        # A stock can trade in several series (EQ, BE, ...) - keep the first listed row, as the single-symbol path does
+        day_df = day_df.drop_duplicates(subset=symbol_col, keep='first')
+        day_df = day_df[list(columns)].rename(columns=columns)
+        day_df['Symbol'] = day_df['Symbol'].astype(str)
+        day_df.insert(1, 'Date', trade_date.strftime('%d-%m-%Y'))
+        return day_df.reset_index(drop=True)
+
+    def ohlcv_history(self, symbols, from_date: str, to_date: str, indices: bool = False, max_workers: int = 4,
+                      adjust: bool = False, dividends: bool = False):
+        """
+        Daily OHLCV history for many symbols, downloading each day's bhav copy only once
+        :param symbols: List of stock symbols, or index names when indices=True. Use
+        get_index_details(category, list_only=True) to pass the constituents of an index
+        :param from_date: eg:'01-06-2023' ('dd-mm-YYYY')
+        :param to_date: eg:'20-06-2023' ('dd-mm-YYYY')
+        :param indices: Set to True if symbols are index names
+        :param max_workers: Number of days fetched concurrently
+        :param adjust: Adjust stock prices and volumes for splits, consolidations and bonuses
+        :param dividends: With adjust, also adjust for cash dividends
+        :return: Long format pandas data frame with columns Symbol, Date, Open, High, Low, Close, Volume
+        """
+        report = 'ind_close_all' if indices else 'sec_bhavdata_full'
+        dates = [day.to_pydatetime() for day in self.calendar.trading_days(from_date, to_date)]
+        indexed = None
+        if self.index is not None:
+            # Indexed days are one contiguous read per symbol; only the rest are downloaded
+            indexed_days = set(self.index.dates(report, from_date, to_date))
+            dates = [day for day in dates if day.date() not in indexed_days]
+            indexed = self.index.ohlcv(symbols, report, from_date, to_date)
+
+        frames = []
+        for trade_date, bhav_df, error in self.iter_bhav_copy_dates(report, dates, max_workers):
+            if bhav_df is not None and not bhav_df.empty:
+                frames.append(self.extract_ohlcv(bhav_df, report, symbols, trade_date))
+        if indexed is not None and not indexed.empty:
+            if frames:
+                fetched = pd.concat(frames, ignore_index=True)
+                fetched['Date'] = pd.to_datetime(fetched['Date'], format='%d-%m-%Y')
+                indexed = pd.concat([indexed, fetched], ignore_index=True)
+            indexed = indexed.sort_values(['Date', 'Symbol'], kind='stable', ignore_index=True)
+            indexed['Date'] = format_dates(indexed['Date'])
+            frames = [indexed]
+        if not frames:
+            return pd.DataFrame(columns=['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        df = pd.concat(frames, ignore_index=True)
+        if adjust and not indices:
+            df = self.corporate_actions.adjust(df, dividends=dividends)
+        return df
+
+    def _bhav_method(self, report: str):
+        """Return the bhav_copy_* method that downloads the given report type."""
+        methods = {
+            'sec_bhavdata_full': self.bhav_copy_with_delivery,
+            'ind_close_all': self.bhav_copy_indices,
+            'cm_bhavcopy': self.equity_bhav_copy,
+            'fo_bhavcopy': self.fno_bhav_copy,
+        }
+        if report not in methods:
+            raise ValueError(f"Unknown report type: {report}. Use one of {list(methods)}")
+        return methods[report]
+
     def fii_dii_activity(self):
         """
         FII and DII trading activity of the day in data frame
@@ -389,7 +819,7 @@ class NseUtils:
         """
         url = "https://www.nseindia.com/api/fiidiiTradeReact"
         # data_json = nse_urlfetch(url).json()
-        data_json = requests.get(url, headers=self.headers)
+        data_json = self.http.get(url)
         data_df = pd.DataFrame(data_json.json())
         return data_df
 
@@ -403,15 +833,18 @@ class NseUtils:
         """
         symbol = symbol.replace(' ', '%20').replace('&', '%26')
         ref_url = 'https://www.nseindia.com/option-chain'
-        ref = requests.get(ref_url, headers=self.headers)
         if not indices:
             url = 'https://www.nseindia.com/api/option-chain-equities?symbol=' + symbol
         else:
             # ref_url = 'https://www.nseindia.com/option-chain'
             # ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/option-chain-indices?symbol=' + symbol
-        payload = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()
+        payload = self.http.get(url, ref_url).json()
         # payload = get_nse_option_chain(symbol).json()
+        return self._parse_live_option_chain(payload, symbol, expiry_date, oi_mode)
+
+    @staticmethod
+    def _parse_live_option_chain(payload, symbol, expiry_date=None, oi_mode="full"):
         if expiry_date:
             exp_date = pd.to_datetime(expiry_date, format='%d-%m-%Y')
             expiry_date = exp_date.strftime('%d-%b-%Y')
@@ -429,66 +862,32 @@ class NseUtils:
                          'PUTS_Ask_Qty',
                          'PUTS_Net_Chng', 'PUTS_LTP', 'PUTS_IV', 'PUTS_Volume', 'PUTS_Chng_in_OI', 'PUTS_OI']
 
-        oi_data = pd.DataFrame(columns=col_names)
-
-        oi_row = {'Fetch_Time': None, 'Symbol': None, 'Expiry_Date': None, 'CALLS_OI': 0, 'CALLS_Chng_in_OI': 0,
-                  'CALLS_Volume': 0,
-                  'CALLS_IV': 0, 'CALLS_LTP': 0, 'CALLS_Net_Chng': 0, 'CALLS_Bid_Qty': 0, 'CALLS_Bid_Price': 0,
-                  'CALLS_Ask_Price': 0, 'CALLS_Ask_Qty': 0, 'Strike_Price': 0, 'PUTS_OI': 0, 'PUTS_Chng_in_OI': 0,
-                  'PUTS_Volume': 0, 'PUTS_IV': 0, 'PUTS_LTP': 0, 'PUTS_Net_Chng': 0, 'PUTS_Bid_Qty': 0,
-                  'PUTS_Bid_Price': 0, 'PUTS_Ask_Price': 0, 'PUTS_Ask_Qty': 0}
+        records = payload['records']
+        rows = [row for row in records['data'] if not expiry_date or row['expiryDate'] == expiry_date]
+        if not rows:
+            return pd.DataFrame(columns=col_names)
 
-        for m in range(len(payload['records']['data'])):
-            if not expiry_date or (payload['records']['data'][m]['expiryDate'] == expiry_date):
-                try:
-                    oi_row['Expiry_Date'] = payload['records']['data'][m]['expiryDate']
-                    oi_row['CALLS_OI'] = payload['records']['data'][m]['CE']['openInterest']
-                    oi_row['CALLS_Chng_in_OI'] = payload['records']['data'][m]['CE']['changeinOpenInterest']
-                    oi_row['CALLS_Volume'] = payload['records']['data'][m]['CE']['totalTradedVolume']
-                    oi_row['CALLS_IV'] = payload['records']['data'][m]['CE']['impliedVolatility']
-                    oi_row['CALLS_LTP'] = payload['records']['data'][m]['CE']['lastPrice']
-                    oi_row['CALLS_Net_Chng'] = payload['records']['data'][m]['CE']['change']
-                    if oi_mode == 'full':
-                        oi_row['CALLS_Bid_Qty'] = payload['records']['data'][m]['CE']['bidQty']
-                        oi_row['CALLS_Bid_Price'] = payload['records']['data'][m]['CE']['bidprice']
-                        oi_row['CALLS_Ask_Price'] = payload['records']['data'][m]['CE']['askPrice']
-                        oi_row['CALLS_Ask_Qty'] = payload['records']['data'][m]['CE']['askQty']
-                except KeyError:
-                    oi_row['CALLS_OI'], oi_row['CALLS_Chng_in_OI'], oi_row['CALLS_Volume'], oi_row['CALLS_IV'], oi_row[
-                        'CALLS_LTP'], oi_row['CALLS_Net_Chng'] = 0, 0, 0, 0, 0, 0
-                    if oi_mode == 'full':
-                        oi_row['CALLS_Bid_Qty'], oi_row['CALLS_Bid_Price'], oi_row['CALLS_Ask_Price'], oi_row[
-                            'CALLS_Ask_Qty'] = 0, 0, 0, 0
-                    pass
-
-                oi_row['Strike_Price'] = payload['records']['data'][m]['strikePrice']
+        # Flatten each leg into per-field columns in one pass. A leg that is missing or lacks a field
+        # reads as all zeros; bid/ask columns stay zero in compact mode.
+        leg_fields = NseUtils.option_leg_fields if oi_mode == 'full' else NseUtils.option_leg_fields[:6]
+        keys = [key for _, key in leg_fields]
+        zeros = [0] * len(keys)
 
-                try:
-                    oi_row['PUTS_OI'] = payload['records']['data'][m]['PE']['openInterest']
-                    oi_row['PUTS_Chng_in_OI'] = payload['records']['data'][m]['PE']['changeinOpenInterest']
-                    oi_row['PUTS_Volume'] = payload['records']['data'][m]['PE']['totalTradedVolume']
-                    oi_row['PUTS_IV'] = payload['records']['data'][m]['PE']['impliedVolatility']
-                    oi_row['PUTS_LTP'] = payload['records']['data'][m]['PE']['lastPrice']
-                    oi_row['PUTS_Net_Chng'] = payload['records']['data'][m]['PE']['change']
-                    if oi_mode == 'full':
-                        oi_row['PUTS_Bid_Qty'] = payload['records']['data'][m]['PE']['bidQty']
-                        oi_row['PUTS_Bid_Price'] = payload['records']['data'][m]['PE']['bidprice']
-                        oi_row['PUTS_Ask_Price'] = payload['records']['data'][m]['PE']['askPrice']
-                        oi_row['PUTS_Ask_Qty'] = payload['records']['data'][m]['PE']['askQty']
-                except KeyError:
-                    oi_row['PUTS_OI'], oi_row['PUTS_Chng_in_OI'], oi_row['PUTS_Volume'], oi_row['PUTS_IV'], oi_row[
-                        'PUTS_LTP'], oi_row['PUTS_Net_Chng'] = 0, 0, 0, 0, 0, 0
-                    if oi_mode == 'full':
-                        oi_row['PUTS_Bid_Qty'], oi_row['PUTS_Bid_Price'], oi_row['PUTS_Ask_Price'], oi_row[
-                            'PUTS_Ask_Qty'] = 0, 0, 0, 0
-
-                if oi_data.empty:
-                    oi_data = pd.DataFrame([oi_row]).copy()
-                else:
-                    oi_data = pd.concat([oi_data, pd.DataFrame([oi_row])], ignore_index=True)
-                oi_data['Symbol'] = symbol
-                oi_data['Fetch_Time'] = payload['records']['timestamp']
-        return oi_data
+        def leg_values(leg):
+            try:
+                return [leg[key] for key in keys]
+            except (KeyError, TypeError):
+                return zeros
+
+        columns = {'Fetch_Time': [records['timestamp']] * len(rows), 'Symbol': [symbol] * len(rows),
+                   'Expiry_Date': [row.get('expiryDate') for row in rows]}
+        for side, prefix in (('CE', 'CALLS'), ('PE', 'PUTS')):
+            values = list(zip(*[leg_values(row.get(side)) for row in rows]))
+            for i, (name, _) in enumerate(NseUtils.option_leg_fields):
+                columns[f'{prefix}_{name}'] = list(values[i]) if i < len(keys) else [0] * len(rows)
+            if side == 'CE':
+                columns['Strike_Price'] = [row['strikePrice'] for row in rows]
+        return pd.DataFrame(columns)
 
     def get_market_depth(self, symbol):
 
@@ -504,19 +903,20 @@ class NseUtils:
         }
         return merged_dict
 
-    def get_index_historic_data(self, index: str, from_date: str = None, to_date: str = None):
+    def get_index_historic_data(self, index: str, from_date: str = None, to_date: str = None, max_workers: int = 4):
         """
         get historical index data set for the specific time period.
         apply the index name as per the nse india site
+        The range is fetched in half-year windows concurrently, paced by the shared rate limiter. With a
+        BhavCopyCache, windows of closed half-years are served from disk, so repeat queries only fetch the
+        current half-year
         :param index: 'NIFTY 50'/'NIFTY BANK'
         :param from_date: '17-03-2022' ('dd-mm-YYYY')
         :param to_date: '17-06-2023' ('dd-mm-YYYY')
+        :param max_workers: Number of windows fetched concurrently
         :return: pandas.DataFrame
         :raise ValueError if the parameter input is not proper
         """
-        index_data_columns = ['TIMESTAMP', 'INDEX_NAME', 'OPEN_INDEX_VAL', 'HIGH_INDEX_VAL', 'CLOSE_INDEX_VAL',
-                              'LOW_INDEX_VAL', 'TRADED_QTY', 'TURN_OVER']
-
         # Check for valid dates and period inputs
         if not from_date or not to_date:
             raise ValueError(' Please provide the valid parameters')
@@ -531,49 +931,77 @@ class NseUtils:
             print(e)
             raise ValueError(f'either or both from_date = {from_date} || to_date = {to_date} are not valid value')
 
-        nse_df = pd.DataFrame(columns=index_data_columns)
-        from_date = datetime.strptime(from_date, "%d-%m-%Y")
-        to_date = datetime.strptime(to_date, "%d-%m-%Y")
-        load_days = (to_date - from_date).days
+        windows = self._index_history_windows(from_dt, to_dt)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            payloads = list(executor.map(lambda window: self._index_history_window(index, *window), windows))
+        try:
+            nse_df = self._parse_index_history(payloads)
+        except Exception as e:
+            raise Exception(f"Resource not available: {e}")
+
+        # Cached windows span their whole half-year; keep the requested days only
+        dates = pd.to_datetime(nse_df['TIMESTAMP'], format='%d-%b-%Y', errors='coerce')
+        in_range = dates.isna() | ((dates >= from_dt) & (dates <= to_dt))
+        return nse_df[in_range.to_numpy()].reset_index(drop=True)
 
-        while load_days > 0:
-            if load_days > 365:
-                end_date = (from_date + timedelta(364)).strftime("%d-%m-%Y")
-                start_date = from_date.strftime("%d-%m-%Y")
-            else:
-                end_date = to_date.strftime("%d-%m-%Y")
-                start_date = from_date.strftime("%d-%m-%Y")
-
-            data_df = self.get_index_data(index=index, from_date=start_date, to_date=end_date)
-            from_date = from_date + timedelta(365)
-            load_days = (to_date - from_date).days
-            if nse_df.empty:
-                nse_df = data_df
+    def _index_history_windows(self, from_dt: datetime, to_dt: datetime):
+        """
+        Split a range into windows aligned to half-years (Jan-Jun, Jul-Dec), well inside NSE's one year limit.
+        Closed half-years are requested whole when a cache can keep them, others are clipped to the range
+        :return: list of (window start, window end, cacheable)
+        """
+        windows = []
+        start = datetime(from_dt.year, 1 if from_dt.month <= 6 else 7, 1)
+        while start <= to_dt:
+            end = datetime(start.year, 6, 30) if start.month == 1 else datetime(start.year, 12, 31)
+            cacheable = self.cache is not None and self.cache.is_cacheable(end)
+            if cacheable:
+                windows.append((start, end, True))
             else:
-                nse_df = pd.concat([nse_df, data_df], ignore_index=True)
-        return nse_df
+                windows.append((max(start, from_dt), min(end, to_dt), False))
+            start = end + timedelta(days=1)
+        return windows
 
-    def get_index_data(self, index: str, from_date: str, to_date: str):
+    def _index_history_window(self, index: str, start: datetime, end: datetime, cacheable: bool = False):
+        """
+        indicesHistory response for one window, served from the cache for closed half-years
+        :return: decoded JSON payload
+        """
+        report = f"indicesHistory_{index.upper().replace(' ', '_')}"
+        if cacheable:
+            content = self.cache.get(report, end)
+            if content is not None:
+                try:
+                    return json.loads(content)
+                except ValueError:
+                    self.cache.discard(report, end)
+        url = (f"https://www.nseindia.com/api/historical/indicesHistory?indexType={index.replace(' ', '%20').upper()}"
+               f"&from={start.strftime('%d-%m-%Y')}&to={end.strftime('%d-%m-%Y')}")
+        response = self.http.get(url, 'https://www.nseindia.com/reports-indices-historical-index-data')
+        try:
+            payload = response.json()
+        except ValueError as e:
+            raise Exception(f"Resource not available: {e}")
+        if cacheable and response.status_code == 200 and 'data' in payload:
+            self.cache.put(report, end, response.content)
+        return payload
 
+    @staticmethod
+    def _parse_index_history(payloads):
+        """
+        Merge the close and turnover records of one or more indicesHistory payloads into one frame,
+        building each side once over all payloads
+        """
         index_data_columns = ['TIMESTAMP', 'INDEX_NAME', 'OPEN_INDEX_VAL', 'HIGH_INDEX_VAL', 'CLOSE_INDEX_VAL',
                               'LOW_INDEX_VAL', 'TRADED_QTY', 'TURN_OVER']
+        close_records = [row for payload in payloads for row in payload['data']['indexCloseOnlineRecords']]
+        turnover_records = [row for payload in payloads for row in payload['data']['indexTurnoverRecords']]
+        if not close_records:
+            return pd.DataFrame(columns=index_data_columns)
 
-        index = index.replace(' ', '%20').upper()
-        ref_url = 'https://www.nseindia.com/reports-indices-historical-index-data'
-        ref = requests.get(ref_url, headers=self.headers)
-
-        url = f"https://www.nseindia.com/api/historical/indicesHistory?indexType={index}&from={from_date}&to={to_date}"
-
-        try:
-            data_json = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict()).json()
-
-            data_close_df = pd.DataFrame(data_json['data']['indexCloseOnlineRecords']).drop(
-                columns=['_id', "EOD_TIMESTAMP"])
-            data_turnover_df = pd.DataFrame(data_json['data']['indexTurnoverRecords']).drop(columns=['_id',
-                                                                                                     'HIT_INDEX_NAME_UPPER'])
-            data_df = pd.merge(data_close_df, data_turnover_df, on='TIMESTAMP', how='inner')
-        except Exception as e:
-            raise Exception(f"Resource not available: {e}")
+        data_close_df = pd.DataFrame(close_records).drop(columns=['_id', "EOD_TIMESTAMP"])
+        data_turnover_df = pd.DataFrame(turnover_records).drop(columns=['_id', 'HIT_INDEX_NAME_UPPER'])
+        data_df = pd.merge(data_close_df, data_turnover_df, on='TIMESTAMP', how='inner')
 
         unwanted_str_list = ['FH_', 'EOD_', 'HIT_']
         new_col = data_df.columns
@@ -583,6 +1011,25 @@ class NseUtils:
         data_df.columns = new_col
         return data_df[index_data_columns]
 
+    def get_index_data(self, index: str, from_date: str, to_date: str):
+        """
+        Historical index data for one window of at most a year
+        :param index: 'NIFTY 50'/'NIFTY BANK'
+        :param from_date: '17-03-2022' ('dd-mm-YYYY')
+        :param to_date: '17-06-2023' ('dd-mm-YYYY')
+        :return: pandas.DataFrame
+        """
+        index = index.replace(' ', '%20').upper()
+        ref_url = 'https://www.nseindia.com/reports-indices-historical-index-data'
+
+        url = f"https://www.nseindia.com/api/historical/indicesHistory?indexType={index}&from={from_date}&to={to_date}"
+
+        try:
+            data_json = self.http.get(url, ref_url).json()
+            return self._parse_index_history([data_json])
+        except Exception as e:
+            raise Exception(f"Resource not available: {e}")
+
     def get_equity_full_list(self, list_only=False):
         """
         get list of all equity available to trade in NSE
@@ -591,7 +1038,7 @@ class NseUtils:
         :return: pandas data frame
         """
         url = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
-        nse_resp = self.session.get(url, headers=self.headers, cookies=self.cookies)
+        nse_resp = self.http.fetch(url, headers=self.headers, cookies=self.cookies)
         if nse_resp.status_code != 200:
             raise FileNotFoundError(f" No data equity list available")
         try:
@@ -612,9 +1059,8 @@ class NseUtils:
         :return: pandas data frame
         """
         ref_url = 'https://www.nseindia.com/products-services/equity-derivatives-list-underlyings-information'
-        ref = requests.get(ref_url, headers=self.headers)
         url = "https://www.nseindia.com/api/underlying-information"
-        response = requests.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+        response = self.http.get(url, ref_url)
 
         if response.status_code != 200:
             raise RuntimeError("Resource not available for fno_equity_list")
@@ -627,16 +1073,25 @@ class NseUtils:
 
     def get_gainers_losers(self):
 
-        gain_loss_dict = {}
-
         ref_url = 'https://www.nseindia.com/market-data/top-gainers-losers'
-        ref = requests.get(ref_url, headers=self.headers)
 
         url = 'https://www.nseindia.com/api/live-analysis-variations?index=gainers'
-        data_obj = requests.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+        data_obj = self.http.get(url, ref_url)
         if data_obj.status_code != 200:
             raise RuntimeError("Resource not available for fno_equity_list")
-        data_dict = data_obj.json()
+        gainers_dict = data_obj.json()
+
+        url = 'https://www.nseindia.com/api/live-analysis-variations?index=loosers'
+        data_obj = self.http.get(url, ref_url)
+        if data_obj.status_code != 200:
+            raise RuntimeError("Resource not available for fno_equity_list")
+        losers_dict = data_obj.json()
+
+        return self._parse_gainers_losers(gainers_dict, losers_dict)
+
+    @staticmethod
+    def _parse_gainers_losers(gainers_dict, losers_dict):
+        data_dict = gainers_dict
 
         # Nifty Gainer
         data_df = pd.DataFrame(data_dict['NIFTY']['data'])
@@ -658,11 +1113,7 @@ class NseUtils:
         data_df = pd.DataFrame(data_dict['FOSec']['data'])
         fno_gainer = data_df['symbol'].to_list()
 
-        url = 'https://www.nseindia.com/api/live-analysis-variations?index=loosers'
-        data_obj = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
-        if data_obj.status_code != 200:
-            raise RuntimeError("Resource not available for fno_equity_list")
-        data_dict = data_obj.json()
+        data_dict = losers_dict
 
         # Nifty Gainer
         data_df = pd.DataFrame(data_dict['NIFTY']['data'])
@@ -714,9 +1165,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/companies-listing/corporate-filings-actions'
-            ref = requests.get(ref_url, headers=self.headers)
             url = f"https://www.nseindia.com/api/corporates-corporateActions?index=equities&from_date={from_date_str}&to_date={to_date_str}"
-            data_obj = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            data_obj = self.http.get(url, ref_url)
             corp_action = pd.DataFrame(data_obj.json())
             if filter is not None:
                 corp_action = corp_action[corp_action['subject'].str.contains(filter, case=False, na=False)]
@@ -737,9 +1187,8 @@ class NseUtils:
 
         try:
             ref_url = ('https://www.nseindia.com/companies-listing/corporate-filings-announcements')
-            ref = requests.get(ref_url, headers=self.headers)
             url = f'https://www.nseindia.com/api/corporate-announcements?index=equities&from_date={from_date_str}&to_date={to_date_str}'
-            data_obj = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            data_obj = self.http.get(url, ref_url)
             corp_announcement = pd.DataFrame(data_obj.json())
             return corp_announcement
         except:
@@ -750,49 +1199,39 @@ class NseUtils:
 
         # try:
             ref_url = 'https://www.nseindia.com/market-data/index-performances'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/allIndices'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
             data = response.json()  # Convert response to JSON
-
-            # Convert JSON data to a DataFrame
-            df = pd.json_normalize(data['data'])  # Extract the main data list
-
-            # Retain only PE Ratio
-            if not df.empty:
-                df = df[['indexSymbol', 'key', 'pe']]
-                df = df[df['pe'].str.strip() != '']  # Removes rows where PE is an empty string
-                df = df[df['pe'].str.strip() != 'None']  # Removes rows where PE is none
-                df.columns = ['Index', 'Type', 'Profit Earning Ratio']
-                return df
-            else:
-                return None
+            return self._parse_index_ratio(data, 'pe', 'Profit Earning Ratio')
 
         # except:
         #     print("Error fetching Corporate Action Data. Check your input")
         #     return None
 
+    @staticmethod
+    def _parse_index_ratio(data, field, label):
+        """Extract one valuation ratio column ('pe', 'pb' or 'dy') from the allIndices payload."""
+        # Convert JSON data to a DataFrame
+        df = pd.json_normalize(data['data'])  # Extract the main data list
+
+        # Retain only the requested ratio
+        if not df.empty:
+            df = df[['indexSymbol', 'key', field]]
+            df = df[df[field].str.strip() != '']  # Removes rows where the ratio is an empty string
+            df = df[df[field].str.strip() != 'None']  # Removes rows where the ratio is none
+            df.columns = ['Index', 'Type', label]
+            return df
+        else:
+            return None
+
     def get_index_pb_ratio(self):
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/index-performances'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/allIndices'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
             data = response.json()  # Convert response to JSON
-
-            # Convert JSON data to a DataFrame
-            df = pd.json_normalize(data['data'])  # Extract the main data list
-
-            # Retain only PE Ratio
-            if not df.empty:
-                df = df[['indexSymbol', 'key', 'pb']]
-                df = df[df['pb'].str.strip() != '']  # Removes rows where PE is an empty string
-                df = df[df['pb'].str.strip() != 'None']  # Removes rows where PE is none
-                df.columns = ['Index', 'Type', 'Price Book Ratio']
-                return df
-            else:
-                return None
+            return self._parse_index_ratio(data, 'pb', 'Price Book Ratio')
 
         except:
             print("Error fetching Corporate Action Data. Check your input")
@@ -802,23 +1241,10 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/index-performances'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/allIndices'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
             data = response.json()  # Convert response to JSON
-
-            # Convert JSON data to a DataFrame
-            df = pd.json_normalize(data['data'])  # Extract the main data list
-
-            # Retain only PE Ratio
-            if not df.empty:
-                df = df[['indexSymbol', 'key', 'dy']]
-                df = df[df['dy'].str.strip() != '']  # Removes rows where PE is an empty string
-                df = df[df['dy'].str.strip() != 'None']  # Removes rows where PE is none
-                df.columns = ['Index', 'Type', 'Div Yield']
-                return df
-            else:
-                return None
+            return self._parse_index_ratio(data, 'dy', 'Div Yield')
 
         except:
             print("Error fetching Corporate Action Data. Check your input")
@@ -828,33 +1254,34 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/live-market-indices'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/allIndices'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
             data = response.json()  # Convert response to JSON
-
-            # Convert JSON data to a DataFrame
-            df = pd.json_normalize(data['data'])  # Extract the main data list
-
-            # Retain only PE Ratio
-            if not df.empty:
-                df = df[['indexSymbol', 'advances', 'declines', 'unchanged']]
-                df.dropna(inplace=True)
-                df.columns = ['Index', 'Advances', 'Declines', 'Unchanged']
-                return df
-            else:
-                return None
+            return self._parse_advance_decline(data)
 
         except Exception as e:
             print("Error fetching Corporate Action Data. Check your input")
             return None
 
+    @staticmethod
+    def _parse_advance_decline(data):
+        # Convert JSON data to a DataFrame
+        df = pd.json_normalize(data['data'])  # Extract the main data list
+
+        # Retain only advances / declines
+        if not df.empty:
+            df = df[['indexSymbol', 'advances', 'declines', 'unchanged']]
+            df.dropna(inplace=True)
+            df.columns = ['Index', 'Advances', 'Declines', 'Unchanged']
+            return df
+        else:
+            return None
+
     def most_active_equity_stocks_by_volume(self):
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-equities'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/live-analysis-most-active-securities?index=volume'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
 
@@ -872,9 +1299,8 @@ class NseUtils:
     def most_active_equity_stocks_by_value(self):
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-equities'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/live-analysis-most-active-securities?index=value'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
 
@@ -893,9 +1319,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-contracts'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/snapshot-derivatives-equity?index=calls-index-vol'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
@@ -913,9 +1338,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-contracts'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/snapshot-derivatives-equity?index=puts-index-vol'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
@@ -933,9 +1357,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-contracts'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/snapshot-derivatives-equity?index=calls-stocks-vol'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
@@ -953,9 +1376,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-contracts'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/snapshot-derivatives-equity?index=puts-stocks-vol'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
@@ -973,9 +1395,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-contracts'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/snapshot-derivatives-equity?index=oi'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
@@ -993,9 +1414,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-contracts'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/snapshot-derivatives-equity?index=contracts'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
@@ -1013,9 +1433,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-contracts'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/snapshot-derivatives-equity?index=futures'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
 
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
@@ -1033,9 +1452,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/most-active-contracts'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/snapshot-derivatives-equity?index=options&limit=20'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
             df = pd.DataFrame(data['volume']['data'])  # Extract the main data list
@@ -1065,9 +1483,8 @@ class NseUtils:
                 to_date_str = to_date
 
             ref_url = 'https://www.nseindia.com/companies-listing/corporate-filings-insider-trading'
-            ref = requests.get(ref_url, headers=self.headers)
             url= f'https://www.nseindia.com/api/corporates-pit?index=equities&from_date={from_date_str}&to_date={to_date_str}'
-            response = requests.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
             data = response.json()
             df = pd.DataFrame(data['data'])
 
@@ -1082,9 +1499,8 @@ class NseUtils:
         # Extracts the events calendar from NSE - Filters only the upcoming Financial results related events
         try:
             ref_url = 'https://www.nseindia.com/companies-listing/corporate-filings-event-calendar'
-            ref = requests.get(ref_url, headers=self.headers)
             url= f'https://www.nseindia.com/api/event-calendar?'
-            response = requests.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
             data = response.json()
             df = pd.DataFrame(data)
             events = df[df['purpose'].str.contains('Results', case=False, na=False)]
@@ -1097,9 +1513,8 @@ class NseUtils:
 
         try:
             ref_url = 'https://www.nseindia.com/market-data/exchange-traded-funds-etf'
-            ref = requests.get(ref_url, headers=self.headers)
             url = 'https://www.nseindia.com/api/etf'
-            response = self.session.get(url, headers=self.headers, cookies=ref.cookies.get_dict())
+            response = self.http.get(url, ref_url)
             data = response.json()  # Convert response to JSON
             # Convert JSON data to a DataFrame
             df = pd.DataFrame(data['data'])  # Extract the main data list
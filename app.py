@@ -5,9 +5,12 @@ Interactive web interface to download NSE stocks, indices, and ETF data
 
 import streamlit as st
 import NseUtility
+from NseUtility import normalize_index_name
+from nse_resample import TIMEFRAMES, resample_timeframe
+from nse_schema import as_price
+from nse_worker import DownloadWorker, ResultCache
 import pandas as pd
 from datetime import datetime, timedelta
-import time
 import io
 
 # Page configuration
@@ -17,184 +20,193 @@ st.set_page_config(
     layout="wide"
 )
 
-def normalize_index_name(name):
-    """
-    Normalize index name to match NSE naming convention.
-    NSE uses 'NIFTY' in all caps, but rest varies (e.g., 'NIFTY Midcap 100').
-    """
-    if not name:
-        return name
-    
-    # Common index name patterns in NSE
-    replacements = {
-        'nifty': 'NIFTY',
-        'sensex': 'SENSEX',
-        'bankex': 'BANKEX',
-    }
-    
-    # Split and process each word
-    words = name.split()
-    normalized_words = []
-    
-    for word in words:
-        word_lower = word.lower()
-        # Check if it's a known prefix that should be uppercase
-        if word_lower in replacements:
-            normalized_words.append(replacements[word_lower])
-        else:
-            # Keep original casing for other words
-            normalized_words.append(word)
-    
-    return ' '.join(normalized_words)
+@st.cache_resource
+def get_worker():
+    """One download worker per server, shared by every session: one NseUtils, one cache, one rate limit."""
+    return DownloadWorker()
 
-def _prepare_ohlcv_for_resample(df):
-    """Clean and normalize OHLCV fields before time aggregation."""
-    clean_df = df.copy()
-    clean_df['Date'] = pd.to_datetime(clean_df['Date'], format='%d-%m-%Y', errors='coerce')
-    for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-        clean_df[col] = pd.to_numeric(clean_df[col], errors='coerce')
-    clean_df = clean_df.dropna(subset=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    clean_df = clean_df.sort_values('Date')
-    return clean_df
+@st.cache_resource
+def get_results():
+    """Finished downloads shared by every session, so the same request is never downloaded twice."""
+    return ResultCache()
 
-def _resample_ohlcv(df, rule):
-    """Resample OHLCV while preserving the symbol column."""
-    clean_df = _prepare_ohlcv_for_resample(df)
-    if clean_df.empty:
-        return pd.DataFrame(columns=['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-
-    symbol_name = clean_df['Symbol'].iloc[0] if 'Symbol' in clean_df.columns else ''
-    clean_df = clean_df.set_index('Date')
-
-    sampled = clean_df.resample(rule).agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    })
-
-    sampled = sampled.dropna().reset_index()
-    sampled['Date'] = sampled['Date'].dt.strftime('%d-%m-%Y')
-    sampled.insert(0, 'Symbol', symbol_name)
-    return sampled[['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-
-def resample_to_weekly(df):
-    """Convert daily data to weekly data."""
-    return _resample_ohlcv(df, 'W-FRI')
-
-def resample_to_monthly(df):
-    """Convert daily data to monthly data."""
-    return _resample_ohlcv(df, 'ME')
+def result_key(instrument_type, symbol, symbols, constituents_of, from_date_obj, to_date_obj, timeframe_code,
+               adjust_actions):
+    """Key of a request in the shared result cache, with the symbol normalized as it is downloaded."""
+    if instrument_type == "Index":
+        names = (normalize_index_name(symbol.strip()).upper(),)
+    elif instrument_type == "Multiple Stocks/ETFs":
+        names = tuple(sorted(set(symbols))) + ((f"{constituents_of} constituents",) if constituents_of else ())
+    else:
+        names = (symbol.strip().upper(),)
+    return (instrument_type, names, from_date_obj.isoformat(), to_date_obj.isoformat(), timeframe_code,
+            bool(adjust_actions))
 
-def resample_to_quarterly(df):
-    """Convert daily data to quarterly data (calendar quarter)."""
-    return _resample_ohlcv(df, 'QE-DEC')
+def store_result(df):
+    """Keep a result in this session for the preview and the CSV download."""
+    st.session_state.downloaded_data = df
+    if df['Symbol'].nunique() > 1:
+        st.session_state.filename = f"MULTI_{df['Symbol'].nunique()}_symbols.csv"
+    else:
+        actual_symbol = df['Symbol'].iloc[0].replace(' ', '_').replace('/', '_')
+        st.session_state.filename = f"{actual_symbol}.csv"
 
-def resample_to_yearly(df):
-    """Convert daily data to yearly data (calendar year)."""
-    return _resample_ohlcv(df, 'YE-DEC')
+def record_error(job, errors, date_str, error):
+    """Note a day that could not be downloaded. Only a 404 (nothing published) leaves the result complete."""
+    if not (isinstance(error, NseUtility.ArchiveError) and error.not_published):
+        job.failed_days += 1
+    if len(errors) < 3:  # Store first 3 errors for diagnostics
+        errors.append(f"{date_str}: {str(error)}")
 
-def download_stock_data(symbol, from_date_obj, to_date_obj, progress_bar, status_text):
+def download_stock_data(nse, job, symbol, from_date_obj, to_date_obj):
     """Download stock data from equity bhav copy."""
-    nse = NseUtility.NseUtils()
     all_data = []
     successful_downloads = 0
-    current_date = from_date_obj
     total_days = (to_date_obj - from_date_obj).days
     errors = []
     
-    while current_date <= to_date_obj:
+    day_range = nse.iter_bhav_copy_range('sec_bhavdata_full', from_date_obj.strftime('%d-%m-%Y'),
+                                         to_date_obj.strftime('%d-%m-%Y'))
+    for current_date, bhav_data, error in day_range:
         date_str = current_date.strftime('%d-%m-%Y')
-        progress = (current_date - from_date_obj).days / total_days
-        progress_bar.progress(progress)
-        status_text.text(f"Downloading... {date_str} ({successful_downloads} records)")
+        progress = (current_date.date() - from_date_obj).days / total_days
+        job.update(progress, f"Downloading... {date_str} ({successful_downloads} records)")
         
-        try:
-            bhav_data = nse.bhav_copy_with_delivery(date_str)
-            
-            if bhav_data is not None and not bhav_data.empty:
-                stock_data = bhav_data[bhav_data['SYMBOL'] == symbol.upper()]
-                
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    all_data.append({
-                        'Symbol': row['SYMBOL'],
-                        'Date': date_str,
-                        'Open': row['OPEN_PRICE'],
-                        'High': row['HIGH_PRICE'],
-                        'Low': row['LOW_PRICE'],
-                        'Close': row['CLOSE_PRICE'],
-                        'Volume': row['TTL_TRD_QNTY']
-                    })
-                    successful_downloads += 1
-        except Exception as e:
-            if len(errors) < 3:  # Store first 3 errors for diagnostics
-                errors.append(f"{date_str}: {str(e)}")
+        if error is not None:
+            record_error(job, errors, date_str, error)
+            continue
         
-        current_date += timedelta(days=1)
-        if successful_downloads % 5 == 0:
-            time.sleep(0.1)
+        if bhav_data is not None and not bhav_data.empty:
+            stock_data = bhav_data[bhav_data['SYMBOL'] == symbol.upper()]
+            
+            if not stock_data.empty:
+                row = stock_data.iloc[0]
+                all_data.append({
+                    'Symbol': row['SYMBOL'],
+                    'Date': date_str,
+                    'Open': as_price(row['OPEN_PRICE']),
+                    'High': as_price(row['HIGH_PRICE']),
+                    'Low': as_price(row['LOW_PRICE']),
+                    'Close': as_price(row['CLOSE_PRICE']),
+                    'Volume': row['TTL_TRD_QNTY']
+                })
+                successful_downloads += 1
     
     if errors and successful_downloads == 0:
-        st.warning(f"⚠️ Sample errors: {errors[0]}")
+        job.warnings.append(f"⚠️ Sample errors: {errors[0]}")
     
     return pd.DataFrame(all_data) if all_data else None
 
-def download_index_data(symbol, from_date_obj, to_date_obj, progress_bar, status_text):
+def download_index_data(nse, job, symbol, from_date_obj, to_date_obj):
     """Download index data from indices bhav copy."""
-    nse = NseUtility.NseUtils()
     all_data = []
     successful_downloads = 0
-    current_date = from_date_obj
     total_days = (to_date_obj - from_date_obj).days
     errors = []
     
     # Normalize the symbol to match NSE naming conventions
     normalized_symbol = normalize_index_name(symbol)
     
-    while current_date <= to_date_obj:
+    day_range = nse.iter_bhav_copy_range('ind_close_all', from_date_obj.strftime('%d-%m-%Y'),
+                                         to_date_obj.strftime('%d-%m-%Y'))
+    for current_date, bhav_data, error in day_range:
         date_str = current_date.strftime('%d-%m-%Y')
-        progress = (current_date - from_date_obj).days / total_days
-        progress_bar.progress(progress)
-        status_text.text(f"Downloading... {date_str} ({successful_downloads} records)")
+        progress = (current_date.date() - from_date_obj).days / total_days
+        job.update(progress, f"Downloading... {date_str} ({successful_downloads} records)")
         
-        try:
-            bhav_data = nse.bhav_copy_indices(date_str)
-            
-            if bhav_data is not None and not bhav_data.empty:
-                # Try exact match first with normalized name
-                index_data = bhav_data[bhav_data['Index Name'] == normalized_symbol]
-                
-                # If not found, try case-insensitive partial match
-                if index_data.empty:
-                    index_data = bhav_data[bhav_data['Index Name'].str.contains(normalized_symbol, case=False, na=False)]
-                
-                if not index_data.empty:
-                    row = index_data.iloc[0]
-                    all_data.append({
-                        'Symbol': row['Index Name'],
-                        'Date': row['Index Date'],
-                        'Open': row['Open Index Value'],
-                        'High': row['High Index Value'],
-                        'Low': row['Low Index Value'],
-                        'Close': row['Closing Index Value'],
-                        'Volume': row['Volume']
-                    })
-                    successful_downloads += 1
-        except Exception as e:
-            if len(errors) < 3:  # Store first 3 errors for diagnostics
-                errors.append(f"{date_str}: {str(e)}")
+        if error is not None:
+            record_error(job, errors, date_str, error)
+            continue
         
-        current_date += timedelta(days=1)
-        if successful_downloads % 5 == 0:
-            time.sleep(0.1)
+        if bhav_data is not None and not bhav_data.empty:
+            # Try exact match first with normalized name
+            index_data = bhav_data[bhav_data['Index Name'] == normalized_symbol]
+            
+            # If not found, try case-insensitive partial match
+            if index_data.empty:
+                index_data = bhav_data[bhav_data['Index Name'].str.contains(normalized_symbol, case=False, na=False)]
+            
+            if not index_data.empty:
+                row = index_data.iloc[0]
+                all_data.append({
+                    'Symbol': row['Index Name'],
+                    'Date': date_str,
+                    'Open': as_price(row['Open Index Value']),
+                    'High': as_price(row['High Index Value']),
+                    'Low': as_price(row['Low Index Value']),
+                    'Close': as_price(row['Closing Index Value']),
+                    'Volume': row['Volume']
+                })
+                successful_downloads += 1
     
     if errors and successful_downloads == 0:
-        st.warning(f"⚠️ Sample errors: {errors[0]}")
+        job.warnings.append(f"⚠️ Sample errors: {errors[0]}")
     
     return pd.DataFrame(all_data) if all_data else None
 
+def download_multi_stock_data(nse, job, symbols, constituents_of, from_date_obj, to_date_obj):
+    """Download many stocks/ETFs, fetching each day's bhav copy once for all of them."""
+    symbols = list(symbols)
+    if constituents_of:
+        job.update(message=f"Loading constituents of {constituents_of}...")
+        symbols += nse.get_index_details(constituents_of, list_only=True)
+    all_data = []
+    total_days = (to_date_obj - from_date_obj).days
+    errors = []
+    
+    day_range = nse.iter_bhav_copy_range('sec_bhavdata_full', from_date_obj.strftime('%d-%m-%Y'),
+                                         to_date_obj.strftime('%d-%m-%Y'))
+    for current_date, bhav_data, error in day_range:
+        date_str = current_date.strftime('%d-%m-%Y')
+        progress = (current_date.date() - from_date_obj).days / total_days
+        job.update(progress, f"Downloading... {date_str} ({len(all_data)} days, {len(symbols)} symbols)")
+        
+        if error is not None:
+            record_error(job, errors, date_str, error)
+            continue
+        
+        if bhav_data is not None and not bhav_data.empty:
+            day_data = nse.extract_ohlcv(bhav_data, 'sec_bhavdata_full', symbols, current_date)
+            if not day_data.empty:
+                all_data.append(day_data)
+    
+    if errors and not all_data:
+        job.warnings.append(f"⚠️ Sample errors: {errors[0]}")
+    
+    return pd.concat(all_data, ignore_index=True) if all_data else None
+
+def run_download(nse, job, instrument_type, symbol, symbols, constituents_of, from_date_obj, to_date_obj,
+                 adjust_actions, timeframe_code, results=None, cache_key=None):
+    """
+    Worker job: download, adjust and resample. Returns the frame to show, or None if nothing was found.
+    The frame is also shared through `results` under `cache_key`, even if the session that asked has gone
+    """
+    if instrument_type == "Index":
+        df = download_index_data(nse, job, symbol, from_date_obj, to_date_obj)
+    elif instrument_type == "Multiple Stocks/ETFs":
+        df = download_multi_stock_data(nse, job, symbols, constituents_of, from_date_obj, to_date_obj)
+    else:
+        df = download_stock_data(nse, job, symbol, from_date_obj, to_date_obj)
+    if df is None or len(df) == 0:
+        return None
+
+    if adjust_actions:
+        job.update(message="Adjusting for corporate actions...")
+        df = nse.corporate_actions.adjust(df)
+
+    # Apply timeframe resampling
+    if timeframe_code in TIMEFRAMES:
+        job.update(message=f"Resampling to {TIMEFRAMES[timeframe_code][0]} data...")
+        df = resample_timeframe(df, timeframe_code)
+
+    job.update(1.0, f"✅ Complete! Downloaded {len(df)} records")
+    if job.failed_days:
+        job.warnings.append(f"⚠️ {job.failed_days} day(s) could not be downloaded; the data may be incomplete")
+    if results is not None:
+        # A partial result is only shared until the TTL, so a later request retries the failed days
+        results.put(cache_key, df, to_date_obj, complete=not job.failed_days)
+    return df
+
 # App title and description
 st.title("📊 NSE Historical Data Downloader")
 st.markdown("Download historical OHLC data for NSE stocks, indices, and ETFs")
@@ -209,9 +221,11 @@ with col1:
     # Instrument type selection
     instrument_type = st.radio(
         "Select Instrument Type:",
-        ["Index", "Stock/ETF"],
-        help="Choose whether to download Index or Stock/ETF data"
+        ["Index", "Stock/ETF", "Multiple Stocks/ETFs"],
+        help="Choose whether to download Index, Stock/ETF, or several Stocks/ETFs at once"
     )
+    symbols = []
+    constituents_of = ""
     
     # Symbol input with examples
     if instrument_type == "Index":
@@ -226,6 +240,20 @@ with col1:
             normalized = normalize_index_name(symbol)
             if normalized != symbol:
                 st.caption(f"🔄 Will search for: **{normalized}**")
+    elif instrument_type == "Multiple Stocks/ETFs":
+        st.info("💡 Each day's bhav copy is downloaded once for all symbols")
+        symbols_text = st.text_area(
+            "Stock/ETF Symbols:",
+            placeholder="e.g., RELIANCE, TCS, INFY",
+            help="Separate symbols with commas or new lines"
+        )
+        symbols = [item.strip().upper() for item in symbols_text.replace('\n', ',').split(',') if item.strip()]
+        constituents_of = st.selectbox(
+            "Add constituents of index (optional):",
+            [""] + NseUtility.NseUtils.equity_market_list,
+            help="Adds every constituent stock of the selected index"
+        )
+        symbol = ', '.join(symbols + ([f"{constituents_of} constituents"] if constituents_of else []))
     else:
         st.info("💡 Stocks: RELIANCE, TCS, INFY | ETFs: NIFTYBEES, BANKBEES")
         symbol = st.text_input(
@@ -256,11 +284,19 @@ with col1:
     st.markdown("#### ⏱️ Timeframe")
     timeframe = st.selectbox(
         "Select Timeframe:",
-        ["1d (Daily)", "1w (Weekly)", "1m (Monthly)", "1q (Quarterly)", "1y (Yearly)"],
+        ["1d (Daily)", "1w (Weekly)", "1m (Monthly)", "1q (Quarterly)", "1y (Yearly)", "1fy (Fiscal Yearly, Apr-Mar)"],
         help="Choose data frequency"
     )
     timeframe_code = timeframe.split()[0]
-    download_button = st.button("Download Data", type="primary", width="content")
+    adjust_actions = st.checkbox(
+        "Adjust for splits/bonuses",
+        disabled=instrument_type == "Index",
+        help="Scale prices and volumes before each split, consolidation or bonus so the series is continuous"
+    ) and instrument_type != "Index"
+    # A download of this session still running on the shared worker
+    running_job = get_worker().job(st.session_state.get('job_id'))
+    download_button = st.button("Download Data", type="primary", width="content",
+                                disabled=running_job is not None and not running_job.done)
 
 with col2:
     st.subheader("📋 Download Settings")
@@ -279,6 +315,7 @@ with col2:
     st.write(f"- **From Date:** {from_date.strftime('%d-%m-%Y')}")
     st.write(f"- **To Date:** {to_date.strftime('%d-%m-%Y')}")
     st.write(f"- **Timeframe:** {timeframe_code}")
+    st.write(f"- **Adjusted:** {'Splits/bonuses' if adjust_actions else 'No'}")
     
     # Calculate estimated records
     days_diff = (to_date - from_date).days
@@ -290,7 +327,7 @@ with col2:
         estimated_records = estimated_records // 20
     elif timeframe_code == '1q':
         estimated_records = estimated_records // 60
-    elif timeframe_code == '1y':
+    elif timeframe_code in ('1y', '1fy'):
         estimated_records = estimated_records // 240
     
     st.info(f"📊 Estimated records: ~{estimated_records}")
@@ -305,65 +342,61 @@ if 'downloaded_data' not in st.session_state:
 if 'filename' not in st.session_state:
     st.session_state.filename = None
 
-# Download process
+@st.fragment(run_every=1)
+def show_job_progress(job_id):
+    """Redraw the job's progress every second; rerun the whole page once it has finished."""
+    job = get_worker().job(job_id)
+    if job is None or job.done:
+        st.rerun()
+    st.progress(job.progress)
+    st.text(job.message)
+
+# Download process: queued on the shared worker, so this script run returns at once
 if download_button:
     if not symbol:
         st.error("❌ Please enter a symbol/index name")
     elif to_date <= from_date:
         st.error("❌ 'To Date' must be after 'From Date'")
     else:
-        st.markdown("---")
-        st.subheader("⬇️ Downloading Data")
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        try:
-            # Download based on instrument type
-            if instrument_type == "Index":
-                df = download_index_data(symbol, from_date, to_date, progress_bar, status_text)
-            else:
-                df = download_stock_data(symbol, from_date, to_date, progress_bar, status_text)
-            
-            if df is not None and len(df) > 0:
-                # Apply timeframe resampling
-                if timeframe_code == '1w':
-                    status_text.text("Resampling to weekly data...")
-                    df = resample_to_weekly(df)
-                elif timeframe_code == '1m':
-                    status_text.text("Resampling to monthly data...")
-                    df = resample_to_monthly(df)
-                elif timeframe_code == '1q':
-                    status_text.text("Resampling to quarterly data...")
-                    df = resample_to_quarterly(df)
-                elif timeframe_code == '1y':
-                    status_text.text("Resampling to yearly data...")
-                    df = resample_to_yearly(df)
-                
-                progress_bar.progress(1.0)
-                status_text.text(f"✅ Complete! Downloaded {len(df)} records")
-                
-                # Store in session state
-                st.session_state.downloaded_data = df
-                actual_symbol = df['Symbol'].iloc[0].replace(' ', '_').replace('/', '_')
-                st.session_state.filename = f"{actual_symbol}.csv"
-                
-                st.success(f"✅ Successfully downloaded {len(df)} records!")
-                
-            else:
-                progress_bar.empty()
-                status_text.empty()
-                st.error("❌ No data found. Please check:")
-                st.markdown("""
-                - Symbol/Index name is correct
-                - Date range includes trading days
-                - NSE website is accessible
-                """)
-                
-        except Exception as e:
-            progress_bar.empty()
-            status_text.empty()
-            st.error(f"❌ Error: {str(e)}")
+        key = result_key(instrument_type, symbol, symbols, constituents_of, from_date, to_date, timeframe_code,
+                         adjust_actions)
+        cached_df = get_results().get(key)
+        if cached_df is not None:
+            # Downloaded and resampled before, by this or another session
+            store_result(cached_df)
+            st.success(f"✅ Loaded {len(cached_df)} records from the shared cache")
+        else:
+            # A session already downloading the same request shares its job
+            job = get_worker().submit(
+                run_download, instrument_type, symbol, symbols, constituents_of, from_date, to_date,
+                adjust_actions, timeframe_code, results=get_results(), cache_key=key,
+                description=f"{symbol} {from_date.strftime('%d-%m-%Y')} to {to_date.strftime('%d-%m-%Y')} {timeframe_code}",
+                key=key
+            )
+            st.session_state.job_id = job.id
+            running_job = job
+
+if running_job is not None and not running_job.done:
+    st.markdown("---")
+    st.subheader("⬇️ Downloading Data")
+    show_job_progress(running_job.id)
+elif running_job is not None:
+    st.session_state.job_id = None
+    for warning in running_job.warnings:
+        st.warning(warning)
+    df = running_job.result
+    if running_job.error is not None:
+        st.error(f"❌ Error: {str(running_job.error)}")
+    elif df is not None and len(df) > 0:
+        store_result(df)
+        st.success(f"✅ Successfully downloaded {len(df)} records!")
+    else:
+        st.error("❌ No data found. Please check:")
+        st.markdown("""
+        - Symbol/Index name is correct
+        - Date range includes trading days
+        - NSE website is accessible
+        """)
 
 # Display and download results
 if st.session_state.downloaded_data is not None:
@@ -376,7 +409,10 @@ if st.session_state.downloaded_data is not None:
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         #SYMBOL NAME
-        st.metric("Symbol", df['Symbol'].iloc[0])
+        if df['Symbol'].nunique() > 1:
+            st.metric("Symbols", df['Symbol'].nunique())
+        else:
+            st.metric("Symbol", df['Symbol'].iloc[0])
     with col2:
         st.metric("Total Records", len(df))
     with col3:
@@ -0,0 +1,118 @@
+"""
+Benchmark NseUtils._parse_live_option_chain against the previous per-strike concat loop.
+
+Runs on a synthetic option-chain payload shaped like the option-chain-indices response
+(every expiry, thousands of strikes), or on a recorded payload saved from NSE:
+
+    python benchmarks/bench_live_option_chain.py
+    python benchmarks/bench_live_option_chain.py --strikes 4000 --expiries 12
+    python benchmarks/bench_live_option_chain.py --payload banknifty.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NseUtility import NseUtils  # noqa: E402
+
+
+def synthetic_payload(strikes: int, expiries: int, seed: int = 7) -> dict:
+    """Build an option-chain payload with `strikes` rows spread over `expiries` weekly expiries."""
+    rng = random.Random(seed)
+    first_expiry = date(2025, 1, 2)
+    expiry_dates = [(first_expiry + timedelta(weeks=i)).strftime('%d-%b-%Y') for i in range(expiries)]
+    data = []
+    for i in range(strikes):
+        row = {'strikePrice': 40000 + 100 * (i // expiries), 'expiryDate': expiry_dates[i % expiries]}
+        for side in ('CE', 'PE'):
+            if rng.random() < 0.1:
+                continue  # Illiquid strikes often have only one leg
+            row[side] = {
+                'openInterest': rng.randint(0, 50000), 'changeinOpenInterest': rng.randint(-5000, 5000),
+                'totalTradedVolume': rng.randint(0, 10 ** 6), 'impliedVolatility': round(rng.uniform(5, 40), 2),
+                'lastPrice': round(rng.uniform(1, 2000), 2), 'change': round(rng.uniform(-200, 200), 2),
+                'bidQty': rng.randint(0, 2000), 'bidprice': round(rng.uniform(1, 2000), 2),
+                'askPrice': round(rng.uniform(1, 2000), 2), 'askQty': rng.randint(0, 2000),
+            }
+        data.append(row)
+    return {'records': {'timestamp': '02-Jan-2025 15:30:00', 'expiryDates': expiry_dates, 'data': data}}
+
+
+def legacy_parse(payload, symbol, oi_mode="full"):
+    """The original row-by-row build: one pd.concat per strike, quadratic in the number of strikes."""
+    oi_data = pd.DataFrame()
+    oi_row = {'Fetch_Time': None, 'Symbol': None, 'Expiry_Date': None}
+    for prefix in ('CALLS', 'PUTS'):
+        for name, _ in NseUtils.option_leg_fields:
+            oi_row[f'{prefix}_{name}'] = 0
+        if prefix == 'CALLS':
+            oi_row['Strike_Price'] = 0
+    fields = NseUtils.option_leg_fields if oi_mode == 'full' else NseUtils.option_leg_fields[:6]
+    for row in payload['records']['data']:
+        oi_row['Expiry_Date'] = row['expiryDate']
+        oi_row['Strike_Price'] = row['strikePrice']
+        for side, prefix in (('CE', 'CALLS'), ('PE', 'PUTS')):
+            try:
+                for name, key in fields:
+                    oi_row[f'{prefix}_{name}'] = row[side][key]
+            except KeyError:
+                for name, _ in fields:
+                    oi_row[f'{prefix}_{name}'] = 0
+        if oi_data.empty:
+            oi_data = pd.DataFrame([oi_row]).copy()
+        else:
+            oi_data = pd.concat([oi_data, pd.DataFrame([oi_row])], ignore_index=True)
+        oi_data['Symbol'] = symbol
+        oi_data['Fetch_Time'] = payload['records']['timestamp']
+    return oi_data
+
+
+def best_of(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payload', help='Recorded option-chain-indices JSON response')
+    parser.add_argument('--strikes', type=int, default=3000, help='Synthetic strikes (default 3000)')
+    parser.add_argument('--expiries', type=int, default=10, help='Synthetic expiries (default 10)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation, best is reported')
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the current implementation')
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload, 'r') as fh:
+            payload = json.load(fh)
+    else:
+        payload = synthetic_payload(args.strikes, args.expiries)
+    rows = len(payload['records']['data'])
+
+    current, current_df = best_of(lambda: NseUtils._parse_live_option_chain(payload, 'BANKNIFTY'), args.repeat)
+    print(f"strikes: {rows}")
+    print(f"columnar build : {current * 1000:10.1f} ms")
+    if args.skip_legacy:
+        return
+
+    legacy, legacy_df = best_of(lambda: legacy_parse(payload, 'BANKNIFTY'), args.repeat)
+    print(f"per-strike loop: {legacy * 1000:10.1f} ms")
+    print(f"speedup        : {legacy / current:10.1f}x")
+    pd.testing.assert_frame_equal(current_df, legacy_df, check_dtype=False)
+    print("outputs match")
+
+
+if __name__ == '__main__':
+    main()
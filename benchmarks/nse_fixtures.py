@@ -0,0 +1,329 @@
+"""
+NSE response fixtures and an offline stand-in session for the benchmarks.
+
+Fixtures live in benchmarks/fixtures/. They are generated deterministically on first use,
+shaped like the real files and payloads (column order, padding, zip members, JSON keys),
+or recorded from NSE when online:
+
+    python benchmarks/nse_fixtures.py                        # (re)generate synthetic fixtures
+    python benchmarks/nse_fixtures.py --record 14-10-2026    # record real responses for a trade date
+
+StandInSession replaces NseSession and answers every request from the fixtures, so
+make_nse() gives an NseUtils that runs its full download/parse path without a network.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import re
+import sys
+import zipfile
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from functools import partial
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import NseUtility  # noqa: E402
+from nse_session import NseSession  # noqa: E402
+from nse_throttle import RateLimiter  # noqa: E402
+
+from bench_live_option_chain import synthetic_payload  # noqa: E402
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+FIXTURE_FILES = {
+    'sec_bhavdata_full': 'sec_bhavdata_full.csv',
+    'ind_close_all': 'ind_close_all.csv',
+    'cm_bhavcopy': 'cm_bhavcopy.csv.zip',
+    'fo_bhavcopy': 'fo_bhavcopy.csv.zip',
+    'option_chain': 'option_chain_indices.json',
+    'option_chain_v3': 'option_chain_v3.json',
+    'indices_history': 'indices_history.json',
+}
+
+UDIFF_COLUMNS = ['TradDt', 'BizDt', 'Sgmt', 'Src', 'FinInstrmTp', 'FinInstrmId', 'ISIN', 'TckrSymb', 'SctySrs',
+                 'XpryDt', 'FininstrmActlXpryDt', 'StrkPric', 'OptnTp', 'FinInstrmNm', 'OpnPric', 'HghPric',
+                 'LwPric', 'ClsPric', 'LastPric', 'PrvsClsgPric', 'UndrlygPric', 'SttlmPric', 'OpnIntrst',
+                 'ChngInOpnIntrst', 'TtlTradgVol', 'TtlTrfVal', 'TtlNbOfTxsExctd', 'SsnId', 'NewBrdLotQty', 'Rmks',
+                 'Rsvd1', 'Rsvd2', 'Rsvd3', 'Rsvd4']
+
+TRADE_DATE = date(2025, 1, 2)
+
+
+def _symbols(count):
+    return [f"SYM{i:04d}" for i in range(count)]
+
+
+def _price(rng):
+    return round(rng.uniform(10, 5000), 2)
+
+
+def sec_bhavdata_full_csv(rows: int = 3000, seed: int = 1) -> bytes:
+    """Space padded delivery bhavcopy, '-' for blank delivery figures of non-EQ series."""
+    rng = random.Random(seed)
+    lines = ['SYMBOL, SERIES, DATE1, PREV_CLOSE, OPEN_PRICE, HIGH_PRICE, LOW_PRICE, LAST_PRICE, CLOSE_PRICE, '
+             'AVG_PRICE, TTL_TRD_QNTY, TURNOVER_LACS, NO_OF_TRADES, DELIV_QTY, DELIV_PER']
+    for symbol in _symbols(rows):
+        series = 'EQ' if rng.random() < 0.85 else rng.choice(['BE', 'BZ', 'SM'])
+        prices = [_price(rng) for _ in range(7)]
+        qty = rng.randint(1, 10 ** 7)
+        deliv = (str(rng.randint(0, qty)), f"{rng.uniform(0, 100):.2f}") if series == 'EQ' else ('-', '-')
+        lines.append(f"{symbol}, {series}, {TRADE_DATE:%d-%b-%Y}, " + ', '.join(f"{p:.2f}" for p in prices)
+                     + f", {qty}, {qty * prices[5] / 1e5:.2f}, {rng.randint(1, 10 ** 5)}, {deliv[0]}, {deliv[1]}")
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def ind_close_all_csv(rows: int = 150, seed: int = 2) -> bytes:
+    rng = random.Random(seed)
+    lines = ['Index Name,Index Date,Open Index Value,High Index Value,Low Index Value,Closing Index Value,'
+             'Points Change,Change(%),Volume,Turnover (Rs. Cr.),P/E,P/B,Div Yield']
+    names = ['Nifty 50', 'Nifty Bank', 'Nifty IT'] + [f"Nifty Index {i}" for i in range(rows - 3)]
+    for name in names:
+        values = [f"{rng.uniform(1000, 50000):.2f}" for _ in range(4)]
+        pe = f"{rng.uniform(5, 60):.2f}" if rng.random() < 0.9 else '-'
+        lines.append(f"{name},{TRADE_DATE:%d-%m-%Y}," + ','.join(values)
+                     + f",{rng.uniform(-500, 500):.2f},{rng.uniform(-5, 5):.2f},{rng.randint(0, 10 ** 9)},"
+                       f"{rng.uniform(0, 10 ** 5):.2f},{pe},{rng.uniform(1, 10):.2f},{rng.uniform(0, 3):.2f}")
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def _zip(name: str, text: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name, text)
+    return buffer.getvalue()
+
+
+def _udiff_row(rng, segment, instrument, symbol, expiry='', strike='', option=''):
+    close = _price(rng)
+    qty = rng.randint(0, 10 ** 6)
+    values = {
+        'TradDt': f"{TRADE_DATE:%Y-%m-%d}", 'BizDt': f"{TRADE_DATE:%Y-%m-%d}", 'Sgmt': segment, 'Src': 'NSE',
+        'FinInstrmTp': instrument, 'FinInstrmId': rng.randint(1, 10 ** 6), 'ISIN': f"INE{rng.randint(0, 10 ** 8):09d}",
+        'TckrSymb': symbol, 'SctySrs': 'EQ' if segment == 'CM' else '', 'XpryDt': expiry,
+        'FininstrmActlXpryDt': expiry, 'StrkPric': strike, 'OptnTp': option,
+        'FinInstrmNm': f"{symbol}{expiry.replace('-', '')}{strike}{option}", 'OpnPric': close, 'HghPric': close,
+        'LwPric': close, 'ClsPric': close, 'LastPric': close, 'PrvsClsgPric': close, 'UndrlygPric': close,
+        'SttlmPric': close, 'OpnIntrst': rng.randint(0, 10 ** 6), 'ChngInOpnIntrst': rng.randint(-10 ** 5, 10 ** 5),
+        'TtlTradgVol': qty, 'TtlTrfVal': round(qty * close, 2), 'TtlNbOfTxsExctd': rng.randint(0, 10 ** 4),
+        'SsnId': 'F1', 'NewBrdLotQty': rng.choice([1, 25, 50, 75]), 'Rmks': '', 'Rsvd1': '', 'Rsvd2': '',
+        'Rsvd3': '', 'Rsvd4': '',
+    }
+    return ','.join(str(values[column]) for column in UDIFF_COLUMNS)
+
+
+def cm_bhavcopy_zip(rows: int = 3000, seed: int = 3) -> bytes:
+    rng = random.Random(seed)
+    lines = [','.join(UDIFF_COLUMNS)] + [_udiff_row(rng, 'CM', 'STK', symbol) for symbol in _symbols(rows)]
+    return _zip(f"BhavCopy_NSE_CM_0_0_0_{TRADE_DATE:%Y%m%d}_F_0000.csv", '\n'.join(lines) + '\n')
+
+
+def fo_bhavcopy_zip(rows: int = 40000, seed: int = 4) -> bytes:
+    rng = random.Random(seed)
+    underlyings = ['NIFTY', 'BANKNIFTY', 'FINNIFTY'] + _symbols(180)
+    expiries = [f"{TRADE_DATE + timedelta(days=7 * i):%Y-%m-%d}" for i in range(1, 7)]
+    lines = [','.join(UDIFF_COLUMNS)]
+    for i in range(rows):
+        symbol = underlyings[i % len(underlyings)]
+        index = symbol in ('NIFTY', 'BANKNIFTY', 'FINNIFTY')
+        if i % 25 == 0:
+            lines.append(_udiff_row(rng, 'FO', 'IDF' if index else 'STF', symbol, rng.choice(expiries)))
+        else:
+            lines.append(_udiff_row(rng, 'FO', 'IDO' if index else 'STO', symbol, rng.choice(expiries),
+                                    f"{100 * rng.randint(10, 600):.2f}", rng.choice(['CE', 'PE'])))
+    return _zip(f"BhavCopy_NSE_FO_0_0_0_{TRADE_DATE:%Y%m%d}_F_0000.csv", '\n'.join(lines) + '\n')
+
+
+def option_chain_v3_json(strikes: int = 300, seed: int = 5) -> bytes:
+    """option-chain-v3 payload for one expiry; every leg carries an identifier."""
+    payload = synthetic_payload(strikes, 1, seed)
+    records = payload['records']
+    for row in records['data']:
+        for side in ('CE', 'PE'):
+            if side in row:
+                row[side].update({'strikePrice': row['strikePrice'], 'expiryDate': row['expiryDate'],
+                                  'underlying': 'NIFTY',
+                                  'identifier': f"OPTIDXNIFTY{row['expiryDate']}{side}{row['strikePrice']}.00"})
+    return json.dumps(payload).encode()
+
+
+def indices_history_json(years: int = 10, seed: int = 6) -> bytes:
+    """indicesHistory payload covering `years` of weekdays up to TRADE_DATE; the stand-in serves date slices."""
+    rng = random.Random(seed)
+    closes, turnovers = [], []
+    day = TRADE_DATE - timedelta(days=365 * years)
+    level = 8000.0
+    while day <= TRADE_DATE:
+        if day.weekday() < 5:
+            level *= 1 + rng.uniform(-0.02, 0.02)
+            stamp = f"{day:%d-%b-%Y}"
+            closes.append({'_id': f"c{len(closes)}", 'EOD_INDEX_NAME': 'NIFTY 50', 'EOD_OPEN_INDEX_VAL': round(level, 2),
+                           'EOD_HIGH_INDEX_VAL': round(level * 1.01, 2), 'EOD_CLOSE_INDEX_VAL': round(level, 2),
+                           'EOD_LOW_INDEX_VAL': round(level * 0.99, 2), 'EOD_TIMESTAMP': stamp, 'TIMESTAMP': stamp})
+            turnovers.append({'_id': f"t{len(turnovers)}", 'HIT_INDEX_NAME_UPPER': 'NIFTY 50',
+                              'HIT_TRADED_QTY': rng.randint(10 ** 8, 10 ** 9),
+                              'HIT_TURN_OVER': round(rng.uniform(10 ** 4, 10 ** 5), 2), 'TIMESTAMP': stamp})
+        day += timedelta(days=1)
+    return json.dumps({'data': {'indexCloseOnlineRecords': closes, 'indexTurnoverRecords': turnovers}}).encode()
+
+
+GENERATORS = {
+    'sec_bhavdata_full': sec_bhavdata_full_csv,
+    'ind_close_all': ind_close_all_csv,
+    'cm_bhavcopy': cm_bhavcopy_zip,
+    'fo_bhavcopy': fo_bhavcopy_zip,
+    'option_chain': lambda: json.dumps(synthetic_payload(4000, 12)).encode(),
+    'option_chain_v3': option_chain_v3_json,
+    'indices_history': indices_history_json,
+}
+
+
+def ensure_fixtures(fixtures_dir: str = FIXTURES_DIR, regenerate: bool = False) -> dict:
+    """
+    Make sure every fixture exists, generating the missing ones (recorded files are kept)
+    :return: dict of fixture name -> path
+    """
+    os.makedirs(fixtures_dir, exist_ok=True)
+    paths = {}
+    for name, filename in FIXTURE_FILES.items():
+        path = os.path.join(fixtures_dir, filename)
+        if regenerate or not os.path.exists(path):
+            with open(path, 'wb') as fh:
+                fh.write(GENERATORS[name]())
+        paths[name] = path
+    return paths
+
+
+def record_fixtures(trade_date: str, fixtures_dir: str = FIXTURES_DIR):
+    """Save real NSE responses for a trade date ('dd-mm-YYYY') over the synthetic fixtures."""
+    nse = NseUtility.NseUtils(rate_limiter=RateLimiter(2))
+    day = datetime.strptime(trade_date, '%d-%m-%Y')
+    archives = {
+        'sec_bhavdata_full': f"https://nsearchives.nseindia.com/products/content/sec_bhavdata_full_{day:%d%m%Y}.csv",
+        'ind_close_all': f"https://nsearchives.nseindia.com/content/indices/ind_close_all_{day:%d%m%Y}.csv",
+        'cm_bhavcopy': f"https://nsearchives.nseindia.com/content/cm/BhavCopy_NSE_CM_0_0_0_{day:%Y%m%d}_F_0000.csv.zip",
+        'fo_bhavcopy': f"https://nsearchives.nseindia.com/content/fo/BhavCopy_NSE_FO_0_0_0_{day:%Y%m%d}_F_0000.csv.zip",
+    }
+    api = {
+        'option_chain': ('https://www.nseindia.com/api/option-chain-indices?symbol=NIFTY',
+                         'https://www.nseindia.com/option-chain'),
+        'indices_history': (f"https://www.nseindia.com/api/historical/indicesHistory?indexType=NIFTY%2050"
+                            f"&from={(day - timedelta(days=364)):%d-%m-%Y}&to={day:%d-%m-%Y}",
+                            'https://www.nseindia.com/reports-indices-historical-index-data'),
+    }
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for name, url in archives.items():
+        response = nse.http.fetch(url, headers=nse.headers, cookies=nse.cookies)
+        _save_recorded(fixtures_dir, name, response)
+    for name, (url, ref_url) in api.items():
+        _save_recorded(fixtures_dir, name, nse.http.get(url, ref_url))
+
+
+def _save_recorded(fixtures_dir, name, response):
+    if response.status_code != 200:
+        print(f"   ⚠️ {name}: HTTP {response.status_code}, keeping the existing fixture")
+        return
+    with open(os.path.join(fixtures_dir, FIXTURE_FILES[name]), 'wb') as fh:
+        fh.write(response.content)
+    print(f"   ✓ {name}: {len(response.content) / 1e6:.1f} MB recorded")
+
+
+class StandInSession(NseSession):
+    """
+    NseSession that answers from the fixtures instead of the network. Archive urls of any date get the
+    day's fixture file; indicesHistory is sliced to the requested range; NSE pages answer empty 200s.
+    """
+
+    routes = [
+        (re.compile(r'sec_bhavdata_full_\d{8}\.csv'), 'sec_bhavdata_full'),
+        (re.compile(r'ind_close_all_\d{8}\.csv'), 'ind_close_all'),
+        (re.compile(r'BhavCopy_NSE_CM_0_0_0_\d{8}_F_0000\.csv\.zip'), 'cm_bhavcopy'),
+        (re.compile(r'BhavCopy_NSE_FO_0_0_0_\d{8}_F_0000\.csv\.zip'), 'fo_bhavcopy'),
+        (re.compile(r'/api/option-chain-(indices|equities)\?'), 'option_chain'),
+        (re.compile(r'/api/option-chain-v3\?'), 'option_chain_v3'),
+        (re.compile(r'/api/historical/indicesHistory\?'), 'indices_history'),
+    ]
+
+    def __init__(self, fixtures: dict, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fixtures = fixtures
+        self._contents = {}
+        self._history_rows = None  # record key -> (sorted days, rows) of the indicesHistory fixture
+        self.requests = 0
+
+    def _content(self, name: str) -> bytes:
+        if name not in self._contents:
+            with open(self.fixtures[name], 'rb') as fh:
+                self._contents[name] = fh.read()
+        return self._contents[name]
+
+    def fetch(self, url: str, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        self.requests += 1
+        status, content = 200, b''
+        for pattern, name in self.routes:
+            if pattern.search(url):
+                content = self._history(url) if name == 'indices_history' else self._content(name)
+                break
+        else:
+            if '/api/' in url:
+                status = 404
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response._content = content
+        response._content_consumed = True  # iter_content() then serves the content in chunks, as streaming does
+        return response
+
+    def _history(self, url: str) -> bytes:
+        """indicesHistory body holding only the requested from/to days, as NSE answers it."""
+        if self._history_rows is None:
+            data = json.loads(self._content('indices_history'))['data']
+            history_rows = {}
+            for key, rows in data.items():
+                dated = sorted((datetime.strptime(row['TIMESTAMP'], '%d-%b-%Y'), i) for i, row in enumerate(rows))
+                history_rows[key] = ([day for day, _ in dated], [rows[i] for _, i in dated])
+            self._history_rows = history_rows  # Published whole, as worker threads read it concurrently
+        query = dict(part.split('=', 1) for part in url.split('?', 1)[1].split('&'))
+        start = datetime.strptime(query['from'], '%d-%m-%Y')
+        end = datetime.strptime(query['to'], '%d-%m-%Y')
+        sliced = {key: rows[bisect_left(days, start):bisect_right(days, end)]
+                  for key, (days, rows) in self._history_rows.items()}
+        return json.dumps({'data': sliced}).encode()
+
+
+def make_nse(fixtures: dict, **kwargs):
+    """
+    NseUtils wired to a StandInSession and an unthrottled limiter, so timings measure parsing and assembly
+    :param fixtures: dict from ensure_fixtures()
+    :param kwargs: Further NseUtils arguments (eg: cache)
+    :return: NseUtils
+    """
+    kwargs.setdefault('rate_limiter', RateLimiter(0))
+    with mock.patch.object(NseUtility, 'NseSession', partial(StandInSession, fixtures)):
+        return NseUtility.NseUtils(**kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--record', metavar='DD-MM-YYYY', help='Record real NSE responses for a trade date')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Fixture directory')
+    args = parser.parse_args()
+    if args.record:
+        ensure_fixtures(args.fixtures)
+        record_fixtures(args.record, args.fixtures)
+    else:
+        for name, path in ensure_fixtures(args.fixtures, regenerate=True).items():
+            print(f"{name:18s} {os.path.getsize(path) / 1e6:8.2f} MB  {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Offline benchmark suite for the NseUtils hot paths.
+
+Every case runs the real NseUtils code against the fixtures in benchmarks/fixtures (see
+nse_fixtures.py), served by a stand-in session, so results do not depend on NSE or the
+network. Each case reports its best time, throughput and peak Python memory, and is
+compared with benchmarks/baseline.json:
+
+    python benchmarks/run_benchmarks.py                      # run all, compare with the baseline
+    python benchmarks/run_benchmarks.py --only bhav resample # cases whose name contains a word
+    python benchmarks/run_benchmarks.py --save-baseline      # record the current results as the baseline
+
+The exit code is 1 when any case is slower than baseline * tolerance. Baselines are machine
+specific, so none is committed: the first run of a case on a machine records its baseline
+in baseline.json (gitignored, like the fixtures). Peak memory is measured with tracemalloc in a separate run,
+so it covers numpy and Python objects but not Arrow buffers.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nse_resample import resample_ohlcv  # noqa: E402
+
+from bench_live_option_chain import best_of  # noqa: E402
+from nse_fixtures import FIXTURES_DIR, TRADE_DATE, ensure_fixtures, make_nse  # noqa: E402
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def ohlcv_frame(symbols: int = 500, days: int = 1000, seed: int = 11) -> pd.DataFrame:
+    """Long daily OHLCV frame shaped like ohlcv_history output: 'dd-mm-YYYY' dates, date-major rows."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=TRADE_DATE, periods=days).strftime('%d-%m-%Y')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, symbols)), axis=0)).ravel()
+    spread = rng.uniform(0, 0.02, close.size)
+    return pd.DataFrame({
+        'Symbol': np.tile([f"SYM{i:04d}" for i in range(symbols)], days),
+        'Date': np.repeat(dates, symbols),
+        'Open': close * (1 + spread / 2), 'High': close * (1 + spread), 'Low': close * (1 - spread),
+        'Close': close, 'Volume': rng.integers(1, 10 ** 6, close.size),
+    })
+
+
+def build_cases(fixtures: dict):
+    """
+    Benchmark cases
+    :param fixtures: dict from ensure_fixtures()
+    :return: dict of name -> (callable returning a frame, input bytes processed per call)
+    """
+    nse = make_nse(fixtures)
+    day = TRADE_DATE.strftime('%d-%m-%Y')
+    history_from = TRADE_DATE.replace(year=TRADE_DATE.year - 10).strftime('%d-%m-%Y')
+    ohlcv = ohlcv_frame()
+    size = {name: os.path.getsize(path) for name, path in fixtures.items()}
+    return {
+        'bhav_copy_with_delivery': (lambda: nse.bhav_copy_with_delivery(day), size['sec_bhavdata_full']),
+        'equity_bhav_copy': (lambda: nse.equity_bhav_copy(day), size['cm_bhavcopy']),
+        'bhav_copy_indices': (lambda: nse.bhav_copy_indices(day), size['ind_close_all']),
+        'fno_bhav_copy': (lambda: nse.fno_bhav_copy(day), size['fo_bhavcopy']),
+        'fno_bhav_copy_stream': (lambda: nse.fno_bhav_copy(day, stream=True), size['fo_bhavcopy']),
+        'fno_bhav_copy_filtered': (lambda: nse.fno_bhav_copy(day, symbols=['NIFTY', 'BANKNIFTY']),
+                                   size['fo_bhavcopy']),
+        'get_live_option_chain': (lambda: nse.get_live_option_chain('NIFTY', indices=True), size['option_chain']),
+        'get_option_chain': (lambda: nse.get_option_chain('NIFTY', '02-Jan-2025', indices=True),
+                             size['option_chain_v3']),
+        'get_index_historic_data': (lambda: nse.get_index_historic_data('NIFTY 50', history_from, day),
+                                    size['indices_history']),
+        'resample_ohlcv_1w': (lambda: resample_ohlcv(ohlcv, '1w'), int(ohlcv.memory_usage(deep=True).sum())),
+        'resample_ohlcv_1m': (lambda: resample_ohlcv(ohlcv, '1m'), int(ohlcv.memory_usage(deep=True).sum())),
+    }
+
+
+def peak_memory(fn) -> int:
+    """Peak bytes traced while fn runs once."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(fn, input_bytes: int, repeat: int) -> dict:
+    fn()  # Warm up: first call pays for imports, fixture reads and pandas caches
+    seconds, result = best_of(fn, repeat)
+    rows = len(result)
+    return {
+        'seconds': round(seconds, 6),
+        'rows': rows,
+        'rows_per_sec': round(rows / seconds) if seconds else None,
+        'mb_per_sec': round(input_bytes / 1e6 / seconds, 2) if seconds else None,
+        'peak_mb': round(peak_memory(fn) / 1e6, 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float = 0.005):
+    """
+    Print each case against its baseline
+    :param tolerance: Slowdown ratio over the baseline that counts as a regression
+    :param min_delta: Seconds a case must also lose, so timer noise on millisecond cases is not flagged
+    :return: List of case names slower than baseline * tolerance
+    """
+    regressions = []
+    print(f"{'case':26s} {'ms':>9s} {'rows/s':>11s} {'MB/s':>8s} {'peak MB':>8s} {'vs base':>8s}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        ratio = result['seconds'] / base['seconds'] if base and base['seconds'] else None
+        flag = ''
+        if ratio is not None and ratio > tolerance and result['seconds'] - base['seconds'] > min_delta:
+            regressions.append(name)
+            flag = '  ⚠️ slower'
+        print(f"{name:26s} {result['seconds'] * 1000:9.1f} {result['rows_per_sec'] or 0:11,d} "
+              f"{result['mb_per_sec'] or 0:8.1f} {result['peak_mb']:8.1f} "
+              f"{(f'{ratio:.2f}x' if ratio is not None else '-'):>8s}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case, best is reported (default 5)')
+    parser.add_argument('--only', nargs='+', metavar='WORD', help='Run only cases whose name contains a word')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Fixture directory')
+    parser.add_argument('--regenerate', action='store_true', help='Regenerate the synthetic fixtures first')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='Fail when a case takes longer than baseline * tolerance (default 1.25)')
+    parser.add_argument('--min-delta', type=float, default=5.0,
+                        help='Milliseconds a case must also lose to count as slower (default 5)')
+    args = parser.parse_args()
+
+    fixtures = ensure_fixtures(args.fixtures, regenerate=args.regenerate)
+    cases = build_cases(fixtures)
+    if args.only:
+        cases = {name: case for name, case in cases.items() if any(word in name for word in args.only)}
+        if not cases:
+            parser.error('no case matches --only')
+
+    results = {}
+    for name, (fn, input_bytes) in cases.items():
+        results[name] = run_case(fn, input_bytes, args.repeat)
+
+    try:
+        with open(args.baseline, 'r') as fh:
+            baseline = json.load(fh).get('cases', {})
+    except (OSError, ValueError):
+        baseline = {}
+    regressions = compare(results, baseline, args.tolerance, args.min_delta / 1000)
+
+    unrecorded = [name for name in results if name not in baseline]
+    if unrecorded and not args.save_baseline:
+        print(f"No baseline on this machine for {len(unrecorded)} case(s): recording this run as theirs")
+    if args.save_baseline or unrecorded:
+        baseline.update(results if args.save_baseline else {name: results[name] for name in unrecorded})
+        with open(args.baseline, 'w') as fh:
+            json.dump({'recorded': datetime.now().isoformat(timespec='seconds'),
+                       'python': platform.python_version(), 'pandas': pd.__version__,
+                       'machine': platform.machine(), 'cases': baseline}, fh, indent=1, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    if regressions and not args.save_baseline:
+        print(f"{len(regressions)} case(s) slower than baseline x {args.tolerance}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
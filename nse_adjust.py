@@ -0,0 +1,257 @@
+"""
+Corporate action adjusted OHLCV series.
+
+CorporateActions keeps a local copy of NSE's corporate action list (all equities) and
+extends it incrementally: only date spans not fetched before are requested, one request
+per year of history. Split, consolidation and bonus subjects are parsed into price
+factors; dividends optionally become factors against the previous close.
+
+adjust() applies the cumulative factors of every action after each bar in one vectorised
+merge, so bars before a 1:5 split are divided by 5 and their volume multiplied by 5. The
+last bar of each symbol is left as traded.
+"""
+
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from nse_cache import as_date, unique_tmp_path
+
+
+DEFAULT_ACTIONS_PATH = os.path.join(os.path.expanduser('~'), '.nse_data_downloader', 'corporate_actions.json')
+
+# eg: 'Face Value Split (Sub-Division) - From Rs 10/- Per Share To Rs 2/- Per Share'
+#     'Consolidation Of Shares From Re 1/- Per Share To Rs 10/- Per Share'
+_FACE_VALUE = re.compile(r'(?:split|sub-division|consolidation).*?from\s+r[se]\.?\s*([\d.]*\d).*?to\s+r[se]\.?\s*([\d.]*\d)',
+                         re.IGNORECASE)
+# eg: 'Bonus 1:1' (one new share for every share held)
+_BONUS = re.compile(r'bonus\D*?(\d+)\s*:\s*(\d+)', re.IGNORECASE)
+# eg: 'Interim Dividend - Rs 2.50 Per Share', 'Final Dividend - Rs 8 Per Share / Special Dividend - Rs 2 Per Share'
+_DIVIDEND = re.compile(r'dividend[^/]*?r[se]\.?\s*([\d.]*\d)', re.IGNORECASE)
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+
+def parse_action(subject: str):
+    """
+    Price factor and dividend of a corporate action subject
+    :param subject: NSE corporate action subject
+    :return: (factor, dividend) - prices before the ex date are multiplied by factor (1.0 for actions that
+    do not change the share count) and dividend is the cash amount per share (0.0 if none)
+    """
+    subject = subject or ''
+    factor = 1.0
+    face_value = _FACE_VALUE.search(subject)
+    if face_value and float(face_value.group(1)) > 0:
+        factor *= float(face_value.group(2)) / float(face_value.group(1))
+    bonus = _BONUS.search(subject)
+    if bonus and int(bonus.group(2)) > 0:
+        new_shares, held_shares = int(bonus.group(1)), int(bonus.group(2))
+        factor *= held_shares / (new_shares + held_shares)
+    dividend = sum(float(amount) for amount in _DIVIDEND.findall(subject))
+    return factor, dividend
+
+
+class CorporateActions:
+    """
+    Locally persisted NSE corporate actions with split/bonus (and optional dividend) price adjustment.
+    """
+
+    def __init__(self, nse=None, path: str = DEFAULT_ACTIONS_PATH, chunk_days: int = 365):
+        """
+        :param nse: NseUtils instance used to fetch actions. Without it, only the persisted actions are used
+        :param path: JSON file the actions are persisted to
+        :param chunk_days: Days of history requested per call to NSE
+        """
+        self.nse = nse
+        self.path = path
+        self.chunk_days = chunk_days
+        self.covered_from = None
+        self.covered_to = None
+        self._actions = {}  # (symbol, ex date, subject) -> action dict
+        self._factors = {}  # symbol -> per ex date factors, recomputed only when its actions change
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if data.get('covered_from'):
+            self.covered_from = datetime.strptime(data['covered_from'], '%Y-%m-%d').date()
+            self.covered_to = datetime.strptime(data['covered_to'], '%Y-%m-%d').date()
+        for action in data.get('actions', []):
+            self._actions[(action['symbol'], action['ex_date'], action['subject'])] = action
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = unique_tmp_path(self.path)
+        with open(tmp_path, 'w') as fh:
+            json.dump({
+                'covered_from': self.covered_from and self.covered_from.strftime('%Y-%m-%d'),
+                'covered_to': self.covered_to and self.covered_to.strftime('%Y-%m-%d'),
+                'actions': sorted(self._actions.values(), key=lambda a: (a['ex_date'], a['symbol'])),
+            }, fh, indent=0)
+        os.replace(tmp_path, self.path)
+
+    def _fetch(self, from_date: date, to_date: date) -> set:
+        """Fetch one span from NSE and merge it in. Returns the symbols with new actions, None on failure."""
+        actions = self.nse.get_corporate_action(from_date.strftime('%d-%m-%Y'), to_date.strftime('%d-%m-%Y'))
+        if actions is None:
+            return None
+        changed = set()
+        for row in actions.to_dict('records') if not actions.empty else []:
+            try:
+                ex_date = datetime.strptime(str(row.get('exDate')), '%d-%b-%Y').strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+            symbol = str(row.get('symbol', '')).strip().upper()
+            subject = str(row.get('subject', '')).strip()
+            key = (symbol, ex_date, subject)
+            if symbol and key not in self._actions:
+                self._actions[key] = {'symbol': symbol, 'series': row.get('series'), 'ex_date': ex_date,
+                                      'subject': subject}
+                changed.add(symbol)
+        return changed
+
+    def refresh(self, from_date, to_date=None) -> set:
+        """
+        Fetch the actions of any part of a date range not fetched before. Covered history grows outwards from
+        the first range requested, so later calls only ask NSE for the new days
+        :param from_date: Start date, date/datetime or 'dd-mm-YYYY'
+        :param to_date: End date (default: today)
+        :return: Set of symbols whose actions changed
+        """
+        from_date = as_date(from_date)
+        to_date = min(as_date(to_date) if to_date is not None else date.today(), date.today())
+        if self.nse is None or from_date > to_date:
+            return set()
+
+        changed = set()
+        if self.covered_from is None:
+            # Start from an empty range ending at to_date and grow it backwards
+            self.covered_from, self.covered_to = to_date + timedelta(days=1), to_date
+            spans_before, start_after = [(from_date, to_date)], None
+        else:
+            spans_before = [(from_date, self.covered_from - timedelta(days=1))] if from_date < self.covered_from else []
+            # The last covered day is fetched again: its actions may have been listed after that fetch
+            start_after = self.covered_to if to_date > self.covered_to else None
+
+        # Extend backwards newest chunk first, and forwards oldest chunk first, so a failed request
+        # leaves the covered range contiguous
+        for span_from, span_to in spans_before:
+            chunk_to = span_to
+            while chunk_to >= span_from:
+                chunk_from = max(span_from, chunk_to - timedelta(days=self.chunk_days - 1))
+                new = self._fetch(chunk_from, chunk_to)
+                if new is None:
+                    break
+                changed |= new
+                self.covered_from = chunk_from
+                chunk_to = chunk_from - timedelta(days=1)
+        if start_after is not None:
+            chunk_from = start_after
+            while chunk_from <= to_date:
+                chunk_to = min(to_date, chunk_from + timedelta(days=self.chunk_days - 1))
+                new = self._fetch(chunk_from, chunk_to)
+                if new is None:
+                    break
+                changed |= new
+                self.covered_to = chunk_to
+                chunk_from = chunk_to + timedelta(days=1)
+
+        if self.covered_from > self.covered_to:
+            self.covered_from = self.covered_to = None  # Nothing could be fetched
+        for symbol in changed:
+            self._factors.pop(symbol, None)
+        self._save()
+        return changed
+
+    def actions(self, symbols=None) -> pd.DataFrame:
+        """
+        Known corporate actions with their parsed factors
+        :param symbols: Optional list of symbols to keep
+        :return: pandas data frame with columns Symbol, Series, Ex_Date, Subject, Factor, Dividend
+        """
+        wanted = None if symbols is None else {symbol.upper() for symbol in symbols}
+        rows = []
+        for action in self._actions.values():
+            if wanted is None or action['symbol'] in wanted:
+                factor, dividend = parse_action(action['subject'])
+                rows.append([action['symbol'], action['series'], pd.Timestamp(action['ex_date']), action['subject'],
+                             factor, dividend])
+        df = pd.DataFrame(rows, columns=['Symbol', 'Series', 'Ex_Date', 'Subject', 'Factor', 'Dividend'])
+        return df.sort_values(['Symbol', 'Ex_Date'], ignore_index=True)
+
+    def factors(self, symbol: str) -> pd.DataFrame:
+        """
+        Share count factor and dividend per ex date of one symbol, only for dates with an adjusting action.
+        Memoized until a refresh brings a new action for the symbol
+        :param symbol: Stock symbol
+        :return: pandas data frame with columns Ex_Date, Factor, Dividend
+        """
+        symbol = symbol.upper()
+        if symbol not in self._factors:
+            actions = self.actions([symbol])
+            per_day = actions.groupby('Ex_Date').agg(Factor=('Factor', 'prod'), Dividend=('Dividend', 'sum'))
+            per_day = per_day[(per_day['Factor'] != 1.0) | (per_day['Dividend'] > 0)]
+            self._factors[symbol] = per_day.reset_index()
+        return self._factors[symbol]
+
+    def adjust(self, df: pd.DataFrame, dividends: bool = False, refresh: bool = True) -> pd.DataFrame:
+        """
+        Adjust a long OHLCV frame for splits, consolidations and bonuses (and dividends if asked), relative to
+        each symbol's last bar
+        :param df: Frame with Symbol, Date ('dd-mm-YYYY' or datetime64), Open, High, Low, Close, Volume columns
+        :param dividends: Also adjust for cash dividends, by the ratio 1 - dividend / previous close
+        :param refresh: Fetch actions for the frame's date range first
+        :return: New pandas data frame in the same row order and Date format
+        """
+        out = df.copy()
+        if out.empty:
+            return out
+        dates = out['Date'] if pd.api.types.is_datetime64_any_dtype(out['Date']) else \
+            pd.to_datetime(out['Date'], format='%d-%m-%Y', errors='coerce')
+        symbols = out['Symbol'].astype(str).str.upper()
+        if refresh:
+            self.refresh(dates.min(), dates.max())
+
+        bars = pd.DataFrame({'Symbol': symbols, 'Date': dates, 'Close': pd.to_numeric(out['Close'], errors='coerce'),
+                             '_row': np.arange(len(out))}).dropna(subset=['Date'])
+        tables = [self.factors(symbol).assign(Symbol=symbol) for symbol in bars['Symbol'].unique()]
+        tables = [table for table in tables if not table.empty]
+        if not tables:
+            return out
+        events = pd.concat(tables, ignore_index=True)
+        # Only actions up to each symbol's last bar count, so the latest bar stays as traded
+        last_bar = bars.groupby('Symbol')['Date'].max()
+        events = events[events['Ex_Date'] <= events['Symbol'].map(last_bar)]
+        if events.empty:
+            return out
+
+        events = events.sort_values('Ex_Date', kind='stable')
+        if dividends and (events['Dividend'] > 0).any():
+            # Dividend ratio against the close of the session before the ex date
+            prev_close = pd.merge_asof(events[['Symbol', 'Ex_Date']], bars.sort_values('Date')[['Symbol', 'Date', 'Close']],
+                                       left_on='Ex_Date', right_on='Date', by='Symbol', allow_exact_matches=False)
+            ratio = 1 - events['Dividend'].to_numpy() / prev_close['Close'].to_numpy()
+            events['Factor'] = events['Factor'] * np.where((ratio > 0) & (ratio < 1), ratio, 1.0)
+
+        # Cumulative factor of an action and every later one; a bar takes the first action strictly after it
+        events['Cumulative'] = events.iloc[::-1].groupby('Symbol', sort=False)['Factor'].cumprod().iloc[::-1]
+        matched = pd.merge_asof(bars.sort_values('Date'), events[['Symbol', 'Ex_Date', 'Cumulative']],
+                                left_on='Date', right_on='Ex_Date', by='Symbol', direction='forward',
+                                allow_exact_matches=False)
+        factor = np.ones(len(out))
+        factor[matched['_row'].to_numpy()] = matched['Cumulative'].fillna(1.0).to_numpy()
+
+        for col in PRICE_COLUMNS:
+            out[col] = (pd.to_numeric(out[col], errors='coerce') * factor).round(2)
+        volume = pd.to_numeric(out['Volume'], errors='coerce') / factor
+        out['Volume'] = volume.round().astype('int64') if volume.notna().all() else volume.round()
+        return out
@@ -0,0 +1,307 @@
+"""
+Asyncio client for the live NSE JSON endpoints.
+
+AsyncNseUtils mirrors the live-market methods of NseUtility.NseUtils as coroutines
+on one pooled aiohttp session, so a poller can fan out dozens of requests from a
+single event loop instead of a thread per call. Responses are parsed by the same
+NseUtils._parse_* helpers, so both clients return identical data frames.
+
+Archive downloads (bhavcopies, historic index data) stay on NseUtils, whose
+cached, threaded range engine is better suited to bulk history.
+
+Usage::
+
+    async with AsyncNseUtils() as nse:
+        snapshot = await nse.market_snapshot()
+"""
+
+import asyncio
+import time
+
+import pandas as pd
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from NseUtility import NseUtils
+from nse_throttle import AsyncRateLimiter
+
+
+class AsyncNseUtils:
+    """
+    Async counterpart of NseUtils for the live JSON API. One instance shares a connection pool,
+    cookie jar and rate limiter across all coroutines; use it as an async context manager or
+    call close() when done.
+    """
+
+    home_url = 'https://www.nseindia.com'
+    equity_market_list = NseUtils.equity_market_list
+    pre_market_list = NseUtils.pre_market_list
+    pre_market_xref = NseUtils.pre_market_xref
+
+    def __init__(self, requests_per_second: float = 10, pool_size: int = 16, cookie_ttl: float = 15 * 60,
+                 timeout: float = 10):
+        """
+        :param requests_per_second: Maximum request rate shared by all coroutines. None or 0 disables limiting
+        :param pool_size: Maximum concurrent keep-alive connections
+        :param cookie_ttl: Re-warm cookies after this many seconds even if none report an expiry
+        :param timeout: Total timeout per request in seconds
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncNseUtils requires aiohttp. Install with: uv pip install aiohttp")
+        self.headers = dict(NseUtils.default_headers)
+        self.rate_limiter = AsyncRateLimiter(requests_per_second)
+        self.pool_size = pool_size
+        self.cookie_ttl = cookie_ttl
+        self.timeout = timeout
+        self.session = None
+        self._warmed_at = None
+        self._warm_lock = None
+
+    async def __aenter__(self):
+        await self._ensure_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying connection pool."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+            self._warmed_at = None
+
+    async def _ensure_session(self):
+        # aiohttp sessions must be created inside the running event loop
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._warm_lock = asyncio.Lock()
+        return self.session
+
+    def cookies_expired(self) -> bool:
+        """Return True if cookies were never warmed or are older than cookie_ttl."""
+        return self._warmed_at is None or time.time() - self._warmed_at > self.cookie_ttl
+
+    async def warm(self, ref_url: str = None, force: bool = False):
+        """
+        Load a NSE web page to (re)acquire the session cookies. Concurrent callers share one warm-up.
+        :param ref_url: Page to load. Defaults to the NSE home page
+        :param force: Warm even if the current cookies have not expired
+        """
+        session = await self._ensure_session()
+        warmed_at = self._warmed_at
+        async with self._warm_lock:
+            if self._warmed_at != warmed_at or not (force or self.cookies_expired()):
+                return  # Another coroutine warmed while we waited
+            await self.rate_limiter.acquire()
+            async with session.get(ref_url or self.home_url) as response:
+                await response.read()
+            self._warmed_at = time.time()
+
+    async def _get_json(self, url: str, ref_url: str = None):
+        """
+        GET a NSE API url with warm cookies, re-warming once on 401/403
+        :param url: Url to fetch
+        :param ref_url: Page that issues the cookies for this url
+        :return: Decoded JSON payload
+        """
+        session = await self._ensure_session()
+        if self.cookies_expired():
+            try:
+                await self.warm(ref_url)
+            except aiohttp.ClientError:
+                pass  # Try the call anyway, it reports the real failure
+        for attempt in range(2):
+            await self.rate_limiter.acquire()
+            async with session.get(url) as response:
+                if response.status in (401, 403) and attempt == 0:
+                    await response.read()
+                else:
+                    if response.status != 200:
+                        raise RuntimeError(f"NSE returned HTTP {response.status} for {url}")
+                    return await response.json(content_type=None)
+            await self.warm(ref_url, force=True)
+
+    async def gather(self, **calls):
+        """
+        Await several coroutines concurrently on this client
+        eg: await nse.gather(adv=nse.get_advance_decline(), chain=nse.get_live_option_chain('NIFTY', indices=True))
+        :param calls: name=coroutine pairs
+        :return: dict of name -> result. A call that raised maps to its exception instead of failing the rest
+        """
+        results = await asyncio.gather(*calls.values(), return_exceptions=True)
+        return dict(zip(calls, results))
+
+    async def market_snapshot(self, option_chain_symbols=('NIFTY', 'BANKNIFTY'), pre_market_category='All'):
+        """
+        Fetch a full live market snapshot in one concurrent fan-out
+        :param option_chain_symbols: Index symbols whose live option chains are included
+        :param pre_market_category: Category passed to pre_market_info
+        :return: dict of name -> data frame/None/exception, see gather()
+        """
+        calls = {
+            'pre_market': self.pre_market_info(pre_market_category),
+            'advance_decline': self.get_advance_decline(),
+            'gainers_losers': self.get_gainers_losers(),
+            'most_active_by_volume': self.most_active_equity_stocks_by_volume(),
+            'most_active_by_value': self.most_active_equity_stocks_by_value(),
+            'most_active_index_calls': self.most_active_index_calls(),
+            'most_active_index_puts': self.most_active_index_puts(),
+            'most_active_contracts_by_oi': self.most_active_contracts_by_oi(),
+        }
+        for symbol in option_chain_symbols:
+            calls[f'option_chain_{symbol}'] = self.get_live_option_chain(symbol, indices=True)
+        return await self.gather(**calls)
+
+    async def pre_market_info(self, category='All'):
+        ref_url = 'https://www.nseindia.com/market-data/pre-open-market-cm-and-emerge-market'
+        url = f"https://www.nseindia.com/api/market-data-pre-open?key={self.pre_market_xref[category]}"
+        return NseUtils._parse_pre_market(await self._get_json(url, ref_url))
+
+    async def get_index_details(self, category, list_only=False):
+        category = category.upper().replace('&', '%26').replace(' ', '%20')
+        ref_url = f"https://www.nseindia.com/market-data/live-equity-market?symbol={category}"
+        url = f"https://www.nseindia.com/api/equity-stockIndices?index={category}"
+        return NseUtils._parse_index_details(await self._get_json(url, ref_url), list_only)
+
+    async def equity_info(self, symbol):
+        """
+        Extracts the full details of a symbol as see on NSE website. Both sections are fetched concurrently.
+        :param symbol:
+        :return: dict
+        """
+        symbol = symbol.replace(' ', '%20').replace('&', '%26')
+        ref_url = 'https://www.nseindia.com/get-quotes/equity?symbol=' + symbol
+        url = 'https://www.nseindia.com/api/quote-equity?symbol=' + symbol
+        data, trade_data = await asyncio.gather(self._get_json(url, ref_url),
+                                                self._get_json(url + "&section=trade_info", ref_url))
+        data['tradeData'] = trade_data
+        return data
+
+    async def price_info(self, symbol):
+        symbol = symbol.replace(' ', '%20').replace('&', '%26')
+        ref_url = 'https://www.nseindia.com/get-quotes/equity?symbol=' + symbol
+        url = 'https://www.nseindia.com/api/quote-equity?symbol=' + symbol
+        return NseUtils._parse_price_info(symbol, await self._get_json(url, ref_url))
+
+    async def get_market_depth(self, symbol):
+        data = await self.equity_info(symbol)
+        return {
+            'ask': data['tradeData']['marketDeptOrderBook']['ask'],
+            'bid': data['tradeData']['marketDeptOrderBook']['bid']
+        }
+
+    async def futures_data(self, symbol, indices=False):
+        symbol = symbol.replace(' ', '%20').replace('&', '%26')
+        ref_url = 'https://www.nseindia.com/get-quotes/derivatives?symbol=' + symbol
+        url = 'https://www.nseindia.com/api/quote-derivative?symbol=' + symbol
+        return NseUtils._parse_futures(await self._get_json(url, ref_url), indices)
+
+    async def get_option_chain(self, symbol, expiry, indices=False):
+        symbol = symbol.replace(' ', '%20').replace('&', '%26')
+        ref_url = 'https://www.nseindia.com/option-chain'
+        url = ('https://www.nseindia.com/api/option-chain-v3?type=' + ('Indices' if indices else 'Equity') +
+               '&symbol=' + symbol + '&expiry=' + expiry)
+        data = await self._get_json(url, ref_url)
+        return NseUtils._parse_option_chain(data["records"])
+
+    async def get_live_option_chain(self, symbol: str, expiry_date: str = None, oi_mode: str = "full", indices=False):
+        symbol = symbol.replace(' ', '%20').replace('&', '%26')
+        ref_url = 'https://www.nseindia.com/option-chain'
+        if not indices:
+            url = 'https://www.nseindia.com/api/option-chain-equities?symbol=' + symbol
+        else:
+            url = 'https://www.nseindia.com/api/option-chain-indices?symbol=' + symbol
+        payload = await self._get_json(url, ref_url)
+        return NseUtils._parse_live_option_chain(payload, symbol, expiry_date, oi_mode)
+
+    async def fii_dii_activity(self):
+        return pd.DataFrame(await self._get_json("https://www.nseindia.com/api/fiidiiTradeReact"))
+
+    async def get_gainers_losers(self):
+        ref_url = 'https://www.nseindia.com/market-data/top-gainers-losers'
+        gainers_dict, losers_dict = await asyncio.gather(
+            self._get_json('https://www.nseindia.com/api/live-analysis-variations?index=gainers', ref_url),
+            self._get_json('https://www.nseindia.com/api/live-analysis-variations?index=loosers', ref_url))
+        return NseUtils._parse_gainers_losers(gainers_dict, losers_dict)
+
+    async def _all_indices(self, ref_url):
+        return await self._get_json('https://www.nseindia.com/api/allIndices', ref_url)
+
+    async def get_index_pe_ratio(self):
+        data = await self._all_indices('https://www.nseindia.com/market-data/index-performances')
+        return NseUtils._parse_index_ratio(data, 'pe', 'Profit Earning Ratio')
+
+    async def get_index_pb_ratio(self):
+        data = await self._all_indices('https://www.nseindia.com/market-data/index-performances')
+        return NseUtils._parse_index_ratio(data, 'pb', 'Price Book Ratio')
+
+    async def get_index_div_yield(self):
+        data = await self._all_indices('https://www.nseindia.com/market-data/index-performances')
+        return NseUtils._parse_index_ratio(data, 'dy', 'Div Yield')
+
+    async def get_advance_decline(self):
+        data = await self._all_indices('https://www.nseindia.com/market-data/live-market-indices')
+        return NseUtils._parse_advance_decline(data)
+
+    async def _data_frame(self, url, ref_url, key=None, error="Error fetching data. Check your input"):
+        """Fetch a payload whose rows sit under data (or key.data) and return them as a data frame, or None."""
+        try:
+            data = await self._get_json(url, ref_url)
+            df = pd.DataFrame(data[key]['data'] if key else data['data'])
+        except Exception:
+            print(error)
+            return None
+        return None if df.empty else df
+
+    async def most_active_equity_stocks_by_volume(self):
+        return await self._data_frame('https://www.nseindia.com/api/live-analysis-most-active-securities?index=volume',
+                                      'https://www.nseindia.com/market-data/most-active-equities')
+
+    async def most_active_equity_stocks_by_value(self):
+        return await self._data_frame('https://www.nseindia.com/api/live-analysis-most-active-securities?index=value',
+                                      'https://www.nseindia.com/market-data/most-active-equities')
+
+    async def most_active_index_calls(self):
+        return await self._data_frame('https://www.nseindia.com/api/snapshot-derivatives-equity?index=calls-index-vol',
+                                      'https://www.nseindia.com/market-data/most-active-contracts', 'OPTIDX')
+
+    async def most_active_index_puts(self):
+        return await self._data_frame('https://www.nseindia.com/api/snapshot-derivatives-equity?index=puts-index-vol',
+                                      'https://www.nseindia.com/market-data/most-active-contracts', 'OPTIDX')
+
+    async def most_active_stock_calls(self):
+        return await self._data_frame('https://www.nseindia.com/api/snapshot-derivatives-equity?index=calls-stocks-vol',
+                                      'https://www.nseindia.com/market-data/most-active-contracts', 'OPTSTK')
+
+    async def most_active_stock_puts(self):
+        return await self._data_frame('https://www.nseindia.com/api/snapshot-derivatives-equity?index=puts-stocks-vol',
+                                      'https://www.nseindia.com/market-data/most-active-contracts', 'OPTSTK')
+
+    async def most_active_contracts_by_oi(self):
+        return await self._data_frame('https://www.nseindia.com/api/snapshot-derivatives-equity?index=oi',
+                                      'https://www.nseindia.com/market-data/most-active-contracts', 'volume')
+
+    async def most_active_contracts_by_volume(self):
+        return await self._data_frame('https://www.nseindia.com/api/snapshot-derivatives-equity?index=contracts',
+                                      'https://www.nseindia.com/market-data/most-active-contracts', 'volume')
+
+    async def most_active_futures_contracts_by_volume(self):
+        return await self._data_frame('https://www.nseindia.com/api/snapshot-derivatives-equity?index=futures',
+                                      'https://www.nseindia.com/market-data/most-active-contracts', 'volume')
+
+    async def most_active_options_contracts_by_volume(self):
+        return await self._data_frame('https://www.nseindia.com/api/snapshot-derivatives-equity?index=options&limit=20',
+                                      'https://www.nseindia.com/market-data/most-active-contracts', 'volume')
+
+    async def get_etf_list(self):
+        return await self._data_frame('https://www.nseindia.com/api/etf',
+                                      'https://www.nseindia.com/market-data/exchange-traded-funds-etf',
+                                      error="Error fetching ETF list. Check your input")
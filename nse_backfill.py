@@ -0,0 +1,217 @@
+"""
+Resumable bulk bhavcopy backfill.
+
+A BackfillJob walks every (report, date) of a range and records the outcome of each
+in a JSON checkpoint as it goes:
+
+- done: the bhavcopy was fetched and handed to the consumer
+- holiday: not a trading session, or NSE answered 404 (no file published) for it
+- failed: the fetch (or the consumer) raised, including throttled (403/429) and server errors;
+  retried with backoff, then on the next run
+
+Interrupting a job (Ctrl+C, crash) keeps the checkpoint, so running the same job again
+only requests what is still missing. With a BhavCopyCache, days already done are replayed
+from disk for consumers that need their data again. gap_report() lists whatever could not
+be fetched.
+"""
+
+import json
+import os
+import random
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from NseUtility import ArchiveError, NseUtils
+from nse_cache import IST, BhavCopyCache, as_date, unique_tmp_path
+
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.expanduser('~'), '.nse_data_downloader', 'backfill')
+
+DONE = 'done'
+HOLIDAY = 'holiday'
+FAILED = 'failed'
+
+
+class BackfillJob:
+    """
+    Checkpointed fetch of one or more bhavcopy reports over a date range.
+    """
+
+    def __init__(self, reports, from_date, to_date, nse=None, checkpoint_path: str = None, max_workers: int = 4,
+                 max_retries: int = 3, retry_delay: float = 5.0, max_retry_delay: float = 120.0):
+        """
+        :param reports: Report type or list of report types eg: 'sec_bhavdata_full'
+        :param from_date: Start date (inclusive), date/datetime or 'dd-mm-YYYY'
+        :param to_date: End date (inclusive), date/datetime or 'dd-mm-YYYY'
+        :param nse: NseUtils instance used for fetching. Give it a BhavCopyCache/BhavCopyStore to keep the data
+        :param checkpoint_path: JSON checkpoint file. Defaults to one per reports and range under
+        ~/.nse_data_downloader/backfill, so rerunning the same job resumes it
+        :param max_workers: Number of days fetched concurrently
+        :param max_retries: Retry rounds for failed dates within one run
+        :param retry_delay: Pause before the first retry round; doubles each round, with jitter
+        :param max_retry_delay: Longest pause between retry rounds
+        """
+        self.reports = [reports] if isinstance(reports, str) else list(reports)
+        self.from_date = as_date(from_date)
+        self.to_date = as_date(to_date)
+        self.nse = nse or NseUtils(cache=BhavCopyCache())
+        if checkpoint_path is None:
+            name = f"{'+'.join(self.reports)}_{self.from_date:%Y%m%d}_{self.to_date:%Y%m%d}.json"
+            checkpoint_path = os.path.join(DEFAULT_CHECKPOINT_DIR, name)
+        self.checkpoint_path = checkpoint_path
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.entries = {}  # 'report:YYYY-MM-DD' -> {'status', 'attempts', 'error'}
+        self._load()
+
+    @staticmethod
+    def _key(report: str, day: date) -> str:
+        return f"{report}:{day.strftime('%Y-%m-%d')}"
+
+    def _load(self):
+        try:
+            with open(self.checkpoint_path, 'r') as fh:
+                self.entries = json.load(fh).get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write the checkpoint atomically."""
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = unique_tmp_path(self.checkpoint_path)
+        with open(tmp_path, 'w') as fh:
+            json.dump({
+                'reports': self.reports,
+                'from_date': self.from_date.strftime('%Y-%m-%d'),
+                'to_date': self.to_date.strftime('%Y-%m-%d'),
+                'updated': datetime.now().isoformat(timespec='seconds'),
+                'entries': self.entries,
+            }, fh, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def status(self, report: str, day) -> str:
+        """Recorded status of a report for a date, or None if it was never attempted."""
+        entry = self.entries.get(self._key(report, as_date(day)))
+        return entry['status'] if entry else None
+
+    def _record(self, report: str, day: date, status: str, error=None):
+        entry = self.entries.setdefault(self._key(report, day), {'status': None, 'attempts': 0, 'error': None})
+        if status != HOLIDAY or error is not None:
+            entry['attempts'] += 1
+        entry['status'] = status
+        entry['error'] = None if error is None else str(error)[:200]
+
+    def _mark_holidays(self):
+        """Record every non-trading day of the range as a holiday without requesting it."""
+        sessions = {day.date() for day in self.nse.calendar.trading_days(self.from_date, self.to_date)}
+        for day in pd.date_range(self.from_date, self.to_date).date:
+            if day in sessions:
+                continue
+            for report in self.reports:
+                if self.status(report, day) is None:
+                    self._record(report, day, HOLIDAY)
+        return sorted(sessions)
+
+    def run(self, on_day=None, replay_done: bool = False, save_every: int = 20):
+        """
+        Fetch every date not yet done, then retry failures in rounds with backoff. The checkpoint is saved
+        as the job goes and on exit, including Ctrl+C.
+        :param on_day: Optional callable(report, trade_date, bhav_df) run for each fetched day. If it raises,
+        the day is recorded as failed and retried
+        :param replay_done: Also pass days already done in earlier runs to on_day (served from the cache)
+        :param save_every: Save the checkpoint after this many processed days
+        :return: dict of status -> count over the whole job
+        """
+        try:
+            sessions = self._mark_holidays()
+            for report in self.reports:
+                wanted = {DONE, FAILED, None} if replay_done else {FAILED, None}
+                self._fetch(report, [day for day in sessions if self.status(report, day) in wanted],
+                            on_day, save_every)
+
+            for attempt in range(1, self.max_retries + 1):
+                failed = {report: [day for day in sessions if self.status(report, day) == FAILED]
+                          for report in self.reports}
+                if not any(failed.values()):
+                    break
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                print(f"   ↻ Retrying {sum(map(len, failed.values()))} failed day(s) in {delay:.0f}s "
+                      f"(round {attempt}/{self.max_retries})")
+                time.sleep(delay)
+                for report, days in failed.items():
+                    self._fetch(report, days, on_day, save_every)
+        finally:
+            self.save()
+        return self.summary()
+
+    def _fetch(self, report: str, days, on_day, save_every: int):
+        dates = [datetime.combine(day, datetime.min.time()) for day in days]
+        today = datetime.now(IST).date()  # As the cache judges closed days
+        for processed, (trade_date, bhav_df, error) in enumerate(
+                self.nse.iter_bhav_copy_dates(report, dates, self.max_workers), start=1):
+            day = trade_date.date()
+            if error is None and (bhav_df is None or bhav_df.empty):
+                error = ValueError(f"Empty report for {day}")
+            if error is None and on_day is not None:
+                try:
+                    on_day(report, trade_date, bhav_df)
+                except Exception as e:
+                    error = e
+            if error is None:
+                self._record(report, day, DONE)
+            elif isinstance(error, ArchiveError) and error.not_published and day < today:
+                # NSE answered 404 for a closed day: an unlisted holiday. Throttling and outages stay FAILED
+                self._record(report, day, HOLIDAY, 'not published by NSE')
+            else:
+                self._record(report, day, FAILED, error)
+            if processed % save_every == 0:
+                self.save()
+
+    def summary(self) -> dict:
+        """Count of dates per status over the whole job."""
+        counts = {DONE: 0, HOLIDAY: 0, FAILED: 0}
+        for report in self.reports:
+            for day in pd.date_range(self.from_date, self.to_date).date:
+                status = self.status(report, day)
+                counts[status or 'pending'] = counts.get(status or 'pending', 0) + 1
+        return counts
+
+    def gap_report(self) -> pd.DataFrame:
+        """
+        Dates that hold no data although NSE could have traded: failures, days not yet attempted and
+        weekdays NSE published nothing for
+        :return: pandas data frame with columns Report, Date, Status, Attempts, Error
+        """
+        rows = []
+        sessions = {day.date() for day in self.nse.calendar.trading_days(self.from_date, self.to_date)}
+        for report in self.reports:
+            for day in pd.date_range(self.from_date, self.to_date).date:
+                entry = self.entries.get(self._key(report, day))
+                if entry is None:
+                    if day in sessions:
+                        rows.append([report, day, 'pending', 0, None])
+                elif entry['status'] == FAILED or (entry['status'] == HOLIDAY and entry['error']):
+                    rows.append([report, day, entry['status'], entry['attempts'], entry['error']])
+        return pd.DataFrame(rows, columns=['Report', 'Date', 'Status', 'Attempts', 'Error'])
+
+    def print_gap_report(self, limit: int = 20):
+        """Print the job summary and the first `limit` gaps."""
+        counts = self.summary()
+        print(f"   Done: {counts[DONE]} | Holidays/Weekends: {counts[HOLIDAY]} | Failed: {counts[FAILED]}"
+              + (f" | Pending: {counts['pending']}" if counts.get('pending') else ''))
+        gaps = self.gap_report()
+        if gaps.empty:
+            print("   No gaps.")
+            return
+        print(f"   {len(gaps)} gap(s):")
+        for row in gaps.head(limit).itertuples(index=False):
+            detail = f" - {row.Error}" if row.Error else ''
+            print(f"     {row.Report} {row.Date.strftime('%d-%m-%Y')}: {row.Status}{detail}")
+        if len(gaps) > limit:
+            print(f"     ... and {len(gaps) - limit} more")
+        if (gaps['Status'] != HOLIDAY).any():
+            print(f"   Run the same command again to resume (checkpoint: {self.checkpoint_path})")
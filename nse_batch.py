@@ -0,0 +1,225 @@
+"""
+Headless batch downloads driven by a job file.
+
+A job file (JSON, or YAML with PyYAML installed) lists any number of jobs; each names stocks,
+indices and/or the constituents of an index, a date range and one or more timeframes:
+
+    {
+      "defaults": {"from": "01-01-2020", "output_dir": "out"},
+      "jobs": [
+        {"symbols": ["RELIANCE", "TCS"], "timeframes": ["1d", "1w"], "adjust": true},
+        {"indices": ["NIFTY 50", "Nifty Bank"], "from": "01-01-2010", "timeframes": ["1m"]},
+        {"constituents": "NIFTY 50", "timeframe": "1w", "long": true, "name": "NIFTY50_STOCKS"}
+      ]
+    }
+
+Every job key may also be set under "defaults". "to" defaults to today. Before anything is
+downloaded, the jobs are registered with a QueryPlanner (see nse_planner), which fetches each
+(report, trading day) bhavcopy they need together once, so a day shared by 300 outputs is
+downloaded once. Every output file is written in one pass at the end.
+
+    python nse_data_downloader.py --jobs nightly.json
+"""
+
+import json
+import os
+from datetime import date, datetime
+
+import pandas as pd
+
+from NseUtility import ArchiveError, NseUtils, normalize_index_name
+from nse_cache import IST, as_date
+from nse_planner import QueryPlanner
+from nse_resample import OHLCV_COLUMNS, TIMEFRAMES, format_dates, resample_timeframe
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - optional dependency
+    yaml = None
+
+
+JOB_KEYS = {'symbols', 'indices', 'constituents', 'from', 'to', 'timeframe', 'timeframes', 'adjust', 'long',
+            'name', 'output_dir'}
+
+
+def load_job_file(path: str) -> dict:
+    """
+    Read a job file
+    :param path: .json, or .yaml/.yml (needs PyYAML)
+    :return: dict with 'jobs' and optional 'defaults'
+    """
+    with open(path, 'r') as fh:
+        if path.lower().endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError("YAML job files require PyYAML. Install with: uv pip install pyyaml")
+            spec = yaml.safe_load(fh)
+        else:
+            spec = json.load(fh)
+    if not isinstance(spec, dict) or not isinstance(spec.get('jobs'), list):
+        raise ValueError(f"{path}: expected a mapping with a 'jobs' list")
+    return spec
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+class BatchOutput:
+    """
+    One job at one timeframe: the planned queries it is built from, its range and how it is written.
+    """
+
+    def __init__(self, queries, from_date: date, to_date: date, timeframe: str = '1d', long: bool = False,
+                 name: str = None, output_dir: str = '.'):
+        """
+        :param queries: list of nse_planner.PlannedQuery, stocks and/or indices, whose results are combined
+        :param from_date: Start date (inclusive)
+        :param to_date: End date (inclusive)
+        :param timeframe: '1d' or a code from nse_resample.TIMEFRAMES
+        :param long: Write one long-format CSV instead of one file per symbol
+        :param name: File name prefix of the long-format CSV (default: MULTI)
+        :param output_dir: Directory the files are written to
+        """
+        self.queries = queries
+        self.from_date = from_date
+        self.to_date = to_date
+        self.timeframe = timeframe
+        self.long = long
+        self.name = name
+        self.output_dir = output_dir
+
+    @property
+    def symbols(self) -> list:
+        """Every symbol of the output, constituents included once the planner has run."""
+        return [symbol for query in self.queries for symbol in query.params['symbols']]
+
+    @property
+    def date_span(self) -> str:
+        return f"{self.from_date.strftime('%Y%m%d')}_to_{self.to_date.strftime('%Y%m%d')}"
+
+
+def expand_jobs(spec: dict, planner: QueryPlanner):
+    """
+    Turn a job file into outputs, registering the data each needs with the planner. Jobs asking for the same
+    symbols, range and adjustment share one query
+    :param spec: dict as returned by load_job_file
+    :param planner: QueryPlanner the queries are registered with
+    :return: list of BatchOutput
+    :raise ValueError if a job is incomplete or names an unknown timeframe
+    """
+    defaults = spec.get('defaults') or {}
+    outputs = []
+    for number, job in enumerate(spec['jobs'], start=1):
+        job = {**defaults, **job}
+        unknown = set(job) - JOB_KEYS
+        if unknown:
+            raise ValueError(f"Job {number}: unknown key(s) {', '.join(sorted(unknown))}")
+        if not job.get('from'):
+            raise ValueError(f"Job {number}: 'from' (DD-MM-YYYY) is required")
+        from_date = as_date(job['from'])
+        to_date = as_date(job['to']) if job.get('to') else date.today()
+        if to_date < from_date:
+            raise ValueError(f"Job {number}: 'to' is before 'from'")
+
+        stocks = _as_list(job.get('symbols'))
+        constituents = _as_list(job.get('constituents'))
+        indices = [normalize_index_name(name.strip()) for name in _as_list(job.get('indices'))]
+        if not (stocks or constituents or indices):
+            raise ValueError(f"Job {number}: no symbols, indices or constituents")
+        queries = []
+        if stocks or constituents:
+            queries.append(planner.ohlcv(stocks, from_date, to_date, constituents=constituents,
+                                         adjust=bool(job.get('adjust')), date_format=None))
+        if indices:
+            queries.append(planner.ohlcv(indices, from_date, to_date, indices=True, date_format=None))
+
+        timeframes = _as_list(job.get('timeframes')) or _as_list(job.get('timeframe')) or ['1d']
+        for timeframe in timeframes:
+            if timeframe != '1d' and timeframe not in TIMEFRAMES:
+                raise ValueError(f"Job {number}: unknown timeframe {timeframe}. Use 1d or one of {list(TIMEFRAMES)}")
+            outputs.append(BatchOutput(queries, from_date, to_date, timeframe, bool(job.get('long')),
+                                       job.get('name'), job.get('output_dir') or '.'))
+    return outputs
+
+
+def _write_csv_atomic(df: pd.DataFrame, path: str):
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def write_outputs(outputs):
+    """
+    Resample and write every output from the results of its planned queries
+    :return: (files written, list of (output, missing symbols))
+    """
+    written, missing = 0, []
+    daily_frames = {}  # Combined daily frames, shared by the timeframes of one job
+    for output in outputs:
+        key = tuple(id(query) for query in output.queries)
+        if key not in daily_frames:
+            frames = [query.get() for query in output.queries]
+            frames = [frame for frame in frames if not frame.empty]
+            daily_frames[key] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=OHLCV_COLUMNS)
+        df = daily_frames[key]
+
+        found = set(df['Symbol'].str.strip().str.upper()) if not df.empty else set()
+        absent = [symbol for symbol in output.symbols if symbol.upper() not in found]
+        if absent:
+            missing.append((output, absent))
+        if df.empty:
+            continue
+
+        if output.timeframe in TIMEFRAMES:
+            df = resample_timeframe(df, output.timeframe)
+        else:
+            df = df.assign(Date=format_dates(df['Date']))
+
+        os.makedirs(output.output_dir, exist_ok=True)
+        if output.long:
+            filename = f"{output.name or 'MULTI'}_{output.timeframe}_{output.date_span}.csv"
+            _write_csv_atomic(df, os.path.join(output.output_dir, filename))
+            written += 1
+        else:
+            for symbol, frame in df.groupby('Symbol', sort=False):
+                safe_symbol = symbol.replace(' ', '_').replace('/', '_')
+                filename = f"{safe_symbol}_{output.timeframe}_{output.date_span}.csv"
+                _write_csv_atomic(frame, os.path.join(output.output_dir, filename))
+                written += 1
+    return written, missing
+
+
+def run_batch(spec: dict, nse: NseUtils = None, max_workers: int = 4) -> dict:
+    """
+    Plan, download and write every job of a job file
+    :param spec: dict as returned by load_job_file
+    :param nse: NseUtils to download with (default: one with a BhavCopyCache)
+    :param max_workers: Number of days fetched concurrently
+    :return: dict with counts of outputs, downloads, files written and failed days
+    """
+    planner = QueryPlanner(nse, max_workers)
+    outputs = expand_jobs(spec, planner)
+    order = planner.plan()
+    stats = planner.stats
+    print(f"📋 {len(outputs)} output(s) from {len(spec['jobs'])} job(s): {stats['fetches']} bhavcopy fetch(es) "
+          f"({stats['cached']} cached, {stats['indexed']} day(s) from the index) instead of {stats['requested']}")
+    if len(order) > stats['cached']:
+        print(f"   {len(order) - stats['cached']} day(s) to download")
+
+    planner.run()
+    today = datetime.now(IST).date()
+    # Closed days NSE answered 404 for are holidays missing from the calendar; throttled or failed days are not
+    failures = [(report, day, error) for report, day, error in planner.failures
+                if not (isinstance(error, ArchiveError) and error.not_published and day.date() < today)]
+    for report, trade_date, error in failures[:5]:
+        print(f"   ⚠️ {report} {trade_date.strftime('%d-%m-%Y')}: {str(error)[:60]}")
+
+    written, missing = write_outputs(outputs)
+    for output, symbols in missing:
+        print(f"   ⚠️ No data for {', '.join(symbols)} between {output.from_date.strftime('%d-%m-%Y')} and "
+              f"{output.to_date.strftime('%d-%m-%Y')}")
+    print(f"✅ {written} file(s) written" + (f", but {len(failures)} day(s) failed and are missing from them; "
+                                            f"run again to retry" if failures else ''))
+    return {'outputs': len(outputs), 'downloads': stats['fetches'], 'files': written, 'failed': len(failures)}
@@ -0,0 +1,280 @@
+"""
+Local on-disk cache for NSE bhavcopy archive files.
+
+Raw report files are stored content-addressed (by SHA-256 of the bytes) and one
+small entry file per (report type, trade date) names the stored blob. Entries are
+written atomically on their own, so the CLI, backfill and web app processes can
+share a cache directory without rewriting each other's entries. Blob modification
+time is used as the last-access stamp so the cache can be trimmed to a size budget
+with least-recently-used eviction.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from urllib.parse import quote
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.nse_data_downloader', 'bhavcopy')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class BhavCopyCache:
+    """
+    Content-addressed cache of bhavcopy files keyed by report type and trade date.
+
+    Only closed trading days (dates before today in IST) are cached, as the current
+    day's report may not be published yet or may still be revised. With
+    same_day_after, the current day is cached too once NSE has published it.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 same_day_after: dt_time = None):
+        """
+        :param cache_dir: Directory that holds the blobs and their entries
+        :param max_bytes: Size budget; least recently used blobs are evicted above this
+        :param same_day_after: Optional IST time of day after which the current day's reports are final
+        and cached as well eg: time(18, 30)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.same_day_after = same_day_after
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.entry_dir = os.path.join(cache_dir, 'entries')
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._total_bytes = self.size()
+
+    def _entry_path(self, report: str, trade_date) -> str:
+        return os.path.join(self.entry_dir, quote(report, safe=' '), as_date(trade_date).strftime('%Y%m%d'))
+
+    def _read_entry(self, report: str, trade_date):
+        try:
+            with open(self._entry_path(report, trade_date), 'r') as fh:
+                return fh.read().strip() or None
+        except OSError:
+            return None
+
+    def _write_entry(self, report: str, trade_date, digest: str):
+        path = self._entry_path(report, trade_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = unique_tmp_path(path)
+        with open(tmp_path, 'w') as fh:
+            fh.write(digest)
+        os.replace(tmp_path, path)
+
+    def _drop_entry(self, report: str, trade_date):
+        try:
+            os.remove(self._entry_path(report, trade_date))
+        except OSError:
+            pass
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def is_cacheable(self, trade_date) -> bool:
+        """Return True if the trade date is a closed day whose report will not change. Days are judged in IST."""
+        day = as_date(trade_date)
+        now = datetime.now(IST)
+        if day < now.date():
+            return True
+        if self.same_day_after is None:
+            return False
+        return day == now.date() and now.time() >= self.same_day_after
+
+    def get(self, report: str, trade_date):
+        """
+        Return the cached file content for the report and trade date, or None on a miss
+        :param report: Report type eg: 'sec_bhavdata_full', 'ind_close_all'
+        :param trade_date: datetime/date or 'dd-mm-YYYY' string
+        :return: bytes or None
+        """
+        with self._lock:
+            digest = self._read_entry(report, trade_date)
+            if digest is None:
+                return None
+            path = self._blob_path(digest)
+            try:
+                with open(path, 'rb') as fh:
+                    content = fh.read()
+                os.utime(path)  # Mark as recently used
+            except OSError:
+                # Blob was evicted - drop the stale entry
+                self._drop_entry(report, trade_date)
+                return None
+        return content
+
+    def put(self, report: str, trade_date, content: bytes):
+        """
+        Store file content for the report and trade date. Open trading days are ignored.
+        :param report: Report type eg: 'sec_bhavdata_full', 'ind_close_all'
+        :param trade_date: datetime/date or 'dd-mm-YYYY' string
+        :param content: Raw file bytes as downloaded from NSE
+        """
+        if not content or not self.is_cacheable(trade_date):
+            return
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = unique_tmp_path(path)
+                with open(tmp_path, 'wb') as fh:
+                    fh.write(content)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(content)
+            else:
+                os.utime(path)
+            self._write_entry(report, trade_date, digest)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def discard(self, report: str, trade_date):
+        """
+        Drop the cached file for the report and trade date, eg: when it no longer parses. Its blob is removed too,
+        so the next put stores the content afresh; other entries naming it are dropped when next read
+        :param report: Report type eg: 'sec_bhavdata_full', 'ind_close_all'
+        :param trade_date: datetime/date or 'dd-mm-YYYY' string
+        """
+        with self._lock:
+            digest = self._read_entry(report, trade_date)
+            self._drop_entry(report, trade_date)
+            if digest is None:
+                return
+            path = self._blob_path(digest)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    def open(self, report: str, trade_date):
+        """
+        Open the cached file for the report and trade date for reading without loading it, or None on a miss.
+        The file is opened under the cache lock, so it stays readable even if it is evicted afterwards
+        :param report: Report type eg: 'fo_bhavcopy'
+        :param trade_date: datetime/date or 'dd-mm-YYYY' string
+        :return: binary file object, which the caller closes, or None
+        """
+        with self._lock:
+            digest = self._read_entry(report, trade_date)
+            if digest is None:
+                return None
+            path = self._blob_path(digest)
+            try:
+                fh = open(path, 'rb')
+                os.utime(path)  # Mark as recently used
+            except OSError:
+                self._drop_entry(report, trade_date)
+                return None
+        return fh
+
+    def path(self, report: str, trade_date):
+        """
+        Return the path of the cached file for the report and trade date without reading it, or None on a miss.
+        The file must be treated as read-only, and may be evicted at any time: read it through open().
+        :param report: Report type eg: 'sec_bhavdata_full', 'ind_close_all'
+        :param trade_date: datetime/date or 'dd-mm-YYYY' string
+        :return: str or None
+        """
+        with self._lock:
+            digest = self._read_entry(report, trade_date)
+            if digest is None:
+                return None
+            path = self._blob_path(digest)
+            try:
+                os.utime(path)  # Mark as recently used
+            except OSError:
+                self._drop_entry(report, trade_date)
+                return None
+        return path
+
+    def put_file(self, report: str, trade_date, src_path: str):
+        """
+        Store a downloaded file for the report and trade date without loading it into memory.
+        Open trading days are ignored; the source file is left in place.
+        :param report: Report type eg: 'fo_bhavcopy'
+        :param trade_date: datetime/date or 'dd-mm-YYYY' string
+        :param src_path: Path of the file as downloaded from NSE
+        """
+        if not self.is_cacheable(trade_date):
+            return
+        sha = hashlib.sha256()
+        size = 0
+        with open(src_path, 'rb') as fh:
+            for block in iter(lambda: fh.read(1024 * 1024), b''):
+                sha.update(block)
+                size += len(block)
+        if not size:
+            return
+        digest = sha.hexdigest()
+        path = self._blob_path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = unique_tmp_path(path)
+                shutil.copyfile(src_path, tmp_path)
+                os.replace(tmp_path, path)
+                self._total_bytes += size
+            else:
+                os.utime(path)
+            self._write_entry(report, trade_date, digest)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def size(self) -> int:
+        """Total size in bytes of all cached blobs."""
+        return sum(size for _, size, _ in self._blobs())
+
+    def clear(self):
+        """Remove every cached blob and entry."""
+        with self._lock:
+            for path, _, _ in self._blobs():
+                os.remove(path)
+            shutil.rmtree(self.entry_dir, ignore_errors=True)
+            self._total_bytes = 0
+
+    def _blobs(self):
+        for root, _, files in os.walk(self.blob_dir):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """
+        Drop least recently used blobs until the cache fits the size budget. Caller holds the lock.
+        Entries naming an evicted blob are dropped when next read
+        """
+        blobs = sorted(self._blobs(), key=lambda blob: blob[2])
+        total = sum(size for _, size, _ in blobs)
+        for path, size, _ in blobs:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Held open by a reader on Windows; evicted on a later pass
+            total -= size
+        self._total_bytes = total
+
+
+def as_date(trade_date) -> date:
+    """Coerce a datetime, date or 'dd-mm-YYYY' string to a date."""
+    if isinstance(trade_date, datetime):
+        return trade_date.date()
+    if isinstance(trade_date, date):
+        return trade_date
+    return datetime.strptime(trade_date, "%d-%m-%Y").date()
+
+
+def unique_tmp_path(path: str) -> str:
+    """Temp file name for an atomic write of path, unique to this process and thread, as processes share directories."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
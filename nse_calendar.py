@@ -0,0 +1,168 @@
+"""
+NSE trading calendar built on NseUtils.trading_holidays.
+
+Holidays are persisted locally and refreshed from NSE once per calendar year, so
+download loops can generate only the expected trading sessions instead of
+requesting every calendar day and treating weekends/holidays as failures. The
+clearing holidays behind is_nse_clearing_holiday are kept in the same file.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from nse_cache import as_date
+
+
+DEFAULT_CALENDAR_PATH = os.path.join(os.path.expanduser('~'), '.nse_data_downloader', 'trading_calendar.json')
+
+
+class TradingCalendar:
+    """
+    Weekday calendar minus NSE trading holidays.
+
+    NSE publishes the holiday list for the current year only. Each yearly refresh is merged
+    into the persisted file, so the calendar grows more complete the longer it is used; years
+    with no holiday data fall back to plain weekdays. Special weekend sessions (eg: Muhurat
+    trading) are not modelled.
+    """
+
+    def __init__(self, nse=None, path: str = DEFAULT_CALENDAR_PATH):
+        """
+        :param nse: NseUtils instance used to fetch the holiday list. Without it, only the persisted
+        holidays are used
+        :param path: JSON file the holidays are persisted to
+        """
+        self.nse = nse
+        self.path = path
+        self.fetched_year = None
+        self._holidays = set()
+        self._clearing = {'fetched_year': None, 'holidays': frozenset()}
+        self._lock = threading.Lock()
+        self._update_holiday_array()
+        self._load()
+        if self.nse is not None and self.fetched_year != date.today().year:
+            self.refresh()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return
+        self.fetched_year = data.get('fetched_year')
+        self._holidays = {datetime.strptime(day, '%Y-%m-%d').date() for day in data.get('holidays', [])}
+        clearing = data.get('clearing', {})
+        self._clearing = {'fetched_year': clearing.get('fetched_year'),
+                          'holidays': frozenset(datetime.strptime(day, '%Y-%m-%d').date()
+                                                for day in clearing.get('holidays', []))}
+        self._update_holiday_array()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as fh:
+            json.dump({
+                'fetched_year': self.fetched_year,
+                'holidays': sorted(day.strftime('%Y-%m-%d') for day in self._holidays),
+                'clearing': {'fetched_year': self._clearing['fetched_year'],
+                             'holidays': sorted(day.strftime('%Y-%m-%d') for day in self._clearing['holidays'])},
+            }, fh, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _update_holiday_array(self):
+        self._holiday_array = np.array(sorted(self._holidays), dtype='datetime64[D]')
+        self._holiday_set = frozenset(self._holidays)
+
+    def refresh(self):
+        """Fetch the current year's trading holidays from NSE and merge them into the calendar."""
+        try:
+            holiday_list = self.nse.trading_holidays(list_only=True)
+        except Exception as e:
+            print(f"Warning: could not refresh NSE trading holidays: {e}")
+            return
+        with self._lock:
+            self._holidays.update(datetime.strptime(day, '%d-%b-%Y').date() for day in holiday_list)
+            self.fetched_year = date.today().year
+            self._update_holiday_array()
+            self._save()
+
+    def holiday_set(self, kind: str = 'trading') -> frozenset:
+        """
+        Known NSE holidays of a kind as a frozenset of dates. Clearing holidays are fetched on first use and
+        then once per calendar year, like the trading holidays
+        :param kind: 'trading' or 'clearing'
+        """
+        if kind == 'trading':
+            return self._holiday_set
+        if kind != 'clearing':
+            raise ValueError(f"Unknown holiday kind: {kind}. Use 'trading' or 'clearing'")
+        with self._lock:
+            # Under the lock, so concurrent callers fetch the list once
+            if self.nse is not None and self._clearing['fetched_year'] != date.today().year:
+                holiday_list = self.nse.clearing_holidays(list_only=True)
+                self._clearing = {'fetched_year': date.today().year,
+                                  'holidays': self._clearing['holidays'] | frozenset(
+                                      datetime.strptime(day, '%d-%b-%Y').date() for day in holiday_list)}
+                self._save()
+            return self._clearing['holidays']
+
+    @property
+    def holidays(self):
+        """Known trading holidays as a sorted list of dates."""
+        return sorted(self._holidays)
+
+    def is_trading_day(self, day):
+        """
+        Check whether NSE is expected to trade on a date
+        :param day: date/datetime/'dd-mm-YYYY' string, or an array-like of dates
+        :return: bool, or a numpy boolean array for array-like input
+        """
+        if _is_scalar(day):
+            return bool(np.is_busday(np.datetime64(as_date(day), 'D'), holidays=self._holiday_array))
+        return np.is_busday(_to_day_array(day), holidays=self._holiday_array)
+
+    def trading_days(self, from_date, to_date):
+        """
+        All expected trading sessions in a date range
+        :param from_date: Start date (inclusive), date/datetime or 'dd-mm-YYYY'
+        :param to_date: End date (inclusive), date/datetime or 'dd-mm-YYYY'
+        :return: pandas DatetimeIndex
+        """
+        days = np.arange(np.datetime64(as_date(from_date), 'D'), np.datetime64(as_date(to_date), 'D') + 1)
+        return pd.DatetimeIndex(days[np.is_busday(days, holidays=self._holiday_array)].astype('datetime64[ns]'))
+
+    def next_trading_day(self, day):
+        """
+        The first trading session strictly after a date
+        :param day: date/datetime/'dd-mm-YYYY' string, or an array-like of dates
+        :return: date, or a numpy datetime64 array for array-like input
+        """
+        return self._offset(day, 1, 'backward')
+
+    def prev_trading_day(self, day):
+        """
+        The last trading session strictly before a date
+        :param day: date/datetime/'dd-mm-YYYY' string, or an array-like of dates
+        :return: date, or a numpy datetime64 array for array-like input
+        """
+        return self._offset(day, -1, 'forward')
+
+    def _offset(self, day, offset, roll):
+        if _is_scalar(day):
+            shifted = np.busday_offset(np.datetime64(as_date(day), 'D'), offset, roll=roll,
+                                       holidays=self._holiday_array)
+            return shifted.astype(date)
+        return np.busday_offset(_to_day_array(day), offset, roll=roll, holidays=self._holiday_array)
+
+
+def _is_scalar(day) -> bool:
+    return isinstance(day, (str, date, datetime))
+
+
+def _to_day_array(days):
+    return pd.to_datetime(pd.Series(days), dayfirst=True).to_numpy().astype('datetime64[D]')
@@ -1,30 +1,35 @@
 """
 Interactive NSE Historical Data Downloader
 Downloads daily/weekly/monthly/quarterly/yearly OHLC data for NSE stocks and indices
+
+Incremental mode (no prompts), for cron jobs that keep existing outputs current:
+    python nse_data_downloader.py --sync RELIANCE_1d.csv TCS_1d.csv
+    python nse_data_downloader.py --sync NIFTY_50_1d.csv --index
+    python nse_data_downloader.py --sync-store sec_bhavdata_full --from 01-01-2024
+
+Multi-symbol mode (each day's bhav copy is downloaded once for all symbols):
+    python nse_data_downloader.py --symbols RELIANCE TCS INFY --from 01-01-2024 --to 31-12-2024
+    python nse_data_downloader.py --constituents "NIFTY 50" --from 01-01-2024 --to 31-12-2024 --timeframe 1w
+
+Resumable bulk backfill into the local cache (rerun the same command to resume and retry failed days):
+    python nse_data_downloader.py --backfill sec_bhavdata_full ind_close_all --from 01-01-2015 --to 31-12-2024
+
+Batch mode: every job of a JSON/YAML job file, sharing each day's download (see nse_batch):
+    python nse_data_downloader.py --jobs nightly.json --workers 8
+    python nse_data_downloader.py --symbols RELIANCE TCS --from 01-01-2024 --timeframe 1d 1w 1m
 """
 
 import NseUtility
+from NseUtility import normalize_index_name
+from nse_backfill import BackfillJob, FAILED, HOLIDAY
+from nse_batch import load_job_file, run_batch
+from nse_resample import TIMEFRAMES, resample_timeframe
+from nse_schema import as_price
+import argparse
+import os
 import pandas as pd
 from datetime import datetime, timedelta
-import time
-
-
-def normalize_index_name(name):
-    """Normalize index name for better matching with NSE index names."""
-    if not name:
-        return name
-
-    replacements = {
-        'nifty': 'NIFTY',
-        'sensex': 'SENSEX',
-        'bankex': 'BANKEX',
-    }
 
-    words = name.split()
-    normalized_words = []
-    for word in words:
-        normalized_words.append(replacements.get(word.lower(), word))
-    return ' '.join(normalized_words)
 
 def get_date_input(prompt):
     """Get date input from user in DD-MM-YYYY format."""
@@ -36,53 +41,41 @@ def get_date_input(prompt):
         except ValueError:
             print("❌ Invalid date format! Please use DD-MM-YYYY (e.g., 01-01-2021)")
 
-def _prepare_ohlcv_for_resample(df):
-    """Clean and normalize OHLCV fields before time aggregation."""
-    clean_df = df.copy()
-    clean_df['Date'] = pd.to_datetime(clean_df['Date'], format='%d-%m-%Y', errors='coerce')
-    for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-        clean_df[col] = pd.to_numeric(clean_df[col], errors='coerce')
-    clean_df = clean_df.dropna(subset=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    clean_df = clean_df.sort_values('Date')
-    return clean_df
-
-def _resample_ohlcv(df, rule):
-    """Resample OHLCV while preserving the symbol column."""
-    clean_df = _prepare_ohlcv_for_resample(df)
-    if clean_df.empty:
-        return pd.DataFrame(columns=['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-
-    symbol_name = clean_df['Symbol'].iloc[0] if 'Symbol' in clean_df.columns else ''
-    clean_df = clean_df.set_index('Date')
-
-    sampled = clean_df.resample(rule).agg({
-        'Open': 'first',
-        'High': 'max',
-        'Low': 'min',
-        'Close': 'last',
-        'Volume': 'sum'
-    })
-
-    sampled = sampled.dropna().reset_index()
-    sampled['Date'] = sampled['Date'].dt.strftime('%d-%m-%Y')
-    sampled.insert(0, 'Symbol', symbol_name)
-    return sampled[['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-
-def resample_to_weekly(df):
-    """Convert daily data to weekly data."""
-    return _resample_ohlcv(df, 'W-FRI')
-
-def resample_to_monthly(df):
-    """Convert daily data to monthly data."""
-    return _resample_ohlcv(df, 'ME')
-
-def resample_to_quarterly(df):
-    """Convert daily data to quarterly data (calendar quarter)."""
-    return _resample_ohlcv(df, 'QE-DEC')
-
-def resample_to_yearly(df):
-    """Convert daily data to yearly data (calendar year)."""
-    return _resample_ohlcv(df, 'YE-DEC')
+def extract_ohlcv_row(bhav_data, instrument_type, symbol, date_str):
+    """Pick one symbol's OHLCV row out of a day's bhav copy, or None if it is not listed."""
+    if bhav_data is None or bhav_data.empty:
+        return None
+
+    if instrument_type == 'Index':
+        index_data = bhav_data[bhav_data['Index Name'] == symbol]
+        if index_data.empty:
+            index_data = bhav_data[bhav_data['Index Name'].str.contains(symbol, case=False, na=False)]
+        if index_data.empty:
+            return None
+        row = index_data.iloc[0]
+        return {
+            'Symbol': row['Index Name'],
+            'Date': date_str,
+            'Open': as_price(row['Open Index Value']),
+            'High': as_price(row['High Index Value']),
+            'Low': as_price(row['Low Index Value']),
+            'Close': as_price(row['Closing Index Value']),
+            'Volume': row['Volume']
+        }
+
+    stock_data = bhav_data[bhav_data['SYMBOL'] == symbol]
+    if stock_data.empty:
+        return None
+    row = stock_data.iloc[0]
+    return {
+        'Symbol': row['SYMBOL'],
+        'Date': date_str,
+        'Open': as_price(row['OPEN_PRICE']),
+        'High': as_price(row['HIGH_PRICE']),
+        'Low': as_price(row['LOW_PRICE']),
+        'Close': as_price(row['CLOSE_PRICE']),
+        'Volume': row['TTL_TRD_QNTY']
+    }
 
 def main():
     print("=" * 100)
@@ -124,13 +117,18 @@ def main():
     print("3. Monthly (1m)")
     print("4. Quarterly (1q)")
     print("5. Yearly (1y)")
+    print("6. Fiscal Yearly, Apr-Mar (1fy)")
     
     while True:
-        choice = input("Enter choice (1/2/3/4/5): ").strip()
-        if choice in ['1', '2', '3', '4', '5']:
-            timeframe = {'1': '1d', '2': '1w', '3': '1m', '4': '1q', '5': '1y'}[choice]
+        choice = input("Enter choice (1/2/3/4/5/6): ").strip()
+        if choice in ['1', '2', '3', '4', '5', '6']:
+            timeframe = {'1': '1d', '2': '1w', '3': '1m', '4': '1q', '5': '1y', '6': '1fy'}[choice]
             break
-        print("❌ Invalid choice! Please enter 1, 2, 3, 4, or 5")
+        print("❌ Invalid choice! Please enter 1, 2, 3, 4, 5, or 6")
+    
+    adjust = False
+    if instrument_type != 'Index':
+        adjust = input("\nAdjust prices for splits and bonuses? (y/n): ").strip().lower() == 'y'
     
     print("\n" + "=" * 100)
     print("DOWNLOAD SETTINGS")
@@ -140,6 +138,8 @@ def main():
     print(f"  From Date:    {from_date_str}")
     print(f"  To Date:      {to_date_str}")
     print(f"  Timeframe:    {timeframe}")
+    if adjust:
+        print("  Adjusted:     splits and bonuses")
     print("=" * 100)
     
     confirm = input("\nProceed with download? (y/n): ").strip().lower()
@@ -149,99 +149,39 @@ def main():
     
     # Initialize NSE
     print("\n🔄 Initializing NSE connection...")
-    nse = NseUtility.NseUtils()
+    nse = NseUtility.NseUtils(cache=NseUtility.BhavCopyCache())
     
     # Download data day by day
     print(f"📥 Downloading data from {from_date_str} to {to_date_str}...")
     print("   This may take a few minutes...\n")
     
     all_data = []
-    successful_downloads = 0
-    holidays_skipped = 0
-    failed_downloads = 0
-    
-    current_date = from_date_obj
+    report = 'ind_close_all' if instrument_type == 'Index' else 'sec_bhavdata_full'
+
+    # Progress is checkpointed per day: an interrupted download resumes where it stopped, with days
+    # already fetched replayed from the local cache and failed days retried with backoff
+    job = BackfillJob(report, from_date_obj, to_date_obj, nse=nse)
     total_days = (to_date_obj - from_date_obj).days
-    day_counter = 0
-    
-    while current_date <= to_date_obj:
-        day_counter += 1
-        date_str = current_date.strftime('%d-%m-%Y')
-        
-        # Progress indicator
-        if day_counter % 50 == 0:
-            progress = (day_counter / total_days) * 100
-            print(f"   Progress: {progress:.1f}% | Downloaded: {successful_downloads} days")
-        
-        try:
-            if instrument_type == 'Index':
-                bhav_data = nse.bhav_copy_indices(date_str)
-                if bhav_data is not None and not bhav_data.empty:
-                    index_data = bhav_data[bhav_data['Index Name'] == symbol]
-                    if index_data.empty:
-                        index_data = bhav_data[bhav_data['Index Name'].str.contains(symbol, case=False, na=False)]
-
-                    if not index_data.empty:
-                        row = index_data.iloc[0]
-                        all_data.append({
-                            'Symbol': row['Index Name'],
-                            'Date': row['Index Date'],
-                            'Open': row['Open Index Value'],
-                            'High': row['High Index Value'],
-                            'Low': row['Low Index Value'],
-                            'Close': row['Closing Index Value'],
-                            'Volume': row['Volume']
-                        })
-                        successful_downloads += 1
-                    else:
-                        holidays_skipped += 1
-                else:
-                    holidays_skipped += 1
-            else:
-                bhav_data = nse.bhav_copy_with_delivery(date_str)
-                if bhav_data is not None and not bhav_data.empty:
-                    stock_data = bhav_data[bhav_data['SYMBOL'] == symbol]
-                    if not stock_data.empty:
-                        row = stock_data.iloc[0]
-                        all_data.append({
-                            'Symbol': row['SYMBOL'],
-                            'Date': date_str,
-                            'Open': row['OPEN_PRICE'],
-                            'High': row['HIGH_PRICE'],
-                            'Low': row['LOW_PRICE'],
-                            'Close': row['CLOSE_PRICE'],
-                            'Volume': row['TTL_TRD_QNTY']
-                        })
-                        successful_downloads += 1
-                    else:
-                        holidays_skipped += 1
-                else:
-                    holidays_skipped += 1
-
-            if successful_downloads > 0 and successful_downloads % 100 == 0:
-                print(f"   ✓ {successful_downloads} trading days downloaded")
-                
-        except Exception as e:
-            if "No data available" in str(e):
-                holidays_skipped += 1
-            else:
-                failed_downloads += 1
-                if failed_downloads <= 5:
-                    print(f"   ⚠️ Error on {date_str}: {str(e)[:60]}")
-        
-        current_date += timedelta(days=1)
-        
-        # Small delay to avoid overwhelming server
-        if day_counter % 10 == 0:
-            time.sleep(0.2)
-    
+
+    def collect(report, current_date, bhav_data):
+        row = extract_ohlcv_row(bhav_data, instrument_type, symbol, current_date.strftime('%d-%m-%Y'))
+        if row is not None:
+            all_data.append(row)
+            if len(all_data) % 100 == 0:
+                progress = ((current_date - from_date_obj).days / total_days) * 100
+                print(f"   Progress: {progress:.1f}% | ✓ {len(all_data)} trading days downloaded")
+
+    counts = job.run(on_day=collect, replay_done=True)
+
     print("\n" + "=" * 100)
     print("DOWNLOAD COMPLETE")
     print("=" * 100)
-    print(f"  Trading days downloaded:  {successful_downloads}")
-    print(f"  Holidays/Weekends:        {holidays_skipped}")
-    print(f"  Failed downloads:         {failed_downloads}")
-    
+    print(f"  Trading days downloaded:  {len(all_data)}")
+    print(f"  Holidays/Weekends:        {counts[HOLIDAY]}")
+    print(f"  Failed downloads:         {counts[FAILED]}")
+    if counts[FAILED]:
+        job.print_gap_report(limit=5)
+
     if not all_data:
         print("\n❌ No data was downloaded. Please check:")
         print("   - Symbol/Index name is correct")
@@ -249,22 +189,18 @@ def main():
         print("   - NSE website is accessible")
         return
     
-    # Create DataFrame
+    # Create DataFrame (retried days arrive late, so restore date order)
     df = pd.DataFrame(all_data)
+    df = df.iloc[pd.to_datetime(df['Date'], format='%d-%m-%Y').argsort(kind='stable')].reset_index(drop=True)
+    
+    if adjust:
+        print("\n🔧 Adjusting for corporate actions...")
+        df = nse.corporate_actions.adjust(df)
     
     # Apply timeframe resampling if needed
-    if timeframe == '1w':
-        print("\n📊 Resampling to weekly data...")
-        df = resample_to_weekly(df)
-    elif timeframe == '1m':
-        print("\n📊 Resampling to monthly data...")
-        df = resample_to_monthly(df)
-    elif timeframe == '1q':
-        print("\n📊 Resampling to quarterly data...")
-        df = resample_to_quarterly(df)
-    elif timeframe == '1y':
-        print("\n📊 Resampling to yearly data...")
-        df = resample_to_yearly(df)
+    if timeframe in TIMEFRAMES:
+        print(f"\n📊 Resampling to {TIMEFRAMES[timeframe][0]} data...")
+        df = resample_timeframe(df, timeframe)
     
     # Get actual symbol name from data
     actual_symbol = df['Symbol'].iloc[0] if len(df) > 0 else symbol
@@ -294,9 +230,243 @@ def main():
     print("=" * 100)
     print(f"\n📁 File contains {len(df)} records with columns: Symbol, Date, Open, High, Low, Close, Volume")
 
+def _write_csv_atomic(df, path):
+    """Write a CSV next to its target and swap it in, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def sync_files(paths, instrument_type, nse=None):
+    """
+    Bring existing daily CSV outputs up to date by appending only the missing trading sessions.
+    Each missing day's bhav copy is fetched once and shared by every file.
+    """
+    outputs = {}
+    for path in paths:
+        existing = pd.read_csv(path)
+        dates = pd.to_datetime(existing['Date'], format='%d-%m-%Y', errors='coerce')
+        if existing.empty or dates.isna().all():
+            print(f"   ⚠️ Skipping {path}: no dated rows to continue from")
+            continue
+        if len(dates) > 2 and dates.diff().dt.days.median() > 4:
+            print(f"   ⚠️ Skipping {path}: only daily (1d) files can be synced")
+            continue
+        outputs[path] = {
+            'data': existing,
+            'symbol': existing['Symbol'].iloc[-1],
+            'last_date': dates.max(),
+            'new_rows': [],
+        }
+
+    if not outputs:
+        print("❌ Nothing to sync.")
+        return
+
+    start_date = min(output['last_date'] for output in outputs.values()) + timedelta(days=1)
+    end_date = datetime.now()
+    if start_date > end_date:
+        print("✅ All files are already up to date.")
+        return
+
+    nse = nse or NseUtility.NseUtils(cache=NseUtility.BhavCopyCache())
+    report = 'ind_close_all' if instrument_type == 'Index' else 'sec_bhavdata_full'
+    print(f"📥 Syncing {len(outputs)} file(s) from {start_date.strftime('%d-%m-%Y')} to {end_date.strftime('%d-%m-%Y')}...")
+
+    failed_date = None
+    day_range = nse.iter_bhav_copy_range(report, start_date.strftime('%d-%m-%Y'), end_date.strftime('%d-%m-%Y'))
+    for current_date, bhav_data, error in day_range:
+        date_str = current_date.strftime('%d-%m-%Y')
+        if error is not None:
+            if isinstance(error, NseUtility.ArchiveError) and error.not_published:
+                continue  # Unlisted holiday, or today's report is not out yet
+            # Appending later days would leave a hole the next sync resumes past: stop here
+            failed_date = date_str
+            print(f"   ⚠️ Error on {date_str}: {str(error)[:60]}")
+            break
+        for output in outputs.values():
+            if current_date > output['last_date']:
+                row = extract_ohlcv_row(bhav_data, instrument_type, output['symbol'], date_str)
+                if row is not None:
+                    output['new_rows'].append(row)
+
+    for path, output in outputs.items():
+        if output['new_rows']:
+            updated = pd.concat([output['data'], pd.DataFrame(output['new_rows'])], ignore_index=True)
+            _write_csv_atomic(updated, path)
+        print(f"   ✓ {path}: {len(output['new_rows'])} new record(s)")
+
+    if failed_date:
+        print(f"   ⚠️ Stopped at {failed_date}; run the sync again to continue from there")
+
+def sync_store(report, store_dir=None, from_date_str=None, nse=None):
+    """
+    Fill a BhavCopyStore with every trading session it is missing since its first stored date
+    (or since from_date_str when the store holds nothing for the report yet). Days that failed
+    on an earlier run are retried, not only the days after the last stored one.
+    """
+    store = NseUtility.BhavCopyStore(store_dir) if store_dir else NseUtility.BhavCopyStore()
+    stored_dates = store.dates(report)
+    if stored_dates:
+        start_date = stored_dates[0]
+    elif from_date_str:
+        start_date = datetime.strptime(from_date_str, '%d-%m-%Y').date()
+    else:
+        print(f"❌ Store has no {report} data yet; pass --from DD-MM-YYYY to seed it.")
+        return
+
+    nse = nse or NseUtility.NseUtils(cache=NseUtility.BhavCopyCache(), store=store)
+    end_date = datetime.now().date()
+    held = set(stored_dates)
+    missing = [day.to_pydatetime() for day in nse.calendar.trading_days(start_date, end_date)
+               if day.date() not in held]
+    if not missing:
+        print(f"✅ {report} is already up to date.")
+        return
+
+    stored, failed = 0, 0
+    for current_date, bhav_data, error in nse.iter_bhav_copy_dates(report, missing):
+        if bhav_data is not None and not bhav_data.empty:
+            stored += 1
+        elif not (isinstance(error, NseUtility.ArchiveError) and error.not_published):
+            failed += 1
+            print(f"   ⚠️ Error on {current_date.strftime('%d-%m-%Y')}: {str(error)[:60]}")
+    print(f"   ✓ {report}: {stored} new trading day(s) stored")
+    if failed:
+        print(f"   ⚠️ {failed} day(s) failed; run the sync again to retry them")
+
+def backfill(reports, from_date_str, to_date_str, store_dir=None, max_retries=3, index_dir=None):
+    """
+    Resumable bulk download of whole bhav copies into the local cache (and the Parquet store with
+    store_dir, the per-symbol index with index_dir). Rerunning the same command continues an
+    interrupted job and retries its failed days.
+    """
+    store = NseUtility.BhavCopyStore(store_dir) if store_dir else None
+    index = NseUtility.SymbolIndex(index_dir) if index_dir else None
+    nse = NseUtility.NseUtils(cache=NseUtility.BhavCopyCache(), store=store, index=index)
+    job = BackfillJob(reports, from_date_str, to_date_str, nse=nse, max_retries=max_retries)
+    print(f"📥 Backfilling {', '.join(job.reports)} from {from_date_str} to {to_date_str}...")
+    print(f"   Checkpoint: {job.checkpoint_path}")
+    job.run()
+    job.print_gap_report()
+    if index is not None:
+        # Days done by an earlier run without index_dir are indexed from the cache
+        for report in job.reports:
+            added = index.build(nse, report, from_date_str, to_date_str)
+            if added:
+                print(f"   ✓ {report}: {added} more day(s) indexed from the cache")
+
+def download_multi(symbols, instrument_type, from_date_str, to_date_str, timeframe='1d',
+                   output_dir='.', long_format=False, adjust=False, nse=None):
+    """
+    Download many symbols in one pass over the daily bhav copies and save them as one
+    long-format CSV or one CSV per symbol. timeframe may be a list: the download is
+    shared and one set of files is written per timeframe.
+    """
+    nse = nse or NseUtility.NseUtils(cache=NseUtility.BhavCopyCache())
+    if instrument_type == 'Index':
+        symbols = [normalize_index_name(symbol) for symbol in symbols]
+    else:
+        symbols = [symbol.upper() for symbol in symbols]
+
+    print(f"📥 Downloading {len(symbols)} symbol(s) from {from_date_str} to {to_date_str}...")
+    df = nse.ohlcv_history(symbols, from_date_str, to_date_str, indices=instrument_type == 'Index', adjust=adjust)
+    if df.empty:
+        print("❌ No data was downloaded. Please check the symbols and date range.")
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    date_span = f"{datetime.strptime(from_date_str, '%d-%m-%Y').strftime('%Y%m%d')}_to_" \
+                f"{datetime.strptime(to_date_str, '%d-%m-%Y').strftime('%Y%m%d')}"
+    daily_df = df
+    for timeframe in ([timeframe] if isinstance(timeframe, str) else timeframe):
+        df = daily_df
+        if timeframe in TIMEFRAMES:
+            print(f"📊 Resampling to {TIMEFRAMES[timeframe][0]}...")
+            df = resample_timeframe(daily_df, timeframe)
+
+        if long_format:
+            filename = os.path.join(output_dir, f"MULTI_{timeframe}_{date_span}.csv")
+            df.to_csv(filename, index=False)
+            print(f"✅ {len(df)} records for {df['Symbol'].nunique()} symbol(s) saved to: {filename}")
+        else:
+            for symbol, frame in df.groupby('Symbol', sort=False):
+                safe_symbol = symbol.replace(' ', '_').replace('/', '_')
+                filename = os.path.join(output_dir, f"{safe_symbol}_{timeframe}_{date_span}.csv")
+                frame.to_csv(filename, index=False)
+            print(f"✅ Saved {df['Symbol'].nunique()} {timeframe} file(s) to: {os.path.abspath(output_dir)}")
+
+    missing = sorted(set(symbol.upper() for symbol in symbols) - set(df['Symbol'].str.upper()))
+    if missing:
+        print(f"   ⚠️ No data found for: {', '.join(missing)}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="NSE Historical Data Downloader. Runs interactively without options.")
+    parser.add_argument('--sync', nargs='+', metavar='CSV',
+                        help="Append missing trading days to existing daily CSV outputs")
+    parser.add_argument('--index', action='store_true',
+                        help="Files passed to --sync, or names passed to --symbols, are indices (default: stock/ETF)")
+    parser.add_argument('--sync-store', metavar='REPORT',
+                        help="Append missing trading days of a report to the Parquet store")
+    parser.add_argument('--store-dir', help="Parquet store directory for --sync-store and --backfill")
+    parser.add_argument('--backfill', nargs='+', metavar='REPORT',
+                        help="Resumable bulk download of whole reports between --from and --to, eg: sec_bhavdata_full")
+    parser.add_argument('--index-dir', metavar='DIR',
+                        help="Keep a per-symbol index in DIR with --backfill/--symbols/--constituents/--jobs; "
+                             "later runs read indexed days from it")
+    parser.add_argument('--retries', type=int, default=3, help="Retry rounds for failed days with --backfill (default: 3)")
+    parser.add_argument('--from', dest='from_date', metavar='DD-MM-YYYY',
+                        help="Start date for --symbols/--constituents/--backfill, or for --sync-store when the store is empty")
+    parser.add_argument('--to', dest='to_date', metavar='DD-MM-YYYY',
+                        help="End date for --symbols/--constituents/--backfill (default: today)")
+    parser.add_argument('--symbols', nargs='+', metavar='SYMBOL',
+                        help="Download several stocks/ETFs (or indices with --index) in one pass")
+    parser.add_argument('--constituents', metavar='INDEX',
+                        help="Download every constituent stock of an index, eg: \"NIFTY 50\"")
+    parser.add_argument('--timeframe', nargs='+', choices=['1d'] + list(TIMEFRAMES), default=['1d'],
+                        help="One or more timeframes for --symbols/--constituents (default: 1d)")
+    parser.add_argument('--jobs', metavar='FILE',
+                        help="Run every job of a JSON/YAML job file, downloading each shared day once")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Days downloaded concurrently with --jobs (default: 4)")
+    parser.add_argument('--output-dir', default='.', help="Directory for --symbols/--constituents output files")
+    parser.add_argument('--adjust', action='store_true',
+                        help="Adjust --symbols/--constituents stock prices and volumes for splits and bonuses")
+    parser.add_argument('--long', action='store_true',
+                        help="Save --symbols/--constituents output as one long-format CSV instead of one file per symbol")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        main()
+        if args.jobs:
+            index = NseUtility.SymbolIndex(args.index_dir) if args.index_dir else None
+            run_batch(load_job_file(args.jobs), NseUtility.NseUtils(cache=NseUtility.BhavCopyCache(), index=index),
+                      args.workers)
+        elif args.sync:
+            sync_files(args.sync, 'Index' if args.index else 'Stock/ETF')
+        elif args.sync_store:
+            sync_store(args.sync_store, args.store_dir, args.from_date)
+        elif args.backfill:
+            if not args.from_date:
+                raise SystemExit("--from DD-MM-YYYY is required with --backfill")
+            backfill(args.backfill, args.from_date, args.to_date or datetime.now().strftime('%d-%m-%Y'),
+                     args.store_dir, args.retries, args.index_dir)
+        elif args.symbols or args.constituents:
+            if not args.from_date:
+                raise SystemExit("--from DD-MM-YYYY is required with --symbols/--constituents")
+            to_date_str = args.to_date or datetime.now().strftime('%d-%m-%Y')
+            index = NseUtility.SymbolIndex(args.index_dir) if args.index_dir else None
+            nse = NseUtility.NseUtils(cache=NseUtility.BhavCopyCache(), index=index)
+            if args.constituents:
+                symbols = nse.get_index_details(args.constituents, list_only=True)
+                instrument_type = 'Stock/ETF'
+            else:
+                symbols = args.symbols
+                instrument_type = 'Index' if args.index else 'Stock/ETF'
+            download_multi(symbols, instrument_type, args.from_date, to_date_str, args.timeframe,
+                           args.output_dir, args.long, args.adjust, nse)
+        else:
+            main()
     except KeyboardInterrupt:
         print("\n\n⚠️ Download cancelled by user.")
     except Exception as e:
@@ -0,0 +1,297 @@
+"""
+Intraday option chain recorder with delta-compressed Parquet storage.
+
+OptionChainRecorder polls NseUtils.get_live_option_chain for a set of symbols on a
+schedule and keeps only the strikes whose values changed since the previous poll.
+The first poll of each day (or after a restart) stores the full chain, flagged as a reset
+so replays drop whatever was recorded before it. Deltas are buffered and flushed as
+zstd-compressed Parquet parts under::
+
+    <root>/symbol=<SYMBOL>/date=<YYYY-MM-DD>/part-<HHMMSS>-<pid>-<n>.parquet
+
+OptionChainHistory replays those deltas to rebuild the full chain at any time of
+the recorded day. All times are IST (Asia/Kolkata) and stored without a timezone.
+
+Usage::
+
+    python nse_oc_recorder.py NIFTY BANKNIFTY --interval 30
+    python nse_oc_recorder.py NIFTY --expiry 26-12-2025 --expiry 02-01-2026
+"""
+
+import argparse
+import itertools
+import os
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from NseUtility import NseUtils
+from nse_cache import as_date
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+
+DEFAULT_RECORDING_DIR = os.path.join(os.path.expanduser('~'), '.nse_data_downloader', 'option_chains')
+
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = dt_time(9, 15)
+MARKET_CLOSE = dt_time(15, 30)
+
+# Underlyings served by the option-chain-indices endpoint; anything else is treated as an equity
+INDEX_SYMBOLS = {'NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY', 'NIFTYNXT50'}
+
+KEY_COLUMNS = ['Expiry_Date', 'Strike_Price']
+
+
+def now_ist() -> datetime:
+    """Current IST wall clock time as a naive datetime."""
+    return datetime.now(IST).replace(tzinfo=None)
+
+
+def value_columns(oi_mode: str = 'compact'):
+    """Per-strike value columns that are compared between polls for the given oi_mode."""
+    fields = NseUtils.option_leg_fields if oi_mode == 'full' else NseUtils.option_leg_fields[:6]
+    return [f'{prefix}_{name}' for prefix in ('CALLS', 'PUTS') for name, _ in fields]
+
+
+class OptionChainRecorder:
+    """
+    Polls live option chains and stores per-strike changes only.
+    """
+
+    def __init__(self, targets, nse=None, root: str = DEFAULT_RECORDING_DIR, oi_mode: str = 'compact',
+                 flush_every: int = 20):
+        """
+        :param targets: Symbols to record, either a list eg: ['NIFTY', 'BANKNIFTY'] or a dict of symbol to a list
+        of 'dd-mm-YYYY' expiries to keep eg: {'NIFTY': ['26-12-2025'], 'BANKNIFTY': None}. None keeps all expiries
+        :param nse: NseUtils instance used for fetching. A new one is created if not given
+        :param root: Directory that holds the recordings
+        :param oi_mode: 'compact' (OI, volume, IV, LTP, change) or 'full' (adds bid/ask, which change far more often)
+        :param flush_every: Write buffered deltas to disk after this many polls
+        """
+        if pa is None:
+            raise ImportError("OptionChainRecorder requires pyarrow. Install with: uv pip install pyarrow")
+        if not isinstance(targets, dict):
+            targets = {symbol: None for symbol in targets}
+        self.targets = {symbol.upper(): _expiry_labels(expiries) for symbol, expiries in targets.items()}
+        self.nse = nse or NseUtils()
+        self.root = root
+        self.oi_mode = oi_mode
+        self.flush_every = flush_every
+        self.value_columns = value_columns(oi_mode)
+        self._last = {}  # symbol -> (day, last chain indexed by KEY_COLUMNS)
+        self._pending = {}  # (symbol, day) -> list of delta frames
+        self._polls_since_flush = 0
+
+    def record(self, symbol: str, chain: pd.DataFrame, recorded_at: datetime = None) -> int:
+        """
+        Diff a chain snapshot against the previous one of the same day and buffer the changed strikes
+        :param symbol: Target symbol
+        :param chain: Data frame as returned by NseUtils.get_live_option_chain
+        :param recorded_at: Poll time (IST). Defaults to now
+        :return: Number of delta rows buffered
+        """
+        recorded_at = recorded_at or now_ist()
+        day = recorded_at.date()
+        expiries = self.targets.get(symbol)
+        if expiries is not None:
+            chain = chain[chain['Expiry_Date'].isin(expiries)]
+        current = chain[KEY_COLUMNS + self.value_columns].drop_duplicates(KEY_COLUMNS, keep='last')
+        current = current.set_index(KEY_COLUMNS)
+
+        last_day, previous = self._last.get(symbol, (None, None))
+        reset = previous is None or last_day != day
+        if reset:
+            changed = current
+            removed = pd.MultiIndex.from_tuples([], names=KEY_COLUMNS)
+        else:
+            aligned = previous.reindex(current.index)
+            differs = (current != aligned) & ~(current.isna() & aligned.isna())
+            changed = current[differs.any(axis=1)]
+            removed = previous.index.difference(current.index)
+        self._last[symbol] = (day, current)
+
+        delta = changed.reset_index()
+        delta['Removed'] = False
+        delta['Reset'] = reset
+        if len(removed):
+            gone = pd.DataFrame(np.nan, index=removed, columns=self.value_columns).reset_index()
+            gone['Removed'] = True
+            gone['Reset'] = False
+            delta = pd.concat([delta, gone], ignore_index=True)
+        if delta.empty:
+            return 0
+        delta.insert(0, 'Record_Time', pd.Timestamp(recorded_at))
+        delta.insert(1, 'Fetch_Time', chain['Fetch_Time'].iloc[0] if len(chain) else None)
+        self._pending.setdefault((symbol, day), []).append(delta)
+        return len(delta)
+
+    def poll(self, recorded_at: datetime = None) -> dict:
+        """
+        Fetch every target once and buffer the changes
+        :return: dict of symbol -> delta rows buffered, or None where the fetch failed
+        """
+        recorded_at = recorded_at or now_ist()
+        counts = {}
+        for symbol in self.targets:
+            try:
+                chain = self.nse.get_live_option_chain(symbol, oi_mode=self.oi_mode, indices=symbol in INDEX_SYMBOLS)
+                counts[symbol] = self.record(symbol, chain, recorded_at)
+            except Exception as e:
+                print(f"Warning: could not record option chain for {symbol}: {e}")
+                counts[symbol] = None
+        self._polls_since_flush += 1
+        if self._polls_since_flush >= self.flush_every:
+            self.flush()
+        return counts
+
+    def flush(self):
+        """Write all buffered deltas to new Parquet parts."""
+        for (symbol, day), frames in self._pending.items():
+            delta = pd.concat(frames, ignore_index=True)
+            day_dir = os.path.join(self.root, f"symbol={symbol}", f"date={day.strftime('%Y-%m-%d')}")
+            os.makedirs(day_dir, exist_ok=True)
+            prefix = f"part-{delta['Record_Time'].iloc[0].strftime('%H%M%S')}-{os.getpid()}"
+            # Never replace a part: flushes within one second, or a restart reaching the same time, get a new name
+            path = next(path for path in (os.path.join(day_dir, f"{prefix}-{n}.parquet") for n in itertools.count())
+                        if not os.path.exists(path))
+            tmp_path = path + '.tmp'
+            table = pa.Table.from_pandas(delta, preserve_index=False)
+            pq.write_table(table, tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+        self._pending = {}
+        self._polls_since_flush = 0
+
+    def run(self, interval: float = 30, until: datetime = None, market_hours_only: bool = True):
+        """
+        Poll every `interval` seconds until `until`, flushing on exit (including Ctrl+C)
+        :param interval: Seconds between polls, aligned to the wall clock
+        :param until: IST datetime to stop at. Defaults to today's market close when market_hours_only is set,
+        otherwise runs until interrupted
+        :param market_hours_only: Only poll between 09:15 and 15:30 IST on trading days
+        """
+        if until is None and market_hours_only:
+            until = datetime.combine(now_ist().date(), MARKET_CLOSE)
+        try:
+            while until is None or now_ist() <= until:
+                now = now_ist()
+                if not market_hours_only or self._market_open(now):
+                    self.poll(now)
+                time.sleep(interval - (time.time() % interval))
+        finally:
+            self.flush()
+
+    def _market_open(self, now: datetime) -> bool:
+        return MARKET_OPEN <= now.time() <= MARKET_CLOSE and self.nse.calendar.is_trading_day(now)
+
+
+class OptionChainHistory:
+    """
+    Reader over OptionChainRecorder output.
+    """
+
+    def __init__(self, root: str = DEFAULT_RECORDING_DIR):
+        """
+        :param root: Directory that holds the recordings
+        """
+        if pa is None:
+            raise ImportError("OptionChainHistory requires pyarrow. Install with: uv pip install pyarrow")
+        self.root = root
+
+    def _day_dir(self, symbol: str, day) -> str:
+        return os.path.join(self.root, f"symbol={symbol.upper()}", f"date={as_date(day).strftime('%Y-%m-%d')}")
+
+    def days(self, symbol: str):
+        """Recorded days for a symbol as a sorted list of dates."""
+        symbol_dir = os.path.join(self.root, f"symbol={symbol.upper()}")
+        if not os.path.isdir(symbol_dir):
+            return []
+        return sorted(datetime.strptime(name[len('date='):], '%Y-%m-%d').date()
+                      for name in os.listdir(symbol_dir) if name.startswith('date='))
+
+    def deltas(self, symbol: str, day) -> pd.DataFrame:
+        """
+        All stored delta rows of a day in recording order
+        :param symbol: Recorded symbol
+        :param day: date/datetime or 'dd-mm-YYYY' string
+        :return: pandas data frame with Record_Time, Fetch_Time, key, value, Removed and Reset columns.
+        Reset marks the rows of a full snapshot (first poll of the day or after a restart)
+        """
+        day_dir = self._day_dir(symbol, day)
+        if not os.path.isdir(day_dir):
+            return pd.DataFrame(columns=['Record_Time', 'Fetch_Time'] + KEY_COLUMNS + ['Removed', 'Reset'])
+        parts = sorted(os.path.join(day_dir, name) for name in os.listdir(day_dir) if name.endswith('.parquet'))
+        delta = pd.concat([pq.read_table(part).to_pandas() for part in parts], ignore_index=True)
+        # Parts written before resets were flagged: only the day's first snapshot is a full one
+        reset = delta['Reset'].fillna(False) if 'Reset' in delta else delta['Record_Time'] == delta['Record_Time'].min()
+        delta['Reset'] = reset.astype(bool)
+        return delta.sort_values('Record_Time', kind='stable', ignore_index=True)
+
+    def timestamps(self, symbol: str, day):
+        """Poll times of a day at which at least one strike changed, as a DatetimeIndex."""
+        return pd.DatetimeIndex(self.deltas(symbol, day)['Record_Time'].unique())
+
+    def chain_at(self, symbol: str, at, expiry_date: str = None) -> pd.DataFrame:
+        """
+        Rebuild the full chain as it was at a point in time
+        :param symbol: Recorded symbol
+        :param at: IST datetime or anything pd.Timestamp accepts eg: '2025-01-02 11:30'
+        :param expiry_date: Optional 'dd-mm-YYYY' expiry to keep
+        :return: pandas data frame shaped like get_live_option_chain, sorted by expiry and strike.
+        Empty if nothing was recorded for that day before `at`
+        """
+        at = pd.Timestamp(at)
+        delta = self.deltas(symbol, at.to_pydatetime())
+        delta = delta[delta['Record_Time'] <= at]
+        resets = delta.loc[delta['Reset'], 'Record_Time']
+        if len(resets):
+            # Strikes that vanished while the recorder was down are only absent from the latest full snapshot
+            delta = delta[delta['Record_Time'] >= resets.max()]
+        if expiry_date is not None:
+            delta = delta[delta['Expiry_Date'].isin(_expiry_labels([expiry_date]))]
+        if delta.empty:
+            return pd.DataFrame(columns=['Fetch_Time', 'Symbol'] + KEY_COLUMNS)
+
+        fetch_time = delta['Fetch_Time'].iloc[-1]
+        chain = delta.drop_duplicates(KEY_COLUMNS, keep='last')
+        chain = chain[~chain['Removed'].astype(bool)].drop(columns=['Record_Time', 'Fetch_Time', 'Removed', 'Reset'])
+        chain = chain.assign(_expiry=pd.to_datetime(chain['Expiry_Date'], format='%d-%b-%Y'))
+        chain = chain.sort_values(['_expiry', 'Strike_Price'], ignore_index=True).drop(columns='_expiry')
+        chain.insert(0, 'Fetch_Time', fetch_time)
+        chain.insert(1, 'Symbol', symbol.upper())
+        return chain
+
+
+def _expiry_labels(expiries):
+    """Convert 'dd-mm-YYYY' expiries to the 'dd-Mon-YYYY' labels used in the chain. None keeps all."""
+    if expiries is None:
+        return None
+    return [pd.to_datetime(expiry, format='%d-%m-%Y').strftime('%d-%b-%Y') for expiry in expiries]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Record intraday NSE option chains as per-strike deltas')
+    parser.add_argument('symbols', nargs='+', help='Underlyings to record eg: NIFTY BANKNIFTY RELIANCE')
+    parser.add_argument('--expiry', action='append', dest='expiries', metavar='DD-MM-YYYY',
+                        help='Only record this expiry (repeatable). Default: all expiries')
+    parser.add_argument('--interval', type=float, default=30, help='Seconds between polls (default 30)')
+    parser.add_argument('--oi-mode', choices=['compact', 'full'], default='compact',
+                        help='compact skips bid/ask columns (default compact)')
+    parser.add_argument('--root', default=DEFAULT_RECORDING_DIR, help='Recording directory')
+    parser.add_argument('--always', action='store_true', help='Poll outside market hours too, until Ctrl+C')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    recorder = OptionChainRecorder({symbol: args.expiries for symbol in args.symbols}, root=args.root,
+                                   oi_mode=args.oi_mode)
+    print(f"Recording {', '.join(recorder.targets)} every {args.interval:g}s to {args.root}")
+    recorder.run(interval=args.interval, market_hours_only=not args.always)
@@ -0,0 +1,291 @@
+"""
+Query planner that shares NSE downloads between the datasets of one workflow.
+
+Consumers register what they need first: OHLCV histories of stocks or indices, whole
+bhavcopies for a callback, holiday lists and index constituents. run() then
+
+1. resolves the list lookups, each distinct one once (constituents feed the histories),
+2. works out the unique (report, trading day) bhavcopies every consumer needs together,
+   with days already held by the symbol index read from it instead,
+3. fetches them on one bounded pool: cached days first, as a burst of local reads that
+   costs no rate limit, then the network days in date order with each day's reports
+   together, so the limiter paces one steady stream and the cache index is hit in order,
+4. fans every fetched day out to the consumers whose range covers it.
+
+    planner = QueryPlanner(nse)
+    stocks = planner.ohlcv(['RELIANCE', 'TCS'], '01-01-2024', '31-12-2024', adjust=True)
+    nifty = planner.ohlcv(['NIFTY 50'], '01-06-2024', '31-12-2024', indices=True)
+    members = planner.constituents('NIFTY 50')
+    planner.run()
+    stocks.result, nifty.result, members.result
+"""
+
+import pandas as pd
+
+from NseUtility import NseUtils
+from nse_cache import BhavCopyCache, as_date
+from nse_resample import OHLCV_COLUMNS, format_dates
+
+
+STOCK_REPORT = 'sec_bhavdata_full'
+INDEX_REPORT = 'ind_close_all'
+
+
+class PlannedQuery:
+    """
+    Handle of one registered request. result (or error) is set by QueryPlanner.run().
+    """
+
+    def __init__(self, kind: str, **params):
+        self.kind = kind
+        self.params = params
+        self.result = None
+        self.error = None
+        self.done = False
+
+    def get(self):
+        """
+        The result of the query
+        :raise RuntimeError if the planner has not run yet, or the query's own error
+        """
+        if not self.done:
+            raise RuntimeError(f"{self.kind} query has not run yet; call QueryPlanner.run() first")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class QueryPlanner:
+    """
+    Gathers requests against one NseUtils and runs them with the fewest downloads.
+    """
+
+    def __init__(self, nse: NseUtils = None, max_workers: int = 4):
+        """
+        :param nse: NseUtils to fetch with (default: one with a BhavCopyCache)
+        :param max_workers: Number of files fetched concurrently
+        """
+        self.nse = nse or NseUtils(cache=BhavCopyCache())
+        self.max_workers = max_workers
+        self._lists = {}  # (kind, argument) -> PlannedQuery, one per distinct lookup
+        self._ohlcv = {}  # (report, symbols, constituents, from, to, adjust, date_format) -> PlannedQuery
+        self._bhav = []
+        self.stats = {}
+        self.failures = []  # (report, trade_date, error) of the days that could not be fetched
+
+    # Requests
+
+    def holidays(self, kind: str = 'trading') -> PlannedQuery:
+        """
+        NSE holidays as a sorted list of dates
+        :param kind: 'trading' or 'clearing'
+        """
+        return self._list_query('holidays', kind)
+
+    def constituents(self, index: str) -> PlannedQuery:
+        """
+        Constituent symbols of an index, as get_index_details(index, list_only=True)
+        :param index: eg: 'NIFTY 50'
+        """
+        return self._list_query('constituents', index.strip().upper())
+
+    def _list_query(self, kind: str, argument: str) -> PlannedQuery:
+        key = (kind, argument)
+        if key not in self._lists:
+            self._lists[key] = PlannedQuery(kind, argument=argument)
+        return self._lists[key]
+
+    def ohlcv(self, symbols, from_date, to_date, indices: bool = False, constituents=None, adjust: bool = False,
+              date_format: str = '%d-%m-%Y') -> PlannedQuery:
+        """
+        Daily OHLCV history of many symbols, as NseUtils.ohlcv_history. Identical requests share one query
+        :param symbols: List of stock symbols, or index names when indices=True
+        :param from_date: Start date, date/datetime or 'dd-mm-YYYY'
+        :param to_date: End date, date/datetime or 'dd-mm-YYYY'
+        :param indices: Set to True if symbols are index names
+        :param constituents: Optional index name or list of names whose constituents are added to symbols
+        :param adjust: Adjust stock prices and volumes for splits, consolidations and bonuses
+        :param date_format: strftime format of the Date column, None keeps datetime64
+        :return: PlannedQuery whose result is a long frame with Symbol, Date, Open, High, Low, Close, Volume
+        """
+        report = INDEX_REPORT if indices else STOCK_REPORT
+        symbols = tuple(dict.fromkeys(symbol.strip() if indices else symbol.strip().upper() for symbol in symbols))
+        constituents = tuple(name.strip().upper() for name in
+                             ([constituents] if isinstance(constituents, str) else constituents or []))
+        key = (report, symbols, constituents, as_date(from_date), as_date(to_date), bool(adjust and not indices),
+               date_format)
+        if key not in self._ohlcv:
+            self._ohlcv[key] = PlannedQuery('ohlcv', report=report, symbols=list(symbols),
+                                            constituents=[self.constituents(name) for name in constituents],
+                                            from_date=key[3], to_date=key[4], adjust=key[5], date_format=date_format)
+        return self._ohlcv[key]
+
+    def bhav_copies(self, report: str, from_date, to_date, on_day) -> PlannedQuery:
+        """
+        Whole bhavcopies of every trading day in a range, handed to a callback as they arrive
+        :param report: 'sec_bhavdata_full', 'ind_close_all', 'cm_bhavcopy' or 'fo_bhavcopy'
+        :param from_date: Start date, date/datetime or 'dd-mm-YYYY'
+        :param to_date: End date, date/datetime or 'dd-mm-YYYY'
+        :param on_day: Callable(report, trade_date, bhav_df). Must not modify bhav_df, which other consumers share
+        :return: PlannedQuery whose result is a dict of trade_date -> error for the days that failed
+        """
+        self.nse._bhav_method(report)  # Reject unknown reports when registered, not mid-run
+        query = PlannedQuery('bhav_copies', report=report, from_date=as_date(from_date), to_date=as_date(to_date),
+                             on_day=on_day)
+        self._bhav.append(query)
+        return query
+
+    # Planning
+
+    def _resolve_lists(self):
+        for (kind, argument), query in self._lists.items():
+            if query.done:
+                continue
+            try:
+                if kind == 'holidays':
+                    query.result = sorted(self.nse._holiday_set(argument))
+                else:
+                    query.result = self.nse.get_index_details(argument, list_only=True)
+            except Exception as e:
+                query.error = e
+            query.done = True
+        for query in self._ohlcv.values():
+            if query.done:
+                continue
+            failed = [lookup for lookup in query.params['constituents'] if lookup.error is not None]
+            if failed:
+                query.error = failed[0].error
+                query.done = True
+                continue
+            members = [symbol for lookup in query.params['constituents'] for symbol in lookup.result]
+            query.params['symbols'] = list(dict.fromkeys(query.params['symbols'] + members))
+
+    def plan(self):
+        """
+        Resolve the list lookups and work out the downloads every pending query needs together
+        :return: list of (report, trade_date) in fetch order. Also fills stats with the number of days requested
+        by all consumers, unique fetches, cached fetches and days read from the symbol index
+        """
+        self._resolve_lists()
+        calendar = self.nse.calendar
+        sessions = {}
+
+        def days_of(query):
+            span = (query.params['from_date'], query.params['to_date'])
+            if span not in sessions:
+                sessions[span] = [day.to_pydatetime() for day in calendar.trading_days(*span)]
+            return sessions[span]
+
+        needed = {}  # (report, trade_date) -> True if a whole-bhavcopy consumer needs the file itself
+        requested = 0
+        for query in self._bhav:
+            for day in days_of(query):
+                needed[(query.params['report'], day)] = True
+                requested += 1
+        for query in self._ohlcv.values():
+            if query.done:
+                continue
+            for day in days_of(query):
+                needed.setdefault((query.params['report'], day), False)
+                requested += 1
+
+        # OHLCV-only days the symbol index holds are read from it, not downloaded
+        self._indexed = {}
+        index = self.nse.index
+        if index is not None:
+            for report in {report for report, _ in needed}:
+                days = [day for (r, day), whole in needed.items() if r == report and not whole]
+                if days:
+                    held = set(index.dates(report, min(days), max(days)))
+                    self._indexed[report] = {day for day in days if day.date() in held}
+        fetches = [(report, day) for (report, day) in needed if day not in self._indexed.get(report, ())]
+
+        cache = self.nse.cache
+        cached = [fetch for fetch in fetches if cache is not None and cache.path(*fetch) is not None]
+        cached_set = set(cached)
+        network = [fetch for fetch in fetches if fetch not in cached_set]
+        if self.nse.index is not None:
+            # Fetched days are appended to the symbol index as they are yielded: keep them in date order
+            order = sorted(fetches, key=lambda fetch: (fetch[1], fetch[0]))
+        else:
+            # Cache hits grouped per report in date order; network days date-major, a day's reports together
+            order = sorted(cached) + sorted(network, key=lambda fetch: (fetch[1], fetch[0]))
+        self.stats = {'requested': requested, 'fetches': len(order), 'cached': len(cached),
+                      'indexed': sum(len(days) for days in self._indexed.values())}
+        return order
+
+    # Running
+
+    def run(self):
+        """
+        Fetch everything the pending queries need and fill their results
+        :return: dict of stats (see plan)
+        """
+        order = self.plan()
+        ohlcv_queries = [query for query in self._ohlcv.values() if not query.done]
+        bhav_queries = list(self._bhav)
+        # Every symbol any OHLCV query needs from a report is split out of each of its days in one pass
+        wanted = {}
+        for query in ohlcv_queries:
+            wanted.setdefault(query.params['report'], {}).update(dict.fromkeys(query.params['symbols']))
+        frames = {report: [] for report in wanted}
+        for query in bhav_queries:
+            query.result = {}
+
+        self.failures = []
+        for report, trade_date, bhav_df, error in self.nse.iter_bhav_copies(order, self.max_workers):
+            day = trade_date.date()
+            if error is not None:
+                self.failures.append((report, trade_date, error))
+            for query in bhav_queries:
+                params = query.params
+                if params['report'] != report or not params['from_date'] <= day <= params['to_date']:
+                    continue
+                if error is not None:
+                    query.result[trade_date] = error
+                    continue
+                try:
+                    params['on_day'](report, trade_date, bhav_df)
+                except Exception as e:
+                    query.result[trade_date] = e
+            if error is None and report in wanted and bhav_df is not None and not bhav_df.empty:
+                day_df = self.nse.extract_ohlcv(bhav_df, report, list(wanted[report]), trade_date)
+                day_df['Date'] = pd.Timestamp(trade_date)
+                frames[report].append(day_df)
+
+        history = {}
+        for report, report_frames in frames.items():
+            indexed_days = self._indexed.get(report)
+            if indexed_days:
+                indexed = self.nse.index.ohlcv(list(wanted[report]), report, min(indexed_days), max(indexed_days))
+                if not indexed.empty:
+                    held = {day.date() for day in indexed_days}
+                    report_frames.append(indexed[indexed['Date'].dt.date.isin(held)])
+            report_frames = [frame for frame in report_frames if not frame.empty]
+            if report_frames:
+                history[report] = pd.concat(report_frames, ignore_index=True).sort_values(
+                    ['Date', 'Symbol'], kind='stable', ignore_index=True)
+
+        for query in ohlcv_queries:
+            try:
+                query.result = self._slice(history.get(query.params['report']), query.params)
+            except Exception as e:
+                query.error = e
+            query.done = True
+        for query in bhav_queries:
+            query.done = True
+        self._bhav = []
+        return self.stats
+
+    def _slice(self, df: pd.DataFrame, params: dict) -> pd.DataFrame:
+        """One OHLCV query's rows of the shared history, adjusted and formatted as asked."""
+        if df is None or df.empty:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        wanted = {symbol.upper() for symbol in params['symbols']}
+        in_range = (df['Date'] >= pd.Timestamp(params['from_date'])) & (df['Date'] <= pd.Timestamp(params['to_date']))
+        frame = df[in_range & df['Symbol'].str.strip().str.upper().isin(wanted)].reset_index(drop=True)
+        if params['adjust'] and not frame.empty:
+            frame = self.nse.corporate_actions.adjust(frame)
+        if params['date_format'] is not None:
+            frame = frame.assign(Date=format_dates(frame['Date'], params['date_format']))
+        return frame
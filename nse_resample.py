@@ -0,0 +1,137 @@
+"""
+OHLCV resampling shared by the CLI and the Streamlit app.
+
+Works on long frames with Symbol, Date, Open, High, Low, Close, Volume columns holding any
+number of symbols. Every (symbol, period) bar is built in one grouped aggregation, with
+dates kept as datetime64 until the output is formatted.
+
+A rule is a timeframe code ('1w', '1m', '1q', '1y', '1fy'), any pandas offset alias
+(eg: 'W-FRI', 'QE-MAR') or a callable mapping a datetime64 Series to the period label of
+each row, such as nse_weeks(). Fiscal quarters (Apr-Mar) share their boundaries with
+calendar quarters, so '1q' covers them; '1fy' gives fiscal years ending in March.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+OHLCV_COLUMNS = ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+# Timeframe code -> (description, pandas offset alias)
+TIMEFRAMES = {
+    '1w': ('weekly', 'W-FRI'),
+    '1m': ('monthly', 'ME'),
+    '1q': ('quarterly', 'QE-DEC'),
+    '1y': ('yearly', 'YE-DEC'),
+    '1fy': ('fiscal yearly (Apr-Mar)', 'YE-MAR'),
+}
+
+
+def prepare_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean OHLCV rows before aggregation: Date becomes datetime64 ('dd-mm-YYYY' strings are parsed),
+    prices and volume become numeric and incomplete rows are dropped
+    :param df: Daily OHLCV frame
+    :return: New pandas data frame
+    """
+    clean_df = df.copy()
+    if not pd.api.types.is_datetime64_any_dtype(clean_df['Date']):
+        clean_df['Date'] = pd.to_datetime(clean_df['Date'], format='%d-%m-%Y', errors='coerce')
+    for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        clean_df[col] = pd.to_numeric(clean_df[col], errors='coerce')
+    if 'Symbol' not in clean_df.columns:
+        clean_df['Symbol'] = ''
+    return clean_df.dropna(subset=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+
+
+def period_labels(dates: pd.Series, rule) -> pd.Series:
+    """
+    Label each date with the end of the period it falls in
+    :param dates: datetime64 Series
+    :param rule: Timeframe code, pandas offset alias or callable(dates) -> labels
+    :return: datetime64 Series aligned with dates
+    """
+    if callable(rule):
+        return pd.Series(rule(dates), index=dates.index)
+    alias = TIMEFRAMES[rule][1] if rule in TIMEFRAMES else rule
+    # An anchored offset with n=0 rolls each date forward onto its period end, in one vectorised step
+    return dates.dt.normalize() + 0 * pd.tseries.frequencies.to_offset(alias)
+
+
+def nse_weeks(calendar=None):
+    """
+    Rule for NSE trading weeks: Monday-Sunday weeks labelled with their last trading session, so a
+    week whose Friday is a holiday ends on Thursday and special weekend sessions stay in their week
+    :param calendar: TradingCalendar for the sessions. Without it, the last date traded by any symbol
+    in the week is used
+    :return: Callable rule for resample_ohlcv
+    """
+    def labels(dates):
+        week = dates.dt.normalize() + 0 * pd.offsets.Week(weekday=6)
+        if calendar is None:
+            return dates.groupby(week).transform('max').dt.normalize()
+        sessions = pd.Series(calendar.trading_days(dates.min(), week.max()))
+        last_session = sessions.groupby(sessions + 0 * pd.offsets.Week(weekday=6)).max()
+        # Weeks without a calendar session (eg: a weekend-only special session) fall back to their data
+        fallback = dates.groupby(week).transform('max').dt.normalize()
+        return week.map(last_session).fillna(fallback)
+    return labels
+
+
+def resample_ohlcv(df: pd.DataFrame, rule, label: str = 'period', date_format: str = '%d-%m-%Y') -> pd.DataFrame:
+    """
+    Aggregate daily OHLCV bars of one or more symbols to a coarser timeframe
+    :param df: Long frame with Symbol, Date, Open, High, Low, Close, Volume columns
+    :param rule: Timeframe code eg: '1w', pandas offset alias eg: 'QE-MAR', or callable rule eg: nse_weeks()
+    :param label: 'period' dates each bar by its period end, 'session' by the last date traded in it
+    :param date_format: strftime format for the output Date column, None keeps datetime64
+    :return: pandas data frame with Symbol, Date, Open, High, Low, Close, Volume, symbols in order
+    of first appearance and dates ascending within each
+    """
+    if label not in ('period', 'session'):
+        raise ValueError("label must be 'period' or 'session'")
+    clean_df = prepare_ohlcv(df)
+    if clean_df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    # Symbol-major, date-ascending order so first/last are the period's open/close
+    symbol_codes = pd.factorize(clean_df['Symbol'])[0]
+    clean_df = clean_df.iloc[np.lexsort((clean_df['Date'].to_numpy(), symbol_codes))]
+    period = period_labels(clean_df['Date'], rule).rename('Period')
+
+    sampled = clean_df.groupby([clean_df['Symbol'], period], sort=False, observed=True).agg(
+        Open=('Open', 'first'),
+        High=('High', 'max'),
+        Low=('Low', 'min'),
+        Close=('Close', 'last'),
+        Volume=('Volume', 'sum'),
+        Session=('Date', 'max'),
+    ).reset_index()
+
+    sampled['Date'] = sampled['Period'] if label == 'period' else sampled['Session'].dt.normalize()
+    if date_format is not None:
+        sampled['Date'] = format_dates(sampled['Date'], date_format)
+    return sampled[OHLCV_COLUMNS]
+
+
+def format_dates(dates: pd.Series, date_format: str = '%d-%m-%Y') -> np.ndarray:
+    """
+    strftime for long frames: rows share few distinct dates, so each is formatted once rather than per row
+    :param dates: datetime64 Series
+    :param date_format: strftime format
+    :return: numpy object array of strings
+    """
+    codes, unique_dates = pd.factorize(dates)
+    return pd.DatetimeIndex(unique_dates).strftime(date_format).to_numpy(dtype=object)[codes]
+
+
+def resample_timeframe(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Resample to a timeframe code; '1d' (or any unknown code) returns the frame unchanged
+    :param df: Long daily OHLCV frame
+    :param timeframe: '1d', '1w', '1m', '1q', '1y' or '1fy'
+    :return: pandas data frame
+    """
+    if timeframe not in TIMEFRAMES:
+        return df
+    return resample_ohlcv(df, timeframe)
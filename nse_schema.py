@@ -0,0 +1,139 @@
+"""
+Column types for parsed NSE bhavcopy reports.
+
+Each schema groups a report's columns by target type. `read_dtypes` gives the
+dtypes passed to pd.read_csv and `finalize` converts the assembled frame:
+string columns become categoricals, integer columns become int64 (or stay
+float when NSE left blanks) and date columns are parsed with their format.
+`read_csv` does both for a whole file.
+
+Published prices and index values are float64: float32 cannot hold a two-decimal
+price at or above 131072 (eg: MRF), so narrowing them would change the figure.
+Only small ratios and percentages, where that rounding is harmless, are float32.
+"""
+
+import pandas as pd
+
+
+# UDiFF layout shared by the CM and F&O bhavcopies
+UDIFF_SCHEMA = {
+    'category': ['Sgmt', 'Src', 'FinInstrmTp', 'ISIN', 'TckrSymb', 'SctySrs', 'OptnTp', 'SsnId'],
+    'string': ['FinInstrmNm', 'Rmks', 'Rsvd1', 'Rsvd2', 'Rsvd3', 'Rsvd4'],
+    'float64': ['StrkPric', 'OpnPric', 'HghPric', 'LwPric', 'ClsPric', 'LastPric', 'PrvsClsgPric',
+                'UndrlygPric', 'SttlmPric', 'TtlTrfVal'],
+    'int64': ['FinInstrmId', 'OpnIntrst', 'ChngInOpnIntrst', 'TtlTradgVol', 'TtlNbOfTxsExctd', 'NewBrdLotQty'],
+    'date': {'TradDt': '%Y-%m-%d', 'BizDt': '%Y-%m-%d', 'XpryDt': '%Y-%m-%d', 'FininstrmActlXpryDt': '%Y-%m-%d'},
+}
+
+SCHEMAS = {
+    # Values and headers are space padded and '-' marks a blank (eg: delivery of non-EQ series)
+    'sec_bhavdata_full': {
+        'category': ['SYMBOL', 'SERIES'],
+        'float32': ['DELIV_PER'],
+        'float64': ['PREV_CLOSE', 'OPEN_PRICE', 'HIGH_PRICE', 'LOW_PRICE', 'LAST_PRICE', 'CLOSE_PRICE', 'AVG_PRICE',
+                    'TURNOVER_LACS'],
+        'int64': ['TTL_TRD_QNTY', 'NO_OF_TRADES', 'DELIV_QTY'],
+        'date': {'DATE1': '%d-%b-%Y'},
+        'read_options': {'skipinitialspace': True, 'na_values': ['-']},
+    },
+    'ind_close_all': {
+        'category': ['Index Name'],
+        'float32': ['Change(%)', 'P/E', 'P/B', 'Div Yield'],
+        'float64': ['Open Index Value', 'High Index Value', 'Low Index Value', 'Closing Index Value',
+                    'Points Change', 'Turnover (Rs. Cr.)'],
+        'int64': ['Volume'],
+        'date': {'Index Date': '%d-%m-%Y'},
+        'read_options': {'skipinitialspace': True, 'na_values': ['-']},
+    },
+    'cm_bhavcopy': UDIFF_SCHEMA,
+    'fo_bhavcopy': UDIFF_SCHEMA,
+}
+
+
+def read_dtypes(report: str, columns=None, chunked: bool = False) -> dict:
+    """
+    dtypes to pass to pd.read_csv for a report
+    :param report: Report type eg: 'fo_bhavcopy'
+    :param columns: Optional subset of columns being read
+    :param chunked: Read categorical columns as plain strings, as categories of separate chunks do not combine
+    :return: dict of column -> dtype
+    """
+    schema = SCHEMAS.get(report, {})
+    dtypes = {}
+    for column in schema.get('category', []):
+        dtypes[column] = str if chunked else 'category'
+    for column in schema.get('string', []) + list(schema.get('date', {})):
+        dtypes[column] = str
+    for kind in ('float32', 'float64'):
+        for column in schema.get(kind, []):
+            dtypes[column] = kind
+    for column in schema.get('int64', []):
+        dtypes[column] = 'float64'  # Blanks would make an int64 read fail; narrowed in finalize()
+    if columns is not None:
+        dtypes = {column: dtype for column, dtype in dtypes.items() if column in columns}
+    return dtypes
+
+
+def read_options(report: str) -> dict:
+    """Extra pd.read_csv keyword arguments a report needs, eg: to strip padding."""
+    return dict(SCHEMAS.get(report, {}).get('read_options', {}))
+
+
+def finalize(report: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a frame read with read_dtypes() to its final column types, in place where possible
+    :param report: Report type eg: 'fo_bhavcopy'
+    :param df: Parsed report
+    :return: The converted data frame
+    """
+    schema = SCHEMAS.get(report, {})
+    for column in schema.get('category', []):
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    for column in schema.get('int64', []):
+        if column in df.columns and not df[column].isna().any():
+            df[column] = df[column].astype('int64')
+    for column, fmt in schema.get('date', {}).items():
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format=fmt, errors='coerce')
+    return df
+
+
+def read_csv(report: str, source, **kwargs) -> pd.DataFrame:
+    """
+    Read a whole report file with its schema applied
+    :param report: Report type eg: 'sec_bhavdata_full'
+    :param source: Path or file-like object
+    :param kwargs: Further pd.read_csv arguments
+    :return: pandas data frame
+    """
+    options = read_options(report)
+    options.update(kwargs)
+    df = pd.read_csv(source, dtype=read_dtypes(report, options.get('usecols')), **options)
+    return finalize(report, df)
+
+
+def concat(frames, **kwargs) -> pd.DataFrame:
+    """
+    pd.concat that keeps categorical columns categorical. Frames parsed on different days have different
+    categories, which pd.concat would otherwise fall back to object strings for.
+    :param frames: List of data frames
+    :param kwargs: Further pd.concat arguments
+    :return: pandas data frame
+    """
+    frames = list(frames)
+    categorical = set()
+    for frame in frames:
+        categorical.update(column for column, dtype in frame.dtypes.items() if isinstance(dtype, pd.CategoricalDtype))
+    for column in categorical:
+        if not all(column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype)
+                   for frame in frames):
+            continue
+        categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+        frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)}) for frame in frames]
+    return pd.concat(frames, **kwargs)
+
+
+def as_price(value):
+    """A parsed price as the two-decimal float NSE published, as a plain Python float. Blanks stay NaN."""
+    return round(float(value), 2)
@@ -0,0 +1,98 @@
+"""
+Shared HTTP session for NSE endpoints.
+
+The NSE API only answers requests that carry the cookies set by its web pages.
+Instead of fetching a referer page before every API call, NseSession warms the
+cookies once, tracks their expiry and re-warms only when they lapse or the
+server answers 401/403. All calls share one keep-alive connection pool and are
+paced by an optional rate limiter (see nse_throttle), which is told every response
+status so it can back off when NSE pushes back.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class NseSession:
+    """
+    Cookie-aware wrapper around a single pooled requests.Session.
+    """
+
+    home_url = 'https://www.nseindia.com'
+
+    def __init__(self, headers: dict, cookie_ttl: float = 15 * 60, pool_size: int = 16, rate_limiter=None):
+        """
+        :param headers: Headers sent with every request
+        :param cookie_ttl: Re-warm cookies after this many seconds even if none report an expiry
+        :param pool_size: Maximum keep-alive connections kept per host
+        :param rate_limiter: Optional nse_throttle limiter every request is paced by
+        """
+        self.headers = headers
+        self.cookie_ttl = cookie_ttl
+        self.rate_limiter = rate_limiter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._warmed_at = None
+        self._lock = threading.Lock()
+
+    def warm(self, ref_url: str = None, force: bool = False):
+        """
+        Load a NSE web page to (re)acquire the session cookies. Concurrent callers share one warm-up.
+        :param ref_url: Page to load. Defaults to the NSE home page
+        :param force: Warm even if the current cookies have not expired
+        """
+        warmed_at = self._warmed_at
+        with self._lock:
+            if self._warmed_at != warmed_at or not (force or self.cookies_expired()):
+                return  # Another thread warmed while we waited
+            self.fetch(ref_url or self.home_url, headers=self.headers, timeout=10)
+            # Expired cookies the page did not reset would otherwise keep cookies_expired() True
+            self.session.cookies.clear_expired_cookies()
+            self._warmed_at = time.time()
+
+    def fetch(self, url: str, **kwargs):
+        """
+        Plain GET paced by the rate limiter, without any cookie handling. Used for archive files.
+        :param url: Url to fetch
+        :param kwargs: Further requests.Session.get arguments
+        :return: requests.Response
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        response = self.session.get(url, **kwargs)
+        if self.rate_limiter is not None:
+            self.rate_limiter.feedback(url, response.status_code, response.headers.get('Retry-After'))
+        return response
+
+    def cookies_expired(self) -> bool:
+        """Return True if cookies were never warmed, are older than cookie_ttl, or any has expired."""
+        if self._warmed_at is None:
+            return True
+        now = time.time()
+        if now - self._warmed_at > self.cookie_ttl:
+            return True
+        return any(cookie.expires is not None and cookie.expires <= now for cookie in self.session.cookies)
+
+    def get(self, url: str, ref_url: str = None, **kwargs):
+        """
+        GET a NSE url with warm cookies, re-warming once on 401/403
+        :param url: Url to fetch
+        :param ref_url: Page that issues the cookies for this url, used when re-warming
+        :return: requests.Response
+        """
+        kwargs.setdefault('headers', self.headers)
+        if self.cookies_expired():
+            try:
+                self.warm(ref_url)
+            except requests.RequestException:
+                pass  # Try the call anyway, it reports the real failure
+        response = self.fetch(url, **kwargs)
+        if response.status_code in (401, 403):
+            self.warm(ref_url, force=True)
+            response = self.fetch(url, **kwargs)
+        return response
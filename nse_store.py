@@ -0,0 +1,136 @@
+"""
+Columnar Parquet store for parsed NSE bhavcopies.
+
+Each parsed report is written once per trade date under a hive-style layout::
+
+    <root>/report=<report>/date=<YYYY-MM-DD>/part.parquet
+
+Rows are sorted by the report's symbol column and written in small row groups,
+so a query for a handful of symbols reads only the matching row groups of the
+partitions inside the requested date range.
+"""
+
+import os
+from datetime import date, datetime
+
+import pandas as pd
+
+import nse_schema
+from nse_cache import as_date, unique_tmp_path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser('~'), '.nse_data_downloader', 'store')
+
+# Column holding the instrument name in each report, used for sorting and symbol pruning
+SYMBOL_COLUMNS = {
+    'sec_bhavdata_full': 'SYMBOL',
+    'ind_close_all': 'Index Name',
+    'cm_bhavcopy': 'TckrSymb',
+    'fo_bhavcopy': 'TckrSymb',
+}
+
+
+class BhavCopyStore:
+    """
+    Persistent Parquet store of parsed bhavcopies partitioned by report type and trade date.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, row_group_size: int = 128):
+        """
+        :param root: Directory that holds the partitions
+        :param row_group_size: Rows per Parquet row group. Smaller groups prune tighter on symbol filters
+        """
+        if pa is None:
+            raise ImportError("BhavCopyStore requires pyarrow. Install with: uv pip install pyarrow")
+        self.root = root
+        self.row_group_size = row_group_size
+        os.makedirs(root, exist_ok=True)
+
+    def _report_dir(self, report: str) -> str:
+        return os.path.join(self.root, f"report={report}")
+
+    def _partition_path(self, report: str, trade_date) -> str:
+        day = as_date(trade_date).strftime('%Y-%m-%d')
+        return os.path.join(self._report_dir(report), f"date={day}", 'part.parquet')
+
+    def has(self, report: str, trade_date) -> bool:
+        """Return True if the report for the trade date is already stored."""
+        return os.path.exists(self._partition_path(report, trade_date))
+
+    def write(self, report: str, trade_date, df: pd.DataFrame):
+        """
+        Write one parsed bhavcopy into its partition, replacing any existing one
+        :param report: Report type eg: 'sec_bhavdata_full'
+        :param trade_date: datetime/date or 'dd-mm-YYYY' string
+        :param df: Parsed bhavcopy data frame
+        """
+        if df is None or df.empty:
+            return
+        symbol_col = SYMBOL_COLUMNS.get(report)
+        if symbol_col in df.columns:
+            df = df.sort_values(symbol_col, kind='stable')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        path = self._partition_path(report, trade_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = unique_tmp_path(path)
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_size, write_statistics=True)
+        os.replace(tmp_path, path)
+
+    def dates(self, report: str, from_date=None, to_date=None):
+        """
+        List the trade dates stored for a report, optionally limited to a date range
+        :return: sorted list of datetime.date
+        """
+        report_dir = self._report_dir(report)
+        if not os.path.isdir(report_dir):
+            return []
+        start = as_date(from_date) if from_date is not None else date.min
+        end = as_date(to_date) if to_date is not None else date.max
+        stored = []
+        for name in os.listdir(report_dir):
+            if not name.startswith('date='):
+                continue
+            day = datetime.strptime(name[len('date='):], '%Y-%m-%d').date()
+            if start <= day <= end and os.path.exists(os.path.join(report_dir, name, 'part.parquet')):
+                stored.append(day)
+        return sorted(stored)
+
+    def query(self, report: str, symbols=None, columns=None, from_date=None, to_date=None):
+        """
+        Read stored rows for a report. Only partitions inside the date range are opened and,
+        within each, only row groups whose symbol statistics can match are read.
+        :param report: Report type eg: 'sec_bhavdata_full'
+        :param symbols: Optional symbol or list of symbols to keep
+        :param columns: Optional list of columns to read
+        :param from_date: Optional start date (inclusive), datetime/date or 'dd-mm-YYYY'
+        :param to_date: Optional end date (inclusive), datetime/date or 'dd-mm-YYYY'
+        :return: pandas data frame with a TRADE_DATE column, in date order
+        """
+        symbol_col = SYMBOL_COLUMNS.get(report)
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        filters = [(symbol_col, 'in', list(symbols))] if symbols and symbol_col else None
+        if columns is not None and symbol_col and symbol_col not in columns and symbols:
+            columns = [symbol_col] + list(columns)
+
+        frames = []
+        for day in self.dates(report, from_date, to_date):
+            table = pq.read_table(self._partition_path(report, day), columns=columns, filters=filters)
+            if table.num_rows == 0:
+                continue
+            frame = table.to_pandas()
+            frame.insert(0, 'TRADE_DATE', pd.Timestamp(day))
+            frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(columns=['TRADE_DATE'] + (list(columns) if columns else []))
+        return nse_schema.concat(frames, ignore_index=True)
+
@@ -0,0 +1,474 @@
+"""
+Per-symbol time-series index over parsed bhavcopies.
+
+Every indexed day is split by symbol and appended to one fixed-width binary file per
+symbol, so a symbol's whole history is a single contiguous read instead of one file per
+trade date::
+
+    <root>/<report>/manifest.json
+    <root>/<report>/<symbol>.bin      (numpy records: Date, Open, High, Low, Close, ...)
+
+The manifest holds the committed row count of every symbol file and the indexed dates.
+It is replaced atomically after each batch of appends, and bytes past the committed
+count (a batch interrupted before its manifest write) are truncated before the next
+append to that file, so the index never holds a partial or duplicated day. Appends and
+compaction hold <root>/<report>/.lock, so the CLI, backfill and web app processes can
+write one index: each re-reads the manifest under the lock before it appends.
+
+SymbolIndexReader maps the symbol files read-only with np.memmap: series are zero-copy
+views, and cross-sectional scans binary-search each file's Date field, touching a few
+pages per symbol rather than loading whole histories.
+"""
+
+import bisect
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from nse_cache import as_date
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser('~'), '.nse_data_downloader', 'symbol_index')
+
+# Indexed fields per report: record field -> bhavcopy column
+INDEX_FIELDS = {
+    'sec_bhavdata_full': {
+        'symbol': 'SYMBOL',
+        'fields': {'Open': 'OPEN_PRICE', 'High': 'HIGH_PRICE', 'Low': 'LOW_PRICE', 'Close': 'CLOSE_PRICE',
+                   'Prev_Close': 'PREV_CLOSE', 'Volume': 'TTL_TRD_QNTY', 'Turnover_Lacs': 'TURNOVER_LACS',
+                   'Trades': 'NO_OF_TRADES', 'Deliv_Qty': 'DELIV_QTY', 'Deliv_Per': 'DELIV_PER'},
+    },
+    'ind_close_all': {
+        'symbol': 'Index Name',
+        'fields': {'Open': 'Open Index Value', 'High': 'High Index Value', 'Low': 'Low Index Value',
+                   'Close': 'Closing Index Value', 'Volume': 'Volume', 'Turnover_Cr': 'Turnover (Rs. Cr.)',
+                   'PE': 'P/E', 'PB': 'P/B', 'Div_Yield': 'Div Yield'},
+    },
+}
+
+# Fields parsed as float32 that NSE publishes with two decimals
+_ROUNDED = {'Deliv_Per', 'PE', 'PB', 'Div_Yield'}
+
+
+def _lock_file(fh, lock: bool):
+    """Take or release an exclusive lock on an open file, waiting for other processes."""
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX if lock else fcntl.LOCK_UN)
+    else:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK if lock else msvcrt.LK_UNLCK, 1)
+
+
+def record_dtype(report: str) -> np.dtype:
+    """Fixed-width record layout of a report's symbol files (blanks are stored as NaN)."""
+    return np.dtype([('Date', 'datetime64[D]')] + [(name, 'f8') for name in INDEX_FIELDS[report]['fields']])
+
+
+class SymbolIndex:
+    """
+    Append-only per-symbol OHLCV (+ delivery) arrays built from parsed bhavcopies.
+    """
+
+    def __init__(self, root: str = DEFAULT_INDEX_DIR):
+        """
+        :param root: Directory that holds one sub-directory per indexed report
+        """
+        self.root = root
+        self._manifests = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _report_dir(self, report: str) -> str:
+        return os.path.join(self.root, report)
+
+    def _symbol_path(self, report: str, symbol: str) -> str:
+        return os.path.join(self._report_dir(report), quote(symbol, safe=' ') + '.bin')
+
+    def _manifest(self, report: str) -> dict:
+        if report not in self._manifests:
+            self._manifests[report] = self._load_manifest(report)
+        return self._manifests[report]
+
+    def _load_manifest(self, report: str) -> dict:
+        path = os.path.join(self._report_dir(report), 'manifest.json')
+        try:
+            with open(path, 'r') as fh:
+                manifest = json.load(fh)
+                stamp = os.fstat(fh.fileno())
+        except (OSError, ValueError):
+            manifest, stamp = {'rows': {}, 'dates': [], 'sorted': True}, None
+        manifest['date_set'] = set(manifest['dates'])
+        manifest['stamp'] = (stamp.st_ino, stamp.st_mtime_ns, stamp.st_size) if stamp else None
+        return manifest
+
+    @contextmanager
+    def _writing(self, report: str):
+        """
+        Hold the report's lock file and yield its manifest as last saved by any process.
+        :return: manifest dict, to be saved with _save_manifest before the lock is released
+        """
+        with self._lock:
+            os.makedirs(self._report_dir(report), exist_ok=True)
+            with open(os.path.join(self._report_dir(report), '.lock'), 'a+b') as lock_fh:
+                _lock_file(lock_fh, True)
+                try:
+                    manifest = self._manifests.get(report)
+                    try:
+                        stat = os.stat(os.path.join(self._report_dir(report), 'manifest.json'))
+                        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        stamp = None
+                    if manifest is None or manifest['stamp'] != stamp:
+                        manifest = self._manifests[report] = self._load_manifest(report)
+                    yield manifest
+                except BaseException:
+                    self._manifests.pop(report, None)  # Appends not saved: reload the manifest next time
+                    raise
+                finally:
+                    _lock_file(lock_fh, False)
+
+    def _save_manifest(self, report: str, manifest: dict):
+        path = os.path.join(self._report_dir(report), 'manifest.json')
+        tmp_path = path + '.tmp'  # Only written under the report's lock file
+        with open(tmp_path, 'w') as fh:
+            json.dump({'rows': manifest['rows'], 'dates': sorted(manifest['date_set']),
+                       'sorted': manifest['sorted']}, fh)
+        os.replace(tmp_path, path)
+        stat = os.stat(path)
+        manifest['stamp'] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def has(self, report: str, trade_date) -> bool:
+        """Return True if the report's rows for the trade date are indexed."""
+        return report in INDEX_FIELDS and as_date(trade_date).isoformat() in self._manifest(report)['date_set']
+
+    def dates(self, report: str, from_date=None, to_date=None):
+        """
+        Indexed trade dates of a report, optionally limited to a date range
+        :return: sorted list of datetime.date
+        """
+        start = as_date(from_date).isoformat() if from_date is not None else ''
+        end = as_date(to_date).isoformat() if to_date is not None else '9999'
+        return [date.fromisoformat(day) for day in sorted(self._manifest(report)['date_set']) if start <= day <= end]
+
+    def symbols(self, report: str = 'sec_bhavdata_full'):
+        """Sorted list of the symbols indexed for a report."""
+        return sorted(self._manifest(report)['rows'])
+
+    def _records(self, report: str, trade_date, bhav_df: pd.DataFrame):
+        """One record per symbol of a day's bhavcopy (first listed row, as extract_ohlcv does)."""
+        layout = INDEX_FIELDS[report]
+        day_df = bhav_df.drop_duplicates(subset=layout['symbol'], keep='first')
+        records = np.empty(len(day_df), dtype=record_dtype(report))
+        records['Date'] = np.datetime64(as_date(trade_date), 'D')
+        for name, column in layout['fields'].items():
+            values = pd.to_numeric(day_df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan) \
+                if column in day_df.columns else np.nan
+            records[name] = np.round(values, 2) if name in _ROUNDED else values
+        return day_df[layout['symbol']].astype(str).str.strip().to_numpy(), records
+
+    def add_days(self, report: str, days) -> int:
+        """
+        Append whole days to the index in one batch: each symbol file is opened once per batch
+        :param report: 'sec_bhavdata_full' or 'ind_close_all'
+        :param days: Iterable of (trade_date, parsed bhavcopy data frame)
+        :return: Number of days added. Days already indexed are skipped
+        """
+        if report not in INDEX_FIELDS:
+            return 0
+        with self._writing(report) as manifest:
+            batch = {}
+            for trade_date, bhav_df in days:
+                day = as_date(trade_date).isoformat()
+                if bhav_df is not None and not bhav_df.empty and day not in manifest['date_set']:
+                    batch[day] = self._records(report, trade_date, bhav_df)
+            if not batch:
+                return 0
+
+            ordered = sorted(batch)
+            symbols = np.concatenate([batch[day][0] for day in ordered])
+            records = np.concatenate([batch[day][1] for day in ordered])
+            # Stable sort by symbol keeps each symbol's rows in date order
+            order = np.argsort(symbols, kind='stable')
+            symbols, records = symbols[order], records[order]
+            starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+            ends = np.r_[starts[1:], len(symbols)]
+
+            latest = max(manifest['date_set']) if manifest['date_set'] else ''
+            itemsize = records.itemsize
+            for start, end in zip(starts, ends):
+                symbol = str(symbols[start])
+                with open(self._symbol_path(report, symbol), 'ab') as fh:
+                    # Drop bytes of an earlier batch that never committed its manifest
+                    fh.truncate(manifest['rows'].get(symbol, 0) * itemsize)
+                    fh.write(records[start:end].tobytes())
+                manifest['rows'][symbol] = manifest['rows'].get(symbol, 0) + int(end - start)
+            if ordered[0] < latest:
+                manifest['sorted'] = False  # A backfilled older day was appended after newer ones
+            manifest['date_set'].update(ordered)
+            self._save_manifest(report, manifest)
+            return len(ordered)
+
+    def add_day(self, report: str, trade_date, bhav_df: pd.DataFrame) -> bool:
+        """
+        Append one day's bhavcopy to the index. NseUtils(index=...) calls this after every parsed download
+        :return: True if the day was added
+        """
+        return self.add_days(report, [(trade_date, bhav_df)]) > 0
+
+    def build(self, nse, report: str, from_date, to_date, batch_days: int = 20, max_workers: int = 4) -> int:
+        """
+        Index a date range, fetching bhavcopies through nse (served from its cache when present)
+        :param nse: NseUtils instance
+        :param report: 'sec_bhavdata_full' or 'ind_close_all'
+        :param from_date: Start date, date/datetime or 'dd-mm-YYYY'
+        :param to_date: End date, date/datetime or 'dd-mm-YYYY'
+        :param batch_days: Days appended per batch
+        :param max_workers: Number of days fetched concurrently
+        :return: Number of days added
+        """
+        dates = [pd.Timestamp(day).to_pydatetime() for day in nse.calendar.trading_days(from_date, to_date)
+                 if not self.has(report, day)]
+        indexed_before = len(self._manifest(report)['date_set'])
+        pending = []
+        for trade_date, bhav_df, error in nse.iter_bhav_copy_dates(report, dates, max_workers):
+            if error is None:
+                pending.append((trade_date, bhav_df))
+            if len(pending) >= batch_days:
+                self.add_days(report, pending)
+                pending = []
+        self.add_days(report, pending)
+        # Days may also arrive through nse's own hook when it was created with index=self
+        return len(self._manifest(report)['date_set']) - indexed_before
+
+    def _resolve(self, report: str, symbol: str):
+        """Indexed spelling of a symbol, matched case-insensitively."""
+        rows = self._manifest(report)['rows']
+        if symbol in rows:
+            return symbol
+        wanted = symbol.strip().upper()
+        return next((name for name in rows if name.upper() == wanted), None)
+
+    def read(self, symbol: str, report: str = 'sec_bhavdata_full') -> np.ndarray:
+        """
+        Whole indexed history of one symbol as a numpy record array, in date order
+        :param symbol: Stock symbol or index name
+        :param report: 'sec_bhavdata_full' or 'ind_close_all'
+        :return: numpy structured array (empty if the symbol is not indexed)
+        """
+        dtype = record_dtype(report)
+        name = self._resolve(report, symbol)
+        if name is None:
+            return np.empty(0, dtype=dtype)
+        manifest = self._manifest(report)
+        records = np.fromfile(self._symbol_path(report, name), dtype=dtype, count=manifest['rows'][name])
+        if not manifest['sorted']:
+            records = records[np.argsort(records['Date'], kind='stable')]
+        return records
+
+    def history(self, symbol: str, report: str = 'sec_bhavdata_full', from_date=None, to_date=None) -> pd.DataFrame:
+        """
+        Indexed history of one symbol
+        :param symbol: Stock symbol or index name
+        :param report: 'sec_bhavdata_full' or 'ind_close_all'
+        :param from_date: Optional start date (inclusive)
+        :param to_date: Optional end date (inclusive)
+        :return: pandas data frame with Symbol, Date (datetime64) and the report's indexed fields
+        """
+        records = self.read(symbol, report)
+        lo = np.searchsorted(records['Date'], np.datetime64(as_date(from_date), 'D')) if from_date is not None else 0
+        hi = np.searchsorted(records['Date'], np.datetime64(as_date(to_date), 'D'), side='right') \
+            if to_date is not None else len(records)
+        df = pd.DataFrame(records[lo:hi])
+        df['Date'] = df['Date'].astype('datetime64[ns]')
+        df.insert(0, 'Symbol', self._resolve(report, symbol) or symbol)
+        return df
+
+    def ohlcv(self, symbols, report: str = 'sec_bhavdata_full', from_date=None, to_date=None) -> pd.DataFrame:
+        """
+        Long OHLCV frame for many symbols, one contiguous read per symbol
+        :param symbols: List of stock symbols or index names, matched case-insensitively
+        :param report: 'sec_bhavdata_full' or 'ind_close_all'
+        :param from_date: Optional start date (inclusive)
+        :param to_date: Optional end date (inclusive)
+        :return: pandas data frame with columns Symbol, Date (datetime64), Open, High, Low, Close, Volume
+        """
+        columns = ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+        frames = [self.history(symbol, report, from_date, to_date)[columns] for symbol in symbols
+                  if self._resolve(report, symbol) is not None]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        df = pd.concat(frames, ignore_index=True)
+        if df['Volume'].notna().all():
+            df['Volume'] = df['Volume'].astype('int64')
+        return df
+
+    def reader(self, report: str = 'sec_bhavdata_full', max_open: int = 256):
+        """Memory-mapped read-only view of a report's index, see SymbolIndexReader. Compacts an unsorted index first."""
+        self.compact(report)
+        return SymbolIndexReader(self.root, report, max_open)
+
+    def compact(self, report: str):
+        """Rewrite every symbol file in date order after out-of-order backfills, so reads need no sort."""
+        with self._writing(report) as manifest:
+            if manifest['sorted']:
+                return
+            for symbol in manifest['rows']:
+                records = self.read(symbol, report)
+                path = self._symbol_path(report, symbol)
+                records.tofile(path + '.tmp')  # Only written under the report's lock file
+                os.replace(path + '.tmp', path)
+            manifest['sorted'] = True
+            self._save_manifest(report, manifest)
+
+
+class SymbolIndexReader:
+    """
+    Zero-copy, read-only access to a SymbolIndex through memory-mapped numpy record arrays.
+
+    Arrays returned here are backed by the OS page cache, so scanning the whole universe costs
+    only the pages actually touched. Files are kept mapped in an LRU of max_open entries (each
+    map holds a file descriptor); arrays already handed out stay valid after eviction.
+    """
+
+    def __init__(self, root: str = DEFAULT_INDEX_DIR, report: str = 'sec_bhavdata_full', max_open: int = 256):
+        """
+        :param root: SymbolIndex directory
+        :param report: 'sec_bhavdata_full' or 'ind_close_all'
+        :param max_open: Most symbol files kept mapped at once
+        """
+        self.root = root
+        self.report = report
+        self.dtype = record_dtype(report)
+        self.max_open = max_open
+        self._maps = OrderedDict()
+        self.refresh()
+
+    def refresh(self):
+        """
+        Pick up days appended since the reader was opened. The reader never writes: while the index holds
+        out-of-order days (until SymbolIndex.compact), each symbol is read and sorted in memory instead of mapped.
+        """
+        manifest = self._read_manifest()
+        self.sorted = manifest['sorted']
+        if not self.sorted:
+            print(f"Warning: {self.report} index holds out-of-order days; records are copied and sorted, not mapped. "
+                  f"Run SymbolIndex.compact('{self.report}') to restore zero-copy reads")
+        self._rows = manifest['rows']
+        self._upper = {symbol.upper(): symbol for symbol in self._rows}
+        self._maps.clear()
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.root, self.report, 'manifest.json'), 'r') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {'rows': {}, 'sorted': True}
+
+    @property
+    def symbols(self):
+        """Sorted list of indexed symbols."""
+        return sorted(self._rows)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol.strip().upper() in self._upper
+
+    def __getitem__(self, symbol: str) -> np.ndarray:
+        return self.records(symbol)
+
+    def records(self, symbol: str) -> np.ndarray:
+        """
+        Whole history of a symbol as a read-only memory-mapped record array (no data is read until used),
+        eg: reader.records('RELIANCE')['Close']
+        :param symbol: Stock symbol or index name, matched case-insensitively
+        :return: numpy.memmap structured array in date order (an in-memory copy while the index is not compacted)
+        """
+        name = self._upper.get(symbol.strip().upper())
+        if name is None:
+            raise KeyError(f"{symbol} is not indexed for {self.report}")
+        if name in self._maps:
+            self._maps.move_to_end(name)
+            return self._maps[name]
+        rows = self._rows[name]
+        if rows == 0:
+            return np.empty(0, dtype=self.dtype)
+        path = os.path.join(self.root, self.report, quote(name, safe=' ') + '.bin')
+        records = np.memmap(path, dtype=self.dtype, mode='r', shape=(rows,))
+        if not self.sorted:
+            records = records[np.argsort(records['Date'], kind='stable')]
+        self._maps[name] = records
+        if len(self._maps) > self.max_open:
+            self._maps.popitem(last=False)
+        return records
+
+    @staticmethod
+    def _position(records: np.ndarray, day, side: str = 'left') -> int:
+        # bisect reads ~log2(n) Date values; np.searchsorted would first copy the strided Date field
+        target = np.datetime64(as_date(day), 'D')
+        dates = records['Date']
+        return bisect.bisect_left(dates, target) if side == 'left' else bisect.bisect_right(dates, target)
+
+    def window(self, symbol: str, from_date=None, to_date=None) -> np.ndarray:
+        """
+        Zero-copy slice of a symbol's records between two dates (inclusive)
+        :return: numpy.memmap structured array
+        """
+        records = self.records(symbol)
+        lo = self._position(records, from_date) if from_date is not None else 0
+        hi = self._position(records, to_date, 'right') if to_date is not None else len(records)
+        return records[lo:hi]
+
+    def cross_section(self, day, fields=('Open', 'High', 'Low', 'Close', 'Volume'), symbols=None) -> pd.DataFrame:
+        """
+        Values of every symbol on one trade date, reading a few pages per symbol file
+        :param day: Trade date, date/datetime or 'dd-mm-YYYY'
+        :param fields: Record fields to return
+        :param symbols: Optional list of symbols (default: all indexed)
+        :return: pandas data frame indexed by Symbol, only symbols with a row on that date
+        """
+        target = np.datetime64(as_date(day), 'D')
+        names, rows = [], []
+        for symbol in symbols if symbols is not None else self.symbols:
+            if symbol not in self:
+                continue
+            records = self.records(symbol)
+            position = self._position(records, day)
+            if position < len(records) and records['Date'][position] == target:
+                names.append(self._upper[symbol.strip().upper()])
+                rows.append(records[position])
+        data = np.array(rows, dtype=self.dtype) if rows else np.empty(0, dtype=self.dtype)
+        return pd.DataFrame({field: data[field] for field in fields}, index=pd.Index(names, name='Symbol'))
+
+    def panel(self, field: str = 'Close', from_date=None, to_date=None, symbols=None) -> pd.DataFrame:
+        """
+        Wide date x symbol frame of one field over a date range; only that range is read from each file
+        :param field: Record field eg: 'Close', 'Deliv_Per'
+        :param from_date: Optional start date (inclusive)
+        :param to_date: Optional end date (inclusive)
+        :param symbols: Optional list of symbols (default: all indexed)
+        :return: pandas data frame indexed by Date with one column per symbol
+        """
+        columns = {}
+        for symbol in symbols if symbols is not None else self.symbols:
+            if symbol not in self:
+                continue
+            records = self.window(symbol, from_date, to_date)
+            if len(records):
+                columns[self._upper[symbol.strip().upper()]] = pd.Series(
+                    np.asarray(records[field]), index=pd.DatetimeIndex(np.asarray(records['Date']), name='Date'))
+        if not columns:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='Date'))
+        return pd.DataFrame(columns)
@@ -0,0 +1,185 @@
+"""
+Request throttling shared by all NseUtils workers.
+
+Limiters expose acquire(url) before a request and feedback(url, status_code, retry_after)
+after it, so NseUtils can use any of them:
+
+- RateLimiter: one fixed pace for every request
+- AdaptiveRateLimiter: a token bucket per host that slows down with jittered pauses when
+  NSE pushes back (403/429/5xx) and speeds back up while responses are healthy
+"""
+
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly so that no more than
+    `requests_per_second` are started across all threads sharing it.
+    """
+
+    def __init__(self, requests_per_second: float):
+        """
+        :param requests_per_second: Maximum request rate. None or 0 disables limiting
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str = None):
+        """Block until the caller may start its next request."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+
+    def feedback(self, url: str, status_code: int, retry_after=None):
+        """A fixed pace ignores server feedback."""
+
+
+class _HostBucket:
+    """
+    Token bucket for one host, kept as the theoretical arrival time of the next request (GCRA).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.start_rate = rate
+        self.burst = burst
+        self.next_at = time.monotonic()
+        self.paused_until = 0.0
+        self.failures = 0
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return how long the caller must wait for it."""
+        interval = 1.0 / self.rate
+        start = max(now, self.paused_until)
+        next_at = max(self.next_at, start)
+        slot = max(start, next_at - (self.burst - 1) * interval)
+        self.next_at = next_at + interval
+        return slot - now
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe per-host token buckets whose rate adapts to how NSE responds.
+
+    Each host (eg: www.nseindia.com, nsearchives.nseindia.com) starts at its own rate. A 403,
+    429 or 5xx halves that host's rate and pauses it for an exponentially growing, jittered delay
+    (or the server's Retry-After). Every healthy response adds `recovery_step` requests/second
+    back, up to `max_rate`.
+    """
+
+    backoff_statuses = frozenset({403, 429, 500, 502, 503, 504})
+
+    def __init__(self, requests_per_second: float = 5, host_rates: dict = None, max_rate: float = None,
+                 min_rate: float = 0.2, burst: int = 1, backoff_factor: float = 0.5, recovery_step: float = 0.25,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        :param requests_per_second: Starting rate for every host not listed in host_rates
+        :param host_rates: Optional dict of host -> starting rate
+        :param max_rate: Rate a host may recover up to. Defaults to 4x its starting rate
+        :param min_rate: Floor the rate is never reduced below
+        :param burst: Requests a host may make back to back after being idle
+        :param backoff_factor: Rate multiplier applied on each push back
+        :param recovery_step: Requests/second added back after each healthy response
+        :param base_delay: Pause after the first push back in a row; doubles with each further one
+        :param max_delay: Longest pause
+        """
+        self.requests_per_second = requests_per_second
+        self.host_rates = dict(host_rates or {})
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = max(1, burst)
+        self.backoff_factor = backoff_factor
+        self.recovery_step = recovery_step
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(url: str) -> str:
+        return (urlsplit(url).hostname or '') if url else ''
+
+    def _bucket(self, host: str) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = _HostBucket(self.host_rates.get(host, self.requests_per_second), self.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url: str = None):
+        """Block until the caller may start a request to the url's host."""
+        if not self.requests_per_second and not self.host_rates:
+            return
+        with self._lock:
+            wait = self._bucket(self.host(url)).reserve(time.monotonic())
+        if wait > 0:
+            time.sleep(wait)
+
+    def feedback(self, url: str, status_code: int, retry_after=None):
+        """
+        Adapt the host's pace to a response
+        :param url: Requested url
+        :param status_code: HTTP status of the response
+        :param retry_after: Optional Retry-After header value in seconds
+        """
+        if not self.requests_per_second and not self.host_rates:
+            return
+        with self._lock:
+            bucket = self._bucket(self.host(url))
+            max_rate = self.max_rate or bucket.start_rate * 4
+            if status_code in self.backoff_statuses:
+                bucket.failures += 1
+                bucket.rate = max(self.min_rate, bucket.rate * self.backoff_factor)
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = min(self.max_delay, self.base_delay * 2 ** (bucket.failures - 1))
+                    delay *= random.uniform(0.5, 1.5)
+                now = time.monotonic()
+                bucket.paused_until = max(bucket.paused_until, now + delay)
+                bucket.next_at = bucket.paused_until
+            else:
+                bucket.failures = 0
+                bucket.rate = min(max_rate, bucket.rate + self.recovery_step)
+
+    def rates(self) -> dict:
+        """Current requests/second per host seen so far."""
+        with self._lock:
+            return {host: bucket.rate for host, bucket in self._buckets.items()}
+
+
+class AsyncRateLimiter:
+    """
+    Asyncio counterpart of RateLimiter, shared by all coroutines of one event loop.
+    """
+
+    def __init__(self, requests_per_second: float):
+        """
+        :param requests_per_second: Maximum request rate. None or 0 disables limiting
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = time.monotonic()
+
+    async def acquire(self):
+        """Wait until the caller may start its next request."""
+        if not self.interval:
+            return
+        # No await between reading and reserving the slot, so this is atomic within the event loop
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,263 @@
+"""
+Background download worker shared by every session of the Streamlit app.
+
+DownloadWorker owns one long-lived NseUtils (cookies warmed once, one rate limiter for
+all users) and a shared BhavCopyCache. Downloads are submitted as jobs and run on the
+worker's threads: the caller gets a DownloadJob back at once and polls its progress,
+message and result, so a script run never blocks on NSE.
+
+A prefetch thread fetches the latest trading day's reports as soon as NSE has published
+them after the close, so the first request of the next morning is served from disk.
+
+ResultCache memoizes finished results across sessions: complete closed ranges are kept,
+ranges that include today or have failed days expire after a TTL.
+
+The worker is a thread pool inside the Streamlit server process (held by st.cache_resource),
+not a separate process: downloads wait on the network, not the GIL, and jobs, progress and
+results stay plain objects with no IPC. The cost is that it serves the sessions of one server
+only. A restart drops queued jobs and the ResultCache (the bhavcopy cache is on disk and
+survives), and each replica of a scaled-out app runs its own worker and prefetch; point them
+at one cache directory to share downloads.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time
+
+from NseUtility import NseUtils
+from nse_cache import IST, BhavCopyCache, as_date
+
+
+# Bhavcopies are usually on the archives by 18:00 IST
+PUBLISH_TIME = dt_time(18, 30)
+PREFETCH_REPORTS = ('sec_bhavdata_full', 'ind_close_all')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class DownloadJob:
+    """
+    Handle of one submitted download. Attributes are written by the worker thread and read by the UI.
+    """
+
+    def __init__(self, job_id: str, description: str = ''):
+        self.id = job_id
+        self.description = description
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = 'Waiting for a free worker...'
+        self.warnings = []
+        self.failed_days = 0  # Days the job could not download; its result is partial when > 0
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self) -> bool:
+        """True once the job has finished, successfully or not."""
+        return self.status in (DONE, FAILED)
+
+    def update(self, progress: float = None, message: str = None):
+        """
+        Report progress from inside the job
+        :param progress: Fraction done, 0.0 to 1.0
+        :param message: Status line shown to the user
+        """
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+
+class DownloadWorker:
+    """
+    Thread pool of download jobs sharing one NseUtils, plus an after-close prefetch of the latest reports.
+    """
+
+    def __init__(self, nse: NseUtils = None, max_jobs: int = 2, prefetch_reports=PREFETCH_REPORTS,
+                 publish_time: dt_time = PUBLISH_TIME, poll_interval: float = 15 * 60, prefetch: bool = True,
+                 keep_finished: float = 60 * 60):
+        """
+        :param nse: NseUtils shared by every job. Defaults to one with a BhavCopyCache that also keeps the
+        current day's reports once published
+        :param max_jobs: Jobs run at the same time; further jobs wait in the queue
+        :param prefetch_reports: Reports fetched for the latest trading day
+        :param publish_time: IST time after which the current day's reports are expected on the archives
+        :param poll_interval: Seconds between prefetch checks
+        :param prefetch: Start the prefetch thread
+        :param keep_finished: Seconds a finished job stays available to job()
+        """
+        self.nse = nse or NseUtils(cache=BhavCopyCache(same_day_after=publish_time))
+        self.prefetch_reports = tuple(prefetch_reports)
+        self.publish_time = publish_time
+        self.poll_interval = poll_interval
+        self.keep_finished = keep_finished
+        self.prefetched = {}  # report -> latest trade date fetched
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='nse-job')
+        self._jobs = {}
+        self._inflight = {}  # key -> job not finished yet
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._prefetch_thread = None
+        if prefetch:
+            self._prefetch_thread = threading.Thread(target=self._prefetch_loop, name='nse-prefetch', daemon=True)
+            self._prefetch_thread.start()
+
+    def submit(self, fn, *args, description: str = '', key=None, **kwargs) -> DownloadJob:
+        """
+        Queue a download
+        :param fn: Callable(nse, job, *args, **kwargs) returning the result. It reports progress with
+        job.update() and may add user facing notes to job.warnings
+        :param description: Short label of the job
+        :param key: Optional hashable identifying the result. While a job with the same key is queued or
+        running, that job is returned instead of starting another
+        :return: DownloadJob, returned before the job starts
+        """
+        with self._lock:
+            if key is not None and key in self._inflight:
+                return self._inflight[key]
+            self._prune()
+            job = DownloadJob(f"job-{next(self._ids)}", description)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._inflight[key] = job
+        self._executor.submit(self._run, job, fn, args, kwargs, key)
+        return job
+
+    def job(self, job_id: str):
+        """The job with this id, or None if unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """All jobs still held, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job: DownloadJob, fn, args, kwargs, key=None):
+        job.status = RUNNING
+        job.update(message='Starting...')
+        try:
+            job.result = fn(self.nse, job, *args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            if key is not None:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def _prune(self):
+        """Forget jobs finished more than keep_finished seconds ago. Caller holds the lock."""
+        cutoff = time.time() - self.keep_finished
+        for job_id in [job.id for job in self._jobs.values() if job.done and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def latest_published_day(self, now: datetime = None) -> date:
+        """
+        The latest trading day whose reports NSE should have published
+        :param now: IST time to judge at. Defaults to now
+        :return: date
+        """
+        now = now or datetime.now(IST).replace(tzinfo=None)
+        calendar = self.nse.calendar
+        if calendar.is_trading_day(now.date()) and now.time() >= self.publish_time:
+            return now.date()
+        return calendar.prev_trading_day(now.date())
+
+    def prefetch_latest(self) -> dict:
+        """
+        Fetch the latest published day's reports into the cache, skipping those already there
+        :return: dict of report -> None when fetched or cached, else the exception
+        """
+        day = self.latest_published_day()
+        trade_date = datetime.combine(day, datetime.min.time())
+        outcome = {}
+        for report in self.prefetch_reports:
+            if self.prefetched.get(report) == day or (self.nse.cache is not None and
+                                                      self.nse.cache.path(report, day) is not None):
+                self.prefetched[report] = day
+                outcome[report] = None
+                continue
+            for _, bhav_df, error in self.nse.iter_bhav_copy_dates(report, [trade_date], max_workers=1):
+                outcome[report] = error
+                if error is None:
+                    self.prefetched[report] = day
+        return outcome
+
+    def _prefetch_loop(self):
+        while True:
+            try:
+                self.prefetch_latest()
+            except Exception:
+                pass  # Not published yet or NSE unreachable: try again next poll
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def close(self):
+        """Stop the prefetch thread and wait for running jobs."""
+        self._stop.set()
+        self._executor.shutdown(wait=True)
+
+
+class ResultCache:
+    """
+    Finished results shared by every session, keyed by whatever identifies a request. Complete results for
+    ranges that ended before today (IST) do not change and never expire; those including today, or missing
+    days that failed to download, expire after ttl.
+    Least recently used entries are dropped above max_entries. Cached results must be treated as read-only.
+    """
+
+    def __init__(self, ttl: float = 10 * 60, max_entries: int = 128):
+        """
+        :param ttl: Seconds a result whose range includes today stays valid
+        :param max_entries: Results kept in memory
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (result, expires_at or None)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The cached result for key, or None on a miss or when it has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            result, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result, to_date, complete: bool = True):
+        """
+        Store a result
+        :param key: Hashable request key
+        :param result: Result to share, eg: a data frame
+        :param to_date: Last date of the range the result covers, date/datetime or 'dd-mm-YYYY'
+        :param complete: False when some days of the range failed to download; the result then expires after
+        ttl like an open range, so the failed days are retried
+        """
+        closed = complete and as_date(to_date) < datetime.now(IST).date()
+        with self._lock:
+            self._entries[key] = (result, None if closed else time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()